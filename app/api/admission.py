@@ -0,0 +1,191 @@
+# app/api/admission.py
+
+"""
+Admission control / load shedding.
+
+Every API request is put in a class:
+- read  : GET/HEAD /calculations..., POST /calculations/lookup
+          (highest priority)
+- write : other /calculations requests
+- auth  : /auth/...                      (lowest priority: bcrypt-heavy)
+Health, metrics, docs, static files and the long-lived event stream
+(GET /calculations/events) are never shed.
+
+A request is rejected with 503 + Retry-After when its class already has
+ADMISSION_MAX_INFLIGHT_<CLASS> requests in flight, or when the current
+pressure reaches the class's shedding threshold. Pressure is the worst
+of three signals, each divided by its limit:
+- event-loop lag (measured by a ticker task)
+- threadpool queue depth (tasks waiting for a worker thread)
+- DB pool saturation (checked-out / capacity; single-connection pools,
+  i.e. the SQLite writer, are reported but not counted)
+
+Auth is shed first (pressure >= 1), then writes (>= 1.25), then reads
+(>= 1.5), so reads keep flowing longest.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import anyio.to_thread
+from sqlalchemy.engine import Engine
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+READ = "read"
+WRITE = "write"
+AUTH = "auth"
+
+# Pressure at which each class starts being shed
+SHED_AT = {AUTH: 1.0, WRITE: 1.25, READ: 1.5}
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    if path.startswith("/auth/"):
+        return AUTH
+    if path == "/calculations/events":
+        return None
+    if path == "/calculations/lookup":
+        return READ
+    if path == "/calculations" or path.startswith("/calculations/"):
+        return READ if method in ("GET", "HEAD") else WRITE
+    return None
+
+
+def pool_stats(engine: Engine) -> Optional[Dict[str, Any]]:
+    pool = engine.pool
+    if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+        return None  # StaticPool / NullPool
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    checked_out = pool.checkedout()
+    return {
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        engines: List[Engine],
+        limits: Optional[Dict[str, int]] = None,
+        max_loop_lag: float = 0.2,
+        max_threadpool_waiting: int = 50,
+        max_pool_utilization: float = 0.9,
+        tick: float = 0.05,
+    ):
+        self.engines = [e for e in engines if e is not None]
+        self.limits = limits or {READ: 200, WRITE: 100, AUTH: 20}
+        self.max_loop_lag = max_loop_lag
+        self.max_threadpool_waiting = max_threadpool_waiting
+        self.max_pool_utilization = max_pool_utilization
+        self.tick = tick
+        self.loop_lag = 0.0
+        self.inflight = {READ: 0, WRITE: 0, AUTH: 0}
+        self.shed = {READ: 0, WRITE: 0, AUTH: 0}
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------------- Signals ----------------
+
+    async def _measure_lag(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.tick)
+            lag = max(0.0, time.perf_counter() - started - self.tick)
+            # Rise immediately, decay smoothly
+            self.loop_lag = max(lag, self.loop_lag * 0.8 + lag * 0.2)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._measure_lag())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def threadpool(self) -> Dict[str, int]:
+        stats = anyio.to_thread.current_default_thread_limiter().statistics()
+        return {
+            "busy": stats.borrowed_tokens,
+            "size": int(stats.total_tokens),
+            "waiting": stats.tasks_waiting,
+        }
+
+    def pressure(self) -> float:
+        """Worst signal relative to its limit (>= 1 means overloaded)."""
+        signals = [
+            self.loop_lag / self.max_loop_lag,
+            self.threadpool()["waiting"] / self.max_threadpool_waiting,
+        ]
+        for engine in self.engines:
+            stats = pool_stats(engine)
+            if stats and stats["capacity"] > 1:
+                signals.append(stats["utilization"] / self.max_pool_utilization)
+        return max(signals)
+
+    def signals(self) -> Dict[str, Any]:
+        return {
+            "pressure": round(self.pressure(), 3),
+            "event_loop_lag_ms": round(self.loop_lag * 1000, 2),
+            "threadpool": self.threadpool(),
+            "db_pools": [pool_stats(e) for e in self.engines],
+            "inflight": dict(self.inflight),
+            "shed_total": dict(self.shed),
+        }
+
+    # ---------------- Admission ----------------
+
+    def admit(self, request_class: str) -> bool:
+        if self.inflight[request_class] >= self.limits[request_class]:
+            return False
+        return self.pressure() < SHED_AT[request_class]
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_class = classify(scope.get("method", ""), scope["path"]) if scope["type"] == "http" else None
+        if request_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        if not controller.admit(request_class):
+            controller.shed[request_class] += 1
+            response = JSONResponse(
+                {"detail": "Server is overloaded, please retry"},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        controller.inflight[request_class] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.inflight[request_class] -= 1
+
+
+def get_admission_controller(engines: List[Engine]) -> AdmissionController:
+    return AdmissionController(
+        engines,
+        limits={
+            READ: settings.ADMISSION_MAX_INFLIGHT_READ,
+            WRITE: settings.ADMISSION_MAX_INFLIGHT_WRITE,
+            AUTH: settings.ADMISSION_MAX_INFLIGHT_AUTH,
+        },
+        max_loop_lag=settings.ADMISSION_MAX_LOOP_LAG_MS / 1000,
+        max_threadpool_waiting=settings.ADMISSION_MAX_THREADPOOL_WAITING,
+        max_pool_utilization=settings.ADMISSION_MAX_DB_POOL_UTILIZATION,
+    )
@@ -0,0 +1,173 @@
+# app/api/cache.py
+
+"""
+Read-through cache for GET /calculations/{calc_id}.
+
+Entries are the serialized `CalculationResponse` JSON, keyed by
+(user_id, calc_id), so one user can never be served another user's row.
+Two tiers:
+- in-process LRU (CALC_CACHE_MAX_ENTRIES, CALC_CACHE_TTL_SECONDS)
+- optional Redis tier shared by all workers (CALC_CACHE_BACKEND=redis)
+
+`invalidate` runs after update/delete commits: it drops the local and
+Redis copies and publishes the key on the `calc-cache-invalidate`
+channel, so every other worker drops its local copy too.
+
+Fills are versioned: take `version()` before reading the row and pass it
+to `set`, which refuses to store once the key has been invalidated since
+(a GET that read the old row while an update committed). The generation
+is bumped locally on every invalidation and, with Redis, in a shared
+`calc-gen:` counter checked atomically with the write. Callers fill only
+from primary reads, never from a lagging replica.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.pubsub import pubsub as default_pubsub
+
+CHANNEL = "calc-cache-invalidate"
+
+# SET the entry only if the generation is still the one read before the fill
+SET_IF_CURRENT = """
+if (redis.call('GET', KEYS[1]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+Version = Tuple[int, Optional[bytes]]
+
+
+def cache_key(user_id, calc_id) -> str:
+    return f"{user_id}:{calc_id}"
+
+
+class CalculationCache:
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl: float = 300,
+        redis_url: Optional[str] = None,
+        pubsub=None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Generation of recently invalidated keys (bounded); older keys read
+        # as `_floor`, the newest generation forgotten, so none is reused
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+        self.redis = None
+        if redis_url:
+            import redis  # optional dependency
+
+            self.redis = redis.Redis.from_url(redis_url)
+            self._set_if_current = self.redis.register_script(SET_IF_CURRENT)
+
+        self.pubsub = pubsub or default_pubsub
+        self.pubsub.subscribe(CHANNEL, self._drop_local)
+
+    # ---------------- Local tier ----------------
+
+    def _get_local(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, body = entry
+            if expires_at < self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def _set_local(self, key: str, body: bytes, generation: Optional[int] = None) -> bool:
+        with self._lock:
+            if generation is not None and self._generation(key) != generation:
+                return False
+            self._entries[key] = (self.clock() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def _drop_local(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._counter += 1
+            self._generations[key] = self._counter
+            self._generations.move_to_end(key)
+            while len(self._generations) > self.max_entries:
+                _, forgotten = self._generations.popitem(last=False)
+                self._floor = max(self._floor, forgotten)
+
+    def _generation(self, key: str) -> int:
+        return self._generations.get(key, self._floor)
+
+    # ---------------- API ----------------
+
+    def get(self, user_id, calc_id) -> Optional[bytes]:
+        key = cache_key(user_id, calc_id)
+        body = self._get_local(key)
+        if body is None and self.redis is not None:
+            body = self.redis.get(f"calc:{key}")
+            if body is not None:
+                self._set_local(key, body)
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    def version(self, user_id, calc_id) -> Version:
+        """Current generation of the key; take it before reading the row."""
+        key = cache_key(user_id, calc_id)
+        with self._lock:
+            local = self._generation(key)
+        remote = None
+        if self.redis is not None:
+            remote = self.redis.get(f"calc-gen:{key}") or b"0"
+        return local, remote
+
+    def set(self, user_id, calc_id, body: bytes, version: Version) -> bool:
+        """Store `body` unless the key was invalidated after `version`."""
+        key = cache_key(user_id, calc_id)
+        local, remote = version
+        if self.redis is not None and not self._set_if_current(
+            keys=[f"calc-gen:{key}", f"calc:{key}"], args=[remote, body, int(self.ttl)]
+        ):
+            return False
+        return self._set_local(key, body, local)
+
+    def invalidate(self, user_id, calc_id) -> None:
+        key = cache_key(user_id, calc_id)
+        self._drop_local(key)
+        if self.redis is not None:
+            with self.redis.pipeline() as pipe:
+                pipe.incr(f"calc-gen:{key}")
+                pipe.expire(f"calc-gen:{key}", int(self.ttl))
+                pipe.delete(f"calc:{key}")
+                pipe.execute()
+        self.pubsub.publish(CHANNEL, key)
+
+    def metrics(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+calculation_cache = CalculationCache(
+    max_entries=settings.CALC_CACHE_MAX_ENTRIES,
+    ttl=settings.CALC_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL if settings.CALC_CACHE_BACKEND == "redis" else None,
+)
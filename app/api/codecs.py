@@ -0,0 +1,229 @@
+# app/api/codecs.py
+
+"""
+Request/response codecs for calculation payloads.
+
+Request bodies (by Content-Type):
+- application/json          -> parsed straight from bytes by pydantic
+- application/x-msgpack     -> {"type": ..., "inputs": [...] | <bin float64 LE>}
+- application/octet-stream  -> raw little-endian float64 inputs; the type
+                               comes from `?type=` or `X-Calculation-Type`
+                               (and an expression from `?expression=` or
+                               `X-Calculation-Expression`)
+
+Binary inputs are checked through a `memoryview` cast (length, division
+by zero) and turned into floats once, skipping per-element pydantic
+validation.
+
+Responses honour `Accept`: msgpack returns the full object with inputs
+as a float64 blob; octet-stream returns the raw inputs with the other
+fields in `X-Calculation-*` headers. Anything else gets JSON.
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import HTTPException, RequestValidationError
+from fastapi.responses import Response
+from pydantic import ValidationError
+
+from app.schemas.calculation import (
+    CalculationBase,
+    CalculationResponse,
+    CalculationType,
+    CalculationUpdate,
+    check_expression,
+    min_inputs,
+)
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+OCTET = "application/octet-stream"
+
+
+def _media_type(value: Optional[str]) -> str:
+    return (value or JSON).split(";")[0].strip().lower()
+
+
+def _invalid(loc: str, msg: str) -> RequestValidationError:
+    return RequestValidationError([{"type": "value_error", "loc": ("body", loc), "msg": msg, "input": None}])
+
+
+# ------------------------------------------------------------------------------
+# Binary inputs
+# ------------------------------------------------------------------------------
+def floats_from_buffer(buffer) -> List[float]:
+    """Little-endian float64 buffer -> list of floats (one C-level pass)."""
+    view = memoryview(buffer)
+    if view.nbytes % 8:
+        raise _invalid("inputs", "binary inputs must be a whole number of float64 values")
+    if sys.byteorder == "little":
+        return view.cast("B").cast("d").tolist()
+    values = array("d", view.tobytes())  # pragma: no cover
+    values.byteswap()  # pragma: no cover
+    return values.tolist()  # pragma: no cover
+
+
+def floats_to_buffer(values: List[float]) -> bytes:
+    values = array("d", values)
+    if sys.byteorder != "little":
+        values.byteswap()  # pragma: no cover
+    return values.tobytes()
+
+
+def _check_inputs(
+    calc_type: Optional[CalculationType],
+    inputs: List[float],
+    expression: Optional[str] = None,
+) -> None:
+    """The CalculationBase/CalculationUpdate rules, without per-item validation.
+
+    Updates (no `calc_type`) get their type's minimum checked by the route.
+    """
+    minimum = min_inputs(calc_type) if calc_type is not None else 1
+    if len(inputs) < minimum:
+        raise _invalid("inputs", f"List should have at least {minimum} items after validation")
+    if calc_type == CalculationType.DIVISION and 0.0 in inputs[1:]:
+        raise _invalid("inputs", "Division by zero is not allowed")
+    if calc_type is not None:
+        try:
+            check_expression(calc_type, expression, inputs)
+        except ValueError as e:
+            raise _invalid("expression", str(e))
+
+
+def _calculation_type(value: Any) -> CalculationType:
+    try:
+        return CalculationType(str(value).lower())
+    except ValueError:
+        raise _invalid("type", f"Unsupported calculation type: {value}")
+
+
+def _msgpack_body(body: bytes) -> Dict[str, Any]:
+    if msgpack is None:
+        raise HTTPException(415, "msgpack support is not installed")  # pragma: no cover
+    try:
+        data = msgpack.unpackb(body, raw=False)
+    except Exception:
+        raise HTTPException(400, "Malformed msgpack body")
+    if not isinstance(data, dict):
+        raise _invalid("body", "msgpack body must be a map")
+    return data
+
+
+# ------------------------------------------------------------------------------
+# Request dependencies
+# ------------------------------------------------------------------------------
+async def calculation_body(request: Request) -> CalculationBase:
+    media_type = _media_type(request.headers.get("content-type"))
+    body = await request.body()
+
+    try:
+        if media_type == OCTET:
+            calc_type = _calculation_type(
+                request.query_params.get("type") or request.headers.get("x-calculation-type")
+            )
+            expression = request.query_params.get("expression") or request.headers.get(
+                "x-calculation-expression"
+            )
+            inputs = floats_from_buffer(body)
+        elif media_type == MSGPACK:
+            data = _msgpack_body(body)
+            if not isinstance(data.get("inputs"), (bytes, bytearray)):
+                # Plain msgpack arrays get the regular pydantic validation
+                return CalculationBase.model_validate(data)
+            calc_type = _calculation_type(data.get("type"))
+            expression = data.get("expression")
+            inputs = floats_from_buffer(data["inputs"])
+        else:
+            return CalculationBase.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    _check_inputs(calc_type, inputs, expression)
+    return CalculationBase.model_construct(type=calc_type, inputs=inputs, expression=expression)
+
+
+async def calculation_update_body(request: Request) -> CalculationUpdate:
+    media_type = _media_type(request.headers.get("content-type"))
+    body = await request.body()
+
+    try:
+        if media_type == OCTET:
+            inputs = floats_from_buffer(body)
+        elif media_type == MSGPACK:
+            data = _msgpack_body(body)
+            if not isinstance(data.get("inputs"), (bytes, bytearray)):
+                return CalculationUpdate.model_validate(data)
+            inputs = floats_from_buffer(data["inputs"])
+        else:
+            return CalculationUpdate.model_validate_json(body or b"{}")
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    _check_inputs(None, inputs)
+    return CalculationUpdate.model_construct(inputs=inputs)
+
+
+def _schema(model) -> Dict[str, Any]:
+    return model.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+def request_body_openapi(model) -> Dict[str, Any]:
+    """`openapi_extra` documenting the accepted request formats."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON: {"schema": _schema(model)},
+                MSGPACK: {"schema": _schema(model)},
+                OCTET: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    }
+
+
+# ------------------------------------------------------------------------------
+# Responses
+# ------------------------------------------------------------------------------
+def negotiate(request: Request) -> str:
+    """Pick the response media type from the Accept header."""
+    accept = request.headers.get("accept", "")
+    for part in accept.split(","):
+        media_type = _media_type(part)
+        if media_type in (MSGPACK, OCTET, JSON):
+            return media_type
+    return JSON
+
+
+def render(request: Request, calc, status_code: int = 200):
+    """Return `calc` as JSON (the ORM object, for response_model) or binary."""
+    media_type = negotiate(request)
+    if media_type == JSON:
+        return calc
+
+    data = CalculationResponse.model_validate(calc)
+    if media_type == MSGPACK:
+        payload = jsonable_encoder(data, exclude={"inputs"})
+        payload["inputs"] = floats_to_buffer(data.inputs)
+        return Response(msgpack.packb(payload, use_bin_type=True), status_code, media_type=MSGPACK)
+
+    headers = {
+        "X-Calculation-Id": str(data.id),
+        "X-Calculation-User-Id": str(data.user_id),
+        "X-Calculation-Type": data.type.value,
+        "X-Calculation-Result": repr(data.result),
+        "X-Calculation-Created-At": data.created_at.isoformat(),
+        "X-Calculation-Updated-At": data.updated_at.isoformat(),
+    }
+    if data.expression is not None:
+        headers["X-Calculation-Expression"] = data.expression
+    return Response(floats_to_buffer(data.inputs), status_code, headers=headers, media_type=OCTET)
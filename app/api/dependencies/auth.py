@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
 from app.core.security import decode_token
+from app.core.revocation import revocation_list
 
 # This tells FastAPI where clients obtain tokens from
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
@@ -34,7 +35,31 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    # Bloom filter first; the database is only asked on a possible hit
+    if revocation_list.is_revoked(db, payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # Routing hint for replicas / read-your-writes stickiness
+    db.info["user_id"] = user_id
+
+    user = (
+        db.query(User)
+        .execution_options(use_replica=True)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if not user:
+        # A fresh account may not have reached the replica yet
+        user = (
+            db.query(User)
+            .execution_options(use_replica=False)
+            .filter(User.id == user_id)
+            .first()
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,144 @@
+# app/api/events.py
+
+"""
+Change feed for GET /calculations/events (Server-Sent Events).
+
+Writers call `calculation_changed` / `calculation_deleted` after their
+commit. The event is published once on the `calc-events` pub/sub channel
+(app.core.pubsub: in-process, or Redis so every worker sees every
+write), and each worker's single `EventBroadcaster` hands it to the
+local streams of that user.
+
+Fan-out is cheap: the SSE frame is formatted once per event and shared
+by all of the user's subscribers. Each subscriber has a bounded queue
+(EVENTS_QUEUE_SIZE); a slow client loses its oldest events instead of
+growing memory, and gets a `dropped` event with the count so it knows to
+refetch.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.pubsub import pubsub as default_pubsub
+from app.schemas.calculation import CalculationResponse
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "calc-events"
+
+
+def format_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+class Subscriber:
+    """One open stream: a bounded, drop-oldest queue of SSE frames."""
+
+    def __init__(self, user_id: str, loop: asyncio.AbstractEventLoop, size: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.frames: Deque[str] = deque(maxlen=size)
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def push(self, frame: str) -> None:
+        """Queue a frame; safe to call from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._append, frame)
+        except RuntimeError:
+            pass  # loop closed: the stream is gone
+
+    def _append(self, frame: str) -> None:
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped += 1
+        self.frames.append(frame)
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Optional[str]:
+        """Next frame to send, or None after `timeout` idle seconds."""
+        if not self.frames:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.dropped:
+            count, self.dropped = self.dropped, 0
+            return format_event("dropped", json.dumps({"count": count}))
+        return self.frames.popleft()
+
+
+class EventBroadcaster:
+    def __init__(self, pubsub=None, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.published = 0
+        self.delivered = 0
+        self._subscribers: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+        self.pubsub = pubsub or default_pubsub
+        self.pubsub.subscribe(CHANNEL, self._deliver)
+
+    # ---------------- Streams ----------------
+
+    def subscribe(self, user_id) -> Subscriber:
+        """Open a stream for `user_id` (call from the event loop)."""
+        subscriber = Subscriber(str(user_id), asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers[subscriber.user_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            streams = self._subscribers.get(subscriber.user_id)
+            if streams is not None:
+                streams.discard(subscriber)
+                if not streams:
+                    del self._subscribers[subscriber.user_id]
+
+    def _deliver(self, message: str) -> None:
+        user_id, event, data = message.split(" ", 2)
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        if not subscribers:
+            return
+        frame = format_event(event, data)
+        for subscriber in subscribers:
+            subscriber.push(frame)
+        self.delivered += len(subscribers)
+
+    # ---------------- Publishing ----------------
+
+    def publish(self, user_id, event: str, data: str) -> None:
+        self.published += 1
+        try:
+            self.pubsub.publish(CHANNEL, f"{user_id} {event} {data}")
+        except Exception:
+            # The write already committed; a lost event must not fail it
+            logger.exception("Failed to publish %s event", event)
+
+    def calculation_changed(self, event: str, calc) -> None:
+        """`created` / `updated` with the calculation as data."""
+        try:
+            data = CalculationResponse.model_validate(calc).model_dump_json()
+        except Exception:
+            # Same as a failed publish: the write stands, the event is lost
+            logger.exception("Failed to serialize %s event for %s", event, getattr(calc, "id", None))
+            return
+        self.publish(calc.user_id, event, data)
+
+    def calculation_deleted(self, user_id, calc_id) -> None:
+        self.publish(user_id, "deleted", json.dumps({"id": str(calc_id)}))
+
+    def metrics(self):
+        with self._lock:
+            streams = sum(len(s) for s in self._subscribers.values())
+        return {"streams": streams, "published": self.published, "delivered": self.delivered}
+
+
+event_broadcaster = EventBroadcaster(queue_size=settings.EVENTS_QUEUE_SIZE)
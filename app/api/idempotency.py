@@ -0,0 +1,281 @@
+# app/api/idempotency.py
+
+"""
+Idempotency-Key support for retried POSTs.
+
+A POST to one of IDEMPOTENT_PATHS carrying an `Idempotency-Key` header is
+run once; its response (status, headers, body) is stored for
+IDEMPOTENCY_TTL_SECONDS and replayed, with `Idempotent-Replayed: true`,
+to any retry with the same key. Nothing is recomputed or written again.
+
+- keys are scoped by method, path and principal (the access token's
+  `sub`, or "anonymous" without one), so two users can't collide on the
+  same key and a retry sent after a token refresh still replays
+- a retry that differs from the original gets 422: the fingerprint
+  covers the body, the query string and the headers that change what
+  the body means (FINGERPRINT_HEADERS, e.g. the octet-stream codec's
+  X-Calculation-Type)
+- a duplicate that arrives while the original is still running waits
+  for it (in-flight lock) and then replays; after
+  IDEMPOTENCY_WAIT_SECONDS it gets 409 with Retry-After
+- 5xx and 401 responses are not stored, so the client can retry them
+  (401: nothing ran, e.g. a revoked token that will be refreshed)
+
+Stores: in-process LRU with TTL (default) or Redis
+(IDEMPOTENCY_BACKEND=redis, uses REDIS_URL; needs the `redis` package).
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from jose import JWTError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import decode_token
+
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+IDEMPOTENT_PATHS = ("/calculations", "/auth/register")
+FINGERPRINT_HEADERS = ("content-type", "prefer", "x-calculation-type", "x-calculation-expression")
+
+
+# ------------------------------------------------------------------------------
+# Stores
+# ------------------------------------------------------------------------------
+class MemoryIdempotencyStore:
+    """Per-process LRU of stored responses plus in-flight locks."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Event] = {}
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, record = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return record
+
+    async def set(self, key: str, record: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, record)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def acquire(self, key: str) -> bool:
+        if key in self._inflight:
+            return False
+        self._inflight[key] = asyncio.Event()
+        return True
+
+    async def release(self, key: str) -> None:
+        event = self._inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    async def wait(self, key: str, timeout: float) -> Optional[Dict[str, Any]]:
+        event = self._inflight.get(key)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return await self.get(key)
+
+
+class RedisIdempotencyStore:
+    """Shared store for several workers/instances."""
+
+    def __init__(self, url: str, ttl: float = 86400, lock_ttl: float = 60):
+        import redis.asyncio as redis  # optional dependency
+
+        self.redis = redis.from_url(url)
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(f"idem:{key}")
+        if raw is None:
+            return None
+        record = json.loads(raw)
+        record["body"] = base64.b64decode(record["body"])
+        return record
+
+    async def set(self, key: str, record: Dict[str, Any]) -> None:
+        payload = {**record, "body": base64.b64encode(record["body"]).decode()}
+        await self.redis.set(f"idem:{key}", json.dumps(payload), ex=int(self.ttl))
+
+    async def acquire(self, key: str) -> bool:
+        # The lock expires on its own if this worker dies mid-request
+        return bool(await self.redis.set(f"idem-lock:{key}", 1, nx=True, px=int(self.lock_ttl * 1000)))
+
+    async def release(self, key: str) -> None:
+        await self.redis.delete(f"idem-lock:{key}")
+
+    async def wait(self, key: str, timeout: float) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            record = await self.get(key)
+            if record is not None or not await self.redis.exists(f"idem-lock:{key}"):
+                return record
+            await asyncio.sleep(0.05)
+        return None
+
+
+def get_idempotency_store():
+    if settings.IDEMPOTENCY_BACKEND == "redis":
+        return RedisIdempotencyStore(settings.REDIS_URL, ttl=settings.IDEMPOTENCY_TTL_SECONDS)
+    return MemoryIdempotencyStore(settings.IDEMPOTENCY_MAX_ENTRIES, settings.IDEMPOTENCY_TTL_SECONDS)
+
+
+# ------------------------------------------------------------------------------
+# Middleware
+# ------------------------------------------------------------------------------
+class IdempotencyMiddleware:
+    """ASGI middleware applying Idempotency-Key to POSTs on `paths`."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store=None,
+        paths=IDEMPOTENT_PATHS,
+        wait_seconds: Optional[float] = None,
+    ):
+        self.app = app
+        self.store = store or get_idempotency_store()
+        self.paths = set(paths)
+        self.wait_seconds = settings.IDEMPOTENCY_WAIT_SECONDS if wait_seconds is None else wait_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get(HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await JSONResponse({"detail": "Invalid Idempotency-Key"}, 400)(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        fingerprint = _fingerprint(scope, headers, body)
+        store_key = hashlib.sha256(
+            "\n".join([scope["method"], scope["path"], _principal(headers), key]).encode()
+        ).hexdigest()
+
+        record = await self.store.get(store_key)
+        if record is None and await self.store.acquire(store_key):
+            try:
+                # Re-check: the original may have finished just before acquire
+                record = await self.store.get(store_key)
+                if record is None:
+                    await self._run(scope, _replay_body(body, receive), send, store_key, fingerprint)
+                    return
+            finally:
+                await self.store.release(store_key)
+        elif record is None:
+            record = await self.store.wait(store_key, self.wait_seconds)
+            if record is None:
+                response = JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"},
+                    409,
+                    headers={"Retry-After": "1"},
+                )
+                await response(scope, receive, send)
+                return
+
+        if record["fingerprint"] != fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was already used with a different request"}, 422
+            )
+            await response(scope, receive, send)
+            return
+        await _send_record(record, send)
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send, store_key: str, fingerprint: str) -> None:
+        captured: Dict[str, Any] = {"body": b""}
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = [[k.decode("latin-1"), v.decode("latin-1")] for k, v in message["headers"]]
+            elif message["type"] == "http.response.body":
+                captured["body"] += message.get("body", b"")
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+        status = captured.get("status", 500)
+        if status < 500 and status != 401:
+            await self.store.set(store_key, {"fingerprint": fingerprint, **captured})
+
+
+def _principal(headers: Headers) -> str:
+    """Who sent the request: stable across token refreshes."""
+    authorization = headers.get("authorization", "")
+    if not authorization:
+        return "anonymous"
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer":
+        try:
+            sub = decode_token(token).get("sub")
+        except JWTError:
+            sub = None
+        if sub:
+            return f"user:{sub}"
+    # Unusable credentials: the request will get 401; keep it apart from valid ones
+    return f"authorization:{authorization}"
+
+
+def _fingerprint(scope: Scope, headers: Headers, body: bytes) -> str:
+    digest = hashlib.sha256(scope.get("query_string", b""))
+    for name in FINGERPRINT_HEADERS:
+        digest.update(b"\n" + headers.get(name, "").encode("latin-1"))
+    digest.update(b"\n" + body)
+    return digest.hexdigest()
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+async def _send_record(record: Dict[str, Any], send: Send) -> None:
+    headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in record["headers"]]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": record["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": record["body"]})
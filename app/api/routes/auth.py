@@ -1,9 +1,14 @@
 # app/routers/auth.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from jose import JWTError
 from sqlalchemy.orm import Session
+from uuid import UUID
 
 from app.database import get_db
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
 from app.schemas.user import (
     UserCreate,
@@ -12,7 +17,11 @@ from app.schemas.user import (
     TokenResponse,
     TokenResponseWithMessage
 )
-from app.core.security import create_access_token
+from app.schemas.token import LogoutRequest, RefreshRequest
+from app.api.dependencies.auth import oauth2_scheme
+from app.core.revocation import revocation_list
+from app.core.security import create_access_token, decode_refresh_token, decode_token
+from app.core.throttle import login_throttle
 
 router = APIRouter()
 
@@ -55,13 +64,24 @@ def register_user(
 @router.post("/login", response_model=TokenResponseWithMessage)
 def login_user(
     login_data: UserLogin,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Login using username OR email.
     Returns token + success message (Module 13).
+    Throttled per identifier and per IP before any DB or bcrypt work.
     """
     identifier = login_data.get_identifier()
+    client_ip = request.client.host if request.client else "unknown"
+
+    retry_after = login_throttle.retry_after(identifier, client_ip)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts. Try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
 
     auth = User.authenticate(
         db,
@@ -70,18 +90,91 @@ def login_user(
 )
 
     if not auth:
+        login_throttle.failure(identifier, client_ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
         )
 
+    login_throttle.success(identifier)
+
     user = auth["user"]
     token = auth["access_token"]
+    refresh_token = RefreshToken.issue(db, user.id)
 
     db.commit()
 
     return TokenResponseWithMessage(
         message="Login successful!",
         access_token=token,
-        token_type="bearer"
+        token_type="bearer",
+        refresh_token=refresh_token,
     )
+
+
+# -------------------------------------------------------
+# REFRESH
+# -------------------------------------------------------
+@router.post("/refresh", response_model=TokenResponseWithMessage)
+def refresh_access_token(
+    data: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Exchange a refresh token for a new access token + refresh token.
+    No password check: signature + revocation only. Reusing an
+    already-rotated refresh token revokes its whole family.
+    """
+    rotated = RefreshToken.rotate(db, data.refresh_token)
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    db.commit()
+
+    return TokenResponseWithMessage(
+        message="Token refreshed",
+        access_token=create_access_token({"sub": str(rotated["user_id"])}),
+        token_type="bearer",
+        refresh_token=rotated["refresh_token"],
+    )
+
+
+# -------------------------------------------------------
+# LOGOUT
+# -------------------------------------------------------
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout_user(
+    data: LogoutRequest | None = None,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """
+    Revoke the presented access token and, if given, the refresh
+    token's whole family.
+    """
+    try:
+        payload = decode_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if payload.get("jti"):
+        revocation_list.revoke_token(db, payload)
+
+    if data and data.refresh_token:
+        try:
+            refresh = decode_refresh_token(data.refresh_token)
+            if refresh["sub"] == payload.get("sub"):
+                RefreshToken.revoke_family(db, UUID(refresh["fam"]))
+        except (JWTError, ValueError):
+            pass
+
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,16 +1,33 @@
 # app/routers/calculations.py
 
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import and_, delete, func, inspect, or_, select
 from sqlalchemy.orm import Session
 
+from app.api import codecs
+from app.api.cache import calculation_cache
+from app.api.events import event_broadcaster
 from app.api.dependencies.auth import get_current_active_user
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app import derived, importer
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.ingest import IngestQueue, get_ingest_queue
 from app.models.calculation import Calculation
 from app.schemas.calculation import (
     CalculationBase,
+    CalculationDeleteResponse,
+    CalculationIds,
+    CalculationLookupResponse,
     CalculationResponse,
-    CalculationUpdate
+    CalculationType,
+    CalculationUpdate,
+    min_inputs as required_inputs,
 )
 
 router = APIRouter()
@@ -18,60 +35,282 @@ router = APIRouter()
 
 
 # --------- CREATE ---------
-@router.post("", response_model=CalculationResponse, status_code=201)
+@router.post(
+    "",
+    response_model=CalculationResponse,
+    status_code=201,
+    openapi_extra=codecs.request_body_openapi(CalculationBase),
+)
 def create_calculation(
-    data: CalculationBase,
+    request: Request,
+    data: CalculationBase = Depends(codecs.calculation_body),
     user=Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    prefer: Optional[str] = Header(default=None),
+    queue: Optional[IngestQueue] = Depends(get_ingest_queue),
 ):
     try:
+        inputs, refs = derived.resolve_inputs(db, user.id, data.inputs)
         calc = Calculation.create(
             calculation_type=data.type,
             user_id=user.id,
-            inputs=data.inputs
+            inputs=inputs,
+            expression=data.expression,
         )
         calc.result = calc.get_result()
-
-        db.add(calc)
-        db.commit()
-        db.refresh(calc)
-        return calc
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    # Write-behind: queue the row and answer before it is committed
+    # (derived calculations need their edges written with the row)
+    if queue is not None and not refs and prefer and "respond-async" in prefer.lower():
+        calc_id = uuid7()
+        queue.put({
+            "id": str(calc_id),
+            "user_id": str(user.id),
+            "type": calc.type,
+            "inputs": calc.inputs,
+            "expression": calc.expression,
+            "result": calc.result,
+            "created_at": datetime.utcnow().isoformat(),
+        })
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"id": str(calc_id), "status": "queued"},
+            headers={"Location": f"/calculations/{calc_id}"},
+        )
+
+    if refs:
+        derived.set_dependencies(db, calc, refs)
+    db.add(calc)
+    db.commit()
+    db.refresh(calc)
+    event_broadcaster.calculation_changed("created", calc)
+    return codecs.render(request, calc, status.HTTP_201_CREATED)
+
+
+# --------- BULK IMPORT ---------
+@router.post("/import", status_code=202)
+async def import_calculations(
+    request: Request,
+    user=Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Stream a CSV / NDJSON upload into calculations; poll the job for progress."""
+    fmt = importer.format_for(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(415, "Use text/csv or application/x-ndjson")
+
+    # Same engine the session would write calculations to (shard-aware)
+    job = importer.start_job(user.id, fmt, db.get_bind(mapper=inspect(Calculation)))
+
+    batch = []
+    try:
+        async for line_no, text in importer.iter_lines(request.stream()):
+            if fmt == importer.CSV and line_no == 1 and isinstance(text, str) and text.lower().startswith("type"):
+                continue  # header
+            batch.append((line_no, text))
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await run_in_threadpool(job.submit, batch)
+                batch = []
+        if batch:
+            await run_in_threadpool(job.submit, batch)
+    except RuntimeError:
+        pass  # job failed; details are in the job report
+    finally:
+        await run_in_threadpool(job.finish_upload)
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=job.to_dict(),
+        headers={"Location": f"/calculations/import/{job.id}"},
+    )
+
+
+@router.get("/import/{job_id}")
+def get_import_job(
+    job_id: UUID,
+    user=Depends(get_current_active_user)
+):
+    job = importer.get_job(job_id)
+    if job is None or job.user_id != user.id:
+        raise HTTPException(404, "Import job not found")
+    return job.to_dict()
+
 
 # --------- BROWSE ---------
 @router.get("", response_model=list[CalculationResponse])
 def list_calculations(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    type: Optional[CalculationType] = None,
+    min_result: Optional[float] = None,
+    max_result: Optional[float] = None,
+    min_inputs: Optional[int] = Query(default=None, ge=0),
+    max_inputs: Optional[int] = Query(default=None, ge=0),
+    user=Depends(get_current_active_user),
+    db: Session = Depends(get_read_db)
+):
+    query = db.query(Calculation).filter(Calculation.user_id == user.id)
+    # Bounds on created_at let partitioned tables skip whole months
+    if since is not None:
+        query = query.filter(Calculation.created_at >= since)
+    if until is not None:
+        query = query.filter(Calculation.created_at < until)
+    if type is not None:
+        query = query.filter(Calculation.type == type.value)
+    # Inclusive ranges, served by the (user_id, result) / (user_id, input_count) indexes
+    if min_result is not None:
+        query = query.filter(Calculation.result >= min_result)
+    if max_result is not None:
+        query = query.filter(Calculation.result <= max_result)
+    if min_inputs is not None:
+        query = query.filter(_input_count_matches(lambda count: count >= min_inputs))
+    if max_inputs is not None:
+        query = query.filter(_input_count_matches(lambda count: count <= max_inputs))
+    return query.all()
+
+
+def _input_count_matches(condition):
+    """`condition` on input_count, falling back to the JSON length for rows
+    written before the column existed (NULL until `python -m app.recompute`
+    backfills them); only those NULL rows pay for the JSON length."""
+    return or_(
+        condition(Calculation.input_count),
+        and_(Calculation.input_count.is_(None), condition(func.json_array_length(Calculation.inputs))),
+    )
+
+
+# --------- BATCH ---------
+@router.post("/lookup", response_model=CalculationLookupResponse)
+def lookup_calculations(
+    data: CalculationIds,
+    user=Depends(get_current_active_user),
+    db: Session = Depends(get_read_db)
+):
+    """Fetch many calculations with one IN query; status per requested id."""
+    ids = list(dict.fromkeys(data.ids))
+    found = {
+        calc.id: calc
+        for calc in db.query(Calculation).filter(
+            Calculation.user_id == user.id,
+            Calculation.id.in_(ids)
+        )
+    }
+    return {
+        "results": [
+            {"id": calc_id, "status": "found", "calculation": found[calc_id]}
+            if calc_id in found
+            else {"id": calc_id, "status": "not_found"}
+            for calc_id in ids
+        ]
+    }
+
+
+@router.post("/delete", response_model=CalculationDeleteResponse)
+def delete_calculations(
+    data: CalculationIds,
+    user=Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Delete many calculations with one DELETE; status per requested id."""
+    ids = list(dict.fromkeys(data.ids))
+    where = (Calculation.user_id == user.id) & Calculation.id.in_(ids)
+    stmt = delete(Calculation).where(where).execution_options(synchronize_session=False)
+
+    if db.get_bind(mapper=inspect(Calculation)).dialect.delete_returning:
+        deleted = set(db.execute(stmt.returning(Calculation.id)).scalars())
+    else:
+        deleted = set(db.execute(select(Calculation.id).where(where)).scalars())
+        db.execute(stmt)
+
+    if deleted:
+        derived.remove_dependencies(db, user.id, deleted)
+    db.commit()
+    for calc_id in deleted:
+        calculation_cache.invalidate(user.id, calc_id)
+        event_broadcaster.calculation_deleted(user.id, calc_id)
+
+    return {
+        "results": [
+            {"id": calc_id, "status": "deleted" if calc_id in deleted else "not_found"}
+            for calc_id in ids
+        ]
+    }
+
+
+# --------- CHANGE FEED ---------
+@router.get("/events", response_class=StreamingResponse)
+async def calculation_events(
     user=Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    return db.query(Calculation).filter(Calculation.user_id == user.id).all()
+    """Server-Sent Events: `created`, `updated` and `deleted` for this user."""
+    subscriber = event_broadcaster.subscribe(user.id)
+    # Don't hold a pooled connection for the life of the stream
+    db.close()
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                frame = await subscriber.next(settings.EVENTS_HEARTBEAT_SECONDS)
+                yield frame if frame is not None else ": keepalive\n\n"
+        finally:
+            event_broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # --------- READ ---------
 @router.get("/{calc_id}", response_model=CalculationResponse)
 def get_calculation(
+    request: Request,
     calc_id: UUID,
     user=Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    calc = db.query(Calculation).filter(
-        Calculation.id == calc_id,
-        Calculation.user_id == user.id
-    ).first()
+    use_cache = settings.calc_cache_enabled
+    cached = calculation_cache.get(user.id, calc_id) if use_cache else None
 
-    if not calc:
-        raise HTTPException(404, "Calculation not found")
+    if cached is None:
+        query = db.query(Calculation).filter(
+            Calculation.id == calc_id,
+            Calculation.user_id == user.id
+        )
+        if use_cache:
+            # Fills come from the primary (a replica may lag behind an update),
+            # versioned so an update committing meanwhile wins
+            version = calculation_cache.version(user.id, calc_id)
+            query = query.execution_options(use_replica=False)
+        calc = query.first()
+
+        if not calc:
+            raise HTTPException(404, "Calculation not found")
+
+        cached = CalculationResponse.model_validate(calc).model_dump_json().encode()
+        if use_cache:
+            calculation_cache.set(user.id, calc_id, cached, version)
 
-    return calc
+    if codecs.negotiate(request) == codecs.JSON:
+        return Response(cached, media_type=codecs.JSON)
+    return codecs.render(request, CalculationResponse.model_validate_json(cached))
 
 
 # --------- UPDATE ---------
-@router.put("/{calc_id}", response_model=CalculationResponse)
+@router.put(
+    "/{calc_id}",
+    response_model=CalculationResponse,
+    openapi_extra=codecs.request_body_openapi(CalculationUpdate),
+)
 def update_calculation(
+    request: Request,
     calc_id: UUID,
-    data: CalculationUpdate,
+    data: CalculationUpdate = Depends(codecs.calculation_update_body),
     user=Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -83,13 +322,36 @@ def update_calculation(
     if not calc:
         raise HTTPException(404, "Calculation not found")
 
-    if data.inputs is not None:
-        calc.inputs = data.inputs
-        calc.result = calc.get_result()
+    if data.expression is not None and calc.type != "expression":
+        raise HTTPException(400, "Only expression calculations have an expression")
+    if data.inputs is not None and len(data.inputs) < required_inputs(calc.type):
+        raise HTTPException(422, f"'{calc.type}' requires at least {required_inputs(calc.type)} inputs")
+
+    downstream = []
+    if data.inputs is not None or data.expression is not None:
+        try:
+            if data.inputs is not None:
+                inputs, refs = derived.resolve_inputs(db, user.id, data.inputs)
+                derived.check_acyclic(db, calc, refs)
+                derived.set_dependencies(db, calc, refs)
+                calc.inputs = inputs
+            if data.expression is not None:
+                calc.expression = data.expression
+            calc.result = calc.get_result()
+            downstream = derived.recompute_downstream(db, calc)
+        except ValueError as e:
+            db.rollback()
+            raise HTTPException(400, str(e))
 
     db.commit()
+    calculation_cache.invalidate(user.id, calc_id)
+    for row in downstream:
+        calculation_cache.invalidate(user.id, row.id)
     db.refresh(calc)
-    return calc
+    event_broadcaster.calculation_changed("updated", calc)
+    for row in downstream:
+        event_broadcaster.calculation_changed("updated", row)
+    return codecs.render(request, calc)
 
 
 # --------- DELETE ---------
@@ -107,6 +369,10 @@ def delete_calculation(
     if not calc:
         raise HTTPException(404, "Calculation not found")
 
+    # Calculations derived from this one keep their last values
+    derived.remove_dependencies(db, user.id, [calc_id])
     db.delete(calc)
     db.commit()
+    calculation_cache.invalidate(user.id, calc_id)
+    event_broadcaster.calculation_deleted(user.id, calc_id)
     return None
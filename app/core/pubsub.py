@@ -0,0 +1,106 @@
+# app/core/pubsub.py
+
+"""
+Minimal pluggable publish/subscribe.
+
+- MemoryPubSub: in-process; fine for a single worker and for tests
+- RedisPubSub : Redis channels, so every worker/instance sees every
+                message (PUBSUB_BACKEND=redis, uses REDIS_URL; needs the
+                `redis` package)
+
+Messages are strings. Callbacks run synchronously in the publisher's
+thread (memory) or in the Redis listener thread, so they must be quick
+and must not block.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[str], None]
+
+
+class MemoryPubSub:
+    def __init__(self):
+        self._callbacks: Dict[str, List[Callback]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel: str, callback: Callback) -> Callable[[], None]:
+        """Register `callback`; returns a function that unsubscribes it."""
+        with self._lock:
+            self._callbacks[channel].append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._callbacks.get(channel, []):
+                    self._callbacks[channel].remove(callback)
+
+        return unsubscribe
+
+    def _dispatch(self, channel: str, message: str) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception:
+                logger.exception("pubsub callback failed on %s", channel)
+
+    def publish(self, channel: str, message: str) -> None:
+        self._dispatch(channel, message)
+
+    def close(self) -> None:
+        with self._lock:
+            self._callbacks.clear()
+
+
+class RedisPubSub(MemoryPubSub):
+    """Publishes through Redis; one listener thread dispatches locally."""
+
+    def __init__(self, url: str):
+        super().__init__()
+        import redis  # optional dependency
+
+        self.redis = redis.Redis.from_url(url)
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._thread = None
+
+    def _on_message(self, message) -> None:
+        channel = message["channel"].decode()
+        data = message["data"]
+        self._dispatch(channel, data.decode() if isinstance(data, bytes) else data)
+
+    def subscribe(self, channel: str, callback: Callback) -> Callable[[], None]:
+        with self._lock:
+            first = not self._callbacks.get(channel)
+        unsubscribe = super().subscribe(channel, callback)
+        if first:
+            self._pubsub.subscribe(**{channel: self._on_message})
+            if self._thread is None:
+                self._thread = self._pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+        return unsubscribe
+
+    def publish(self, channel: str, message: str) -> None:
+        # Local subscribers get it back through the listener like everyone else
+        self.redis.publish(channel, message)
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        self._pubsub.close()
+        super().close()
+
+
+def get_pubsub():
+    if settings.PUBSUB_BACKEND == "redis":
+        return RedisPubSub(settings.REDIS_URL)
+    return MemoryPubSub()
+
+
+pubsub = get_pubsub()
@@ -0,0 +1,195 @@
+# app/core/revocation.py
+
+"""
+Access-token revocation with a Bloom-filter front.
+
+Every access token carries a `jti`. Revoking one (logout) or all of a
+user's tokens (`user:<id>`) writes a `revoked_tokens` row and adds the
+key to this worker's Bloom filter. `is_revoked` only goes to the
+database when the filter reports a possible hit, so valid tokens -
+nearly all requests - never pay for a revocation lookup.
+
+Each worker keeps its own filter and syncs it from the table: an
+incremental `revoked_at >= watermark` query every
+REVOCATION_SYNC_SECONDS (run by whichever request notices it is due),
+and a full rebuild, dropping expired rows, once the filter fills up.
+The lookback re-reads recent rows on every sync; re-adding a key already
+in the filter doesn't count towards its capacity.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+from app.models.revoked_token import RevokedToken
+
+# Rows committed slightly out of revoked_at order are still picked up
+SYNC_LOOKBACK = timedelta(seconds=60)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def user_key(user_id) -> str:
+    return f"user:{user_id}"
+
+
+# ------------------------------------------------------------------------------
+# Bloom filter
+# ------------------------------------------------------------------------------
+class BloomFilter:
+    """Fixed-size Bloom filter (double hashing over one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        """Set the key's bits; `count` only grows for keys not already in."""
+        added = False
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+# ------------------------------------------------------------------------------
+# Revocation list
+# ------------------------------------------------------------------------------
+class RevocationList:
+    def __init__(
+        self,
+        capacity: int = 100_000,
+        error_rate: float = 0.001,
+        sync_interval: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.watermark: Optional[datetime] = None
+        self.last_sync = float("-inf")
+        self.db_checks = 0
+        self._lock = threading.Lock()
+
+    # ---------------- Sync ----------------
+
+    def sync(self, db: Session) -> int:
+        """Add rows revoked since the last sync. Returns rows read."""
+        query = select(RevokedToken.key, RevokedToken.revoked_at).execution_options(use_replica=False)
+        if self.watermark is not None:
+            query = query.where(RevokedToken.revoked_at >= self.watermark - SYNC_LOOKBACK)
+        else:
+            query = query.where(RevokedToken.expires_at > datetime.now(timezone.utc))
+        rows = db.execute(query).all()
+
+        for key, revoked_at in rows:
+            self.bloom.add(key)
+            revoked_at = _as_utc(revoked_at)
+            if self.watermark is None or revoked_at > self.watermark:
+                self.watermark = revoked_at
+        if self.watermark is None:
+            self.watermark = datetime.now(timezone.utc)
+        self.last_sync = self.clock()
+
+        if self.bloom.count > self.capacity:
+            self.rebuild(db)
+        return len(rows)
+
+    def rebuild(self, db: Session) -> None:
+        """Start a fresh filter from the unexpired rows."""
+        live = db.execute(
+            select(RevokedToken.key)
+            .where(RevokedToken.expires_at > datetime.now(timezone.utc))
+            .execution_options(use_replica=False)
+        ).scalars().all()
+        capacity = max(self.capacity, len(live) * 2)
+        bloom = BloomFilter(capacity, self.error_rate)
+        for key in live:
+            bloom.add(key)
+        self.capacity, self.bloom = capacity, bloom
+
+    def maybe_sync(self, db: Session) -> None:
+        if self.clock() - self.last_sync < self.sync_interval:
+            return
+        # One request syncs; the others keep using the current filter
+        if self._lock.acquire(blocking=False):
+            try:
+                self.sync(db)
+            finally:
+                self._lock.release()
+
+    # ---------------- Check ----------------
+
+    def is_revoked(self, db: Session, payload: Dict[str, Any]) -> bool:
+        """True if the decoded access token has been revoked."""
+        self.maybe_sync(db)
+
+        keys = [key for key in (payload.get("jti"), user_key(payload.get("sub"))) if key and key in self.bloom]
+        if not keys:
+            return False
+
+        self.db_checks += 1
+        rows = db.execute(
+            select(RevokedToken.key, RevokedToken.revoked_at)
+            .where(RevokedToken.key.in_(keys))
+            .execution_options(use_replica=False)
+        ).all()
+        issued_at = datetime.fromtimestamp(payload.get("iat", 0), timezone.utc)
+        for key, revoked_at in rows:
+            if not key.startswith("user:") or issued_at <= _as_utc(revoked_at):
+                return True
+        return False
+
+    # ---------------- Revoke ----------------
+
+    def revoke(self, db: Session, key: str, expires_at: datetime) -> None:
+        """Record a revocation (does NOT commit)."""
+        db.merge(RevokedToken(key=key, revoked_at=datetime.now(timezone.utc), expires_at=expires_at))
+        self.bloom.add(key)
+
+    def revoke_token(self, db: Session, payload: Dict[str, Any]) -> None:
+        self.revoke(db, payload["jti"], datetime.fromtimestamp(payload["exp"], timezone.utc))
+
+    def revoke_user(self, db: Session, user_id) -> None:
+        """Revoke every token issued to the user so far (access + refresh)."""
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        self.revoke(db, user_key(user_id), expires_at)
+        db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
+
+
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    sync_interval=settings.REVOCATION_SYNC_SECONDS,
+)
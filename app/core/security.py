@@ -7,6 +7,7 @@ from jose import jwt, JWTError
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.ids import uuid7
 
 # Password hashing configuration
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -30,10 +31,13 @@ def create_access_token(data: Dict[str, Any], expires_minutes: int = 30) -> str:
     """
     Create a JWT access token.
     - data should contain {"sub": user_id}
+    - jti/iat let the token be revoked (see app.core.revocation)
     """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
-    to_encode.update({"exp": expire})
+    now = datetime.now(timezone.utc)
+    to_encode.setdefault("jti", str(uuid7()))
+    # Sub-second iat so a revocation never catches tokens issued right after it
+    to_encode.update({"iat": now.timestamp(), "exp": now + timedelta(minutes=expires_minutes)})
 
     encoded_jwt = jwt.encode(
         to_encode,
@@ -43,6 +47,22 @@ def create_access_token(data: Dict[str, Any], expires_minutes: int = 30) -> str:
     return encoded_jwt
 
 
+def create_refresh_token(user_id: str, jti: str, family_id: str, expires_days: Optional[int] = None) -> str:
+    """
+    Create a JWT refresh token, signed with JWT_REFRESH_SECRET_KEY.
+    - jti identifies this token, fam the rotation chain it belongs to
+    """
+    days = settings.REFRESH_TOKEN_EXPIRE_DAYS if expires_days is None else expires_days
+    to_encode = {
+        "sub": str(user_id),
+        "jti": str(jti),
+        "fam": str(family_id),
+        "type": "refresh",
+        "exp": datetime.now(timezone.utc) + timedelta(days=days),
+    }
+    return jwt.encode(to_encode, settings.JWT_REFRESH_SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
 # ---------------------- JWT DECODING ----------------------
 
 def decode_token(token: str) -> Dict[str, Any]:
@@ -59,3 +79,18 @@ def decode_token(token: str) -> Dict[str, Any]:
         return payload
     except JWTError:
         raise
+
+
+def decode_refresh_token(token: str) -> Dict[str, Any]:
+    """
+    Decode a refresh token (signature + expiry only, no database).
+    Raises JWTError if token is invalid, expired or not a refresh token.
+    """
+    payload = jwt.decode(
+        token,
+        settings.JWT_REFRESH_SECRET_KEY,
+        algorithms=[settings.ALGORITHM],
+    )
+    if payload.get("type") != "refresh" or not payload.get("jti") or not payload.get("fam"):
+        raise JWTError("Not a refresh token")
+    return payload
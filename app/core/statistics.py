@@ -0,0 +1,127 @@
+# app/core/statistics.py
+
+"""
+Single-pass statistics for the statistical calculation types.
+
+Everything here makes one pass over the values and keeps O(1) state:
+- `welford`  : count, mean and sum of squared deviations (numerically
+               stable, no sum-of-squares cancellation)
+- `P2Quantile`: the P-square streaming quantile estimator (Jain &
+               Chlamtac, 1985): five markers, adjusted as values arrive.
+               Exact for up to five values, approximate afterwards.
+"""
+
+import math
+from typing import Iterable, List, Tuple
+
+
+def welford(values: Iterable[float]) -> Tuple[int, float, float]:
+    """Return (count, mean, M2) where M2 = sum((x - mean) ** 2)."""
+    count, mean, m2 = 0, 0.0, 0.0
+    for x in values:
+        count += 1
+        delta = x - mean
+        mean += delta / count
+        m2 += delta * (x - mean)
+    return count, mean, m2
+
+
+def mean(values: Iterable[float]) -> float:
+    count, avg, _ = welford(values)
+    if count == 0:
+        raise ValueError("Mean requires at least one number.")
+    return avg
+
+
+def variance(values: Iterable[float]) -> float:
+    """Sample variance (n - 1 denominator)."""
+    count, _, m2 = welford(values)
+    if count < 2:
+        raise ValueError("Variance requires at least two numbers.")
+    return m2 / (count - 1)
+
+
+def stddev(values: Iterable[float]) -> float:
+    return math.sqrt(variance(values))
+
+
+def _exact_quantile(values: List[float], p: float) -> float:
+    """Linear interpolation between closest ranks (numpy's default)."""
+    ordered = sorted(values)
+    rank = p * (len(ordered) - 1)
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class P2Quantile:
+    """Streaming estimate of the p-quantile in O(1) memory."""
+
+    def __init__(self, p: float):
+        if not 0 < p < 1:
+            raise ValueError("Quantile must be between 0 and 1.")
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            q.append(x)
+            if self.count == 5:
+                q.sort()
+            return
+
+        n = self.positions
+        # Find the cell x falls in, stretching the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = candidate
+                n[i] += step
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def result(self) -> float:
+        if self.count == 0:
+            raise ValueError("Percentiles require at least one number.")
+        if self.count <= 5:
+            return _exact_quantile(self.heights, self.p)
+        return self.heights[2]
+
+
+def quantile(values: Iterable[float], p: float) -> float:
+    estimator = P2Quantile(p)
+    for x in values:
+        estimator.add(x)
+    return estimator.result()
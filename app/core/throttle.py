@@ -0,0 +1,164 @@
+# app/core/throttle.py
+
+"""
+Brute-force throttling for /auth/login.
+
+Failed logins are counted in a sliding window (LOGIN_FAILURE_WINDOW_SECONDS)
+twice: per identifier (username/email, lower-cased) and per client IP.
+Once a key reaches its limit, each further failure doubles the wait:
+
+    wait = min(LOGIN_BACKOFF_MAX_SECONDS,
+               LOGIN_BACKOFF_BASE_SECONDS * 2 ** (failures - limit))
+
+counted from the latest failure. `retry_after` is checked before the
+user lookup and bcrypt, so a throttled attempt costs no database or
+password-hashing work; the route answers 429 with Retry-After.
+
+The client IP is `request.client.host`. Behind a load balancer or
+reverse proxy, run uvicorn with `--proxy-headers` and set
+FORWARDED_ALLOW_IPS to the proxy's IP(s), so uvicorn takes the client
+IP from X-Forwarded-For (only when the request comes from that proxy).
+Without that, every client shares the proxy's IP: set
+LOGIN_MAX_FAILURES_PER_IP=0 to turn the per-IP limit off instead.
+
+Stores: in-process (timestamps per key, LRU-bounded) or Redis
+(LOGIN_THROTTLE_BACKEND=redis, one sorted set per key, uses REDIS_URL).
+"""
+
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, List
+
+from app.core.config import settings
+
+
+class MemoryThrottleStore:
+    """Failure timestamps per key, kept as compact float arrays."""
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.time):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._failures: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, window: float) -> array:
+        stamps = self._failures.get(key)
+        if stamps is None:
+            return array("d")
+        cutoff = self.clock() - window
+        if stamps and stamps[0] <= cutoff:
+            stamps = array("d", (t for t in stamps if t > cutoff))
+            self._failures[key] = stamps
+        return stamps
+
+    def failures(self, key: str, window: float) -> List[float]:
+        with self._lock:
+            return list(self._live(key, window))
+
+    def add(self, key: str, window: float, keep: int) -> None:
+        with self._lock:
+            stamps = self._live(key, window)
+            stamps.append(self.clock())
+            # Only the count and the latest stamp matter past `keep`
+            self._failures[key] = stamps[-keep:]
+            self._failures.move_to_end(key)
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+class RedisThrottleStore:
+    """Shared across workers: one sorted set of failure stamps per key."""
+
+    def __init__(self, url: str, clock: Callable[[], float] = time.time):
+        import redis  # optional dependency
+
+        self.redis = redis.Redis.from_url(url)
+        self.clock = clock
+
+    def failures(self, key: str, window: float) -> List[float]:
+        now = self.clock()
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(f"login:{key}", 0, now - window)
+        pipe.zrange(f"login:{key}", 0, -1, withscores=True)
+        return [score for _, score in pipe.execute()[1]]
+
+    def add(self, key: str, window: float, keep: int) -> None:
+        now = self.clock()
+        pipe = self.redis.pipeline()
+        pipe.zadd(f"login:{key}", {repr(now): now})
+        pipe.zremrangebyrank(f"login:{key}", 0, -keep - 1)
+        pipe.expire(f"login:{key}", int(window) + 1)
+        pipe.execute()
+
+    def clear(self, key: str) -> None:
+        self.redis.delete(f"login:{key}")
+
+
+class LoginThrottle:
+    def __init__(
+        self,
+        store,
+        identifier_limit: int = 5,
+        ip_limit: int = 20,
+        window: float = 900,
+        backoff_base: float = 1,
+        backoff_max: float = 900,
+    ):
+        self.store = store
+        self.limits = {"id": identifier_limit, "ip": ip_limit}
+        self.window = window
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _keys(self, identifier: str, ip: str):
+        keys = [("id", f"id:{identifier.lower()}"), ("ip", f"ip:{ip}")]
+        return [(kind, key) for kind, key in keys if self.limits[kind] > 0]  # 0 = limit off
+
+    def _wait(self, stamps: List[float], limit: int) -> float:
+        if len(stamps) < limit:
+            return 0.0
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** (len(stamps) - limit))
+        return max(0.0, max(stamps) + backoff - self.store.clock())
+
+    def retry_after(self, identifier: str, ip: str) -> float:
+        """Seconds the caller must wait before trying again (0 = allowed)."""
+        return max(
+            (
+                self._wait(self.store.failures(key, self.window), self.limits[kind])
+                for kind, key in self._keys(identifier, ip)
+            ),
+            default=0.0,
+        )
+
+    def failure(self, identifier: str, ip: str) -> None:
+        # Enough stamps to reach the backoff cap; older ones add nothing
+        keep_extra = max(1, int(self.backoff_max / max(self.backoff_base, 1e-9)).bit_length())
+        for kind, key in self._keys(identifier, ip):
+            self.store.add(key, self.window, self.limits[kind] + keep_extra)
+
+    def success(self, identifier: str) -> None:
+        self.store.clear(f"id:{identifier.lower()}")
+
+
+def get_login_throttle() -> LoginThrottle:
+    if settings.LOGIN_THROTTLE_BACKEND == "redis":
+        store = RedisThrottleStore(settings.REDIS_URL)
+    else:
+        store = MemoryThrottleStore()
+    return LoginThrottle(
+        store,
+        identifier_limit=settings.LOGIN_MAX_FAILURES_PER_IDENTIFIER,
+        ip_limit=settings.LOGIN_MAX_FAILURES_PER_IP,
+        window=settings.LOGIN_FAILURE_WINDOW_SECONDS,
+        backoff_base=settings.LOGIN_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.LOGIN_BACKOFF_MAX_SECONDS,
+    )
+
+
+login_throttle = get_login_throttle()
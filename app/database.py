@@ -1,13 +1,300 @@
 # app/database.py
-from sqlalchemy import create_engine
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import CompoundSelect
 from app.core.config import settings
+from app.sharding import ShardMap, get_shard_map
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# ------------------------------------------------------------------------------
+# SQLite profile (picked automatically for sqlite:// URLs)
+#
+# - WAL journaling so readers never block behind the writer
+# - synchronous=NORMAL (durable at checkpoints, safe with WAL)
+# - mmap + larger page cache for read-heavy workloads
+# - busy_timeout so lock contention retries instead of failing
+# - ONE writer connection (writes queue in the pool, not on SQLite's lock)
+#   plus a pool of query_only reader connections
+# ------------------------------------------------------------------------------
+def is_sqlite(database_url: str) -> bool:
+    return database_url.startswith("sqlite")
+
+
+def _is_sqlite_memory(database_url: str) -> bool:
+    return database_url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in database_url
+
+
+def _apply_sqlite_pragmas(engine: Engine, read_only: bool = False) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+            cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+
+def _create_sqlite_engines(database_url: str) -> Tuple[Engine, Optional[Engine]]:
+    timeout_s = settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+    connect_args = {"check_same_thread": False, "timeout": timeout_s}
+
+    if _is_sqlite_memory(database_url):
+        # Every connection would get its own empty database: share one
+        write_engine = create_engine(
+            database_url, connect_args=connect_args, poolclass=StaticPool
+        )
+        return write_engine, None
+
+    write_engine = create_engine(
+        database_url,
+        connect_args=connect_args,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=timeout_s,
+    )
+    _apply_sqlite_pragmas(write_engine)
+
+    read_engine = create_engine(
+        database_url,
+        connect_args=connect_args,
+        pool_size=settings.SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=timeout_s,
+    )
+    _apply_sqlite_pragmas(read_engine, read_only=True)
+
+    return write_engine, read_engine
+
+
+def get_engines(database_url: str = SQLALCHEMY_DATABASE_URL) -> Tuple[Engine, Optional[Engine]]:
+    """Return (write engine, read engine or None) for a database URL."""
+    if is_sqlite(database_url):
+        return _create_sqlite_engines(database_url)
+    return create_engine(database_url), None
+
+
+# ------------------------------------------------------------------------------
+# Read replicas: round-robin over healthy engines, sticky after writes
+# ------------------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+
+
+class ReplicaPool:
+    """Round-robin set of replica engines with background health checks.
+
+    A replica is skipped while its last check failed or it lagged more
+    than `max_lag_seconds` behind the primary. Users who just wrote are
+    pinned to the primary for `sticky_seconds` (read-your-writes).
+    Stickiness is tracked per process.
+    """
+
+    def __init__(
+        self,
+        engines: List[Engine],
+        sticky_seconds: float = 5.0,
+        check_interval: float = 10.0,
+        max_lag_seconds: float = 30.0,
+    ):
+        self.engines = engines
+        self.sticky_seconds = sticky_seconds
+        self.check_interval = check_interval
+        self.max_lag_seconds = max_lag_seconds
+        self._healthy = [True] * len(engines)
+        self._next = 0
+        self._recent_writers: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- routing ----------
+    def choose(self) -> Optional[Engine]:
+        """Return the next healthy replica, or None to use the primary."""
+        with self._lock:
+            for _ in range(len(self.engines)):
+                index = self._next
+                self._next = (self._next + 1) % len(self.engines)
+                if self._healthy[index]:
+                    return self.engines[index]
+        return None
+
+    def mark_written(self, user_id) -> None:
+        with self._lock:
+            self._recent_writers[str(user_id)] = time.monotonic() + self.sticky_seconds
+
+    def is_sticky(self, user_id) -> bool:
+        if user_id is None:
+            return False
+        key = str(user_id)
+        with self._lock:
+            until = self._recent_writers.get(key)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._recent_writers[key]
+                return False
+            return True
+
+    # ---------- health ----------
+    def _check(self, replica: Engine) -> bool:
+        try:
+            with replica.connect() as conn:
+                if replica.dialect.name != "postgresql":
+                    conn.execute(text("SELECT 1"))
+                    return True
+                lag = conn.execute(
+                    text(
+                        "SELECT COALESCE(EXTRACT(EPOCH FROM "
+                        "now() - pg_last_xact_replay_timestamp()), 0)"
+                    )
+                ).scalar()
+                return float(lag or 0) <= self.max_lag_seconds
+        except Exception:
+            logger.warning("Replica %s failed health check", replica.url, exc_info=True)
+            return False
+
+    def check_health(self) -> None:
+        results = [self._check(replica) for replica in self.engines]
+        with self._lock:
+            self._healthy = results
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            self.check_health()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+
+def get_replica_pool(urls: List[str]) -> Optional[ReplicaPool]:
+    if not urls:
+        return None
+    return ReplicaPool(
+        [get_engines(url)[0] for url in urls],
+        sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+        check_interval=settings.REPLICA_HEALTH_CHECK_SECONDS,
+        max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    )
+
+
+# ------------------------------------------------------------------------------
+# Routing session: reads -> replica / read engine, writes -> write engine
+# ------------------------------------------------------------------------------
+class RoutingSession(Session):
+    """Session that sends plain SELECTs away from the primary writer.
+
+    - Replica-eligible reads go to `replicas`: every read of a session
+      with `info["read_only"]` set (see `get_read_db`), or a statement with
+      `execution_options(use_replica=True)`. `use_replica=False` forces
+      the primary. Users in their sticky window read from the primary.
+    - Other reads go to `read_engine` (SQLite reader pool) when present.
+    - Flushes, DML and raw SQL go to the session's bind (the writer). Once
+      a transaction has written, its later reads also use the writer so
+      they see their own uncommitted changes.
+
+    - Sharded tables (see app/sharding.py) always go to the user's shard.
+
+    `info["user_id"]` (set by the auth dependency) keys stickiness and
+    shard selection.
+    """
+
+    def __init__(
+        self,
+        *args,
+        read_engine: Optional[Engine] = None,
+        replicas: Optional[ReplicaPool] = None,
+        shards: Optional[ShardMap] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.read_engine = read_engine
+        self.replicas = replicas
+        self.shards = shards
+        self._wrote = False
+
+    def _replica_for(self, clause) -> Optional[Engine]:
+        if self.replicas is None:
+            return None
+        wanted = clause.get_execution_options().get(
+            "use_replica", self.info.get("read_only", False)
+        )
+        if not wanted or self.replicas.is_sticky(self.info.get("user_id")):
+            return None
+        return self.replicas.choose()
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.shards is not None and mapper is not None and self.shards.owns(mapper.local_table):
+            user_id = self.info.get("user_id")
+            if user_id is None:
+                raise RuntimeError("Sharded table accessed without session.info['user_id']")
+            return self.shards.engine_for(user_id)
+
+        is_read = isinstance(clause, (Select, CompoundSelect))
+
+        if is_read and not self._wrote and not self._flushing:
+            replica = self._replica_for(clause)
+            if replica is not None:
+                return replica
+            if self.read_engine is not None:
+                return self.read_engine
+
+        if not is_read and (clause is not None or self._flushing):
+            self._wrote = True
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_writer(session):
+    user_id = session.info.get("user_id")
+    if session._wrote and session.replicas is not None and user_id is not None:
+        session.replicas.mark_written(user_id)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session, transaction):
+    if transaction.parent is None:
+        session._wrote = False
+
+
+engine, read_engine = get_engines(SQLALCHEMY_DATABASE_URL)
+replica_pool = get_replica_pool(settings.replica_urls)
+shard_map = get_shard_map(settings.shard_urls, vnodes=settings.SHARD_VNODES)
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    read_engine=read_engine,
+    replicas=replica_pool,
+    shards=shard_map,
+)
 
 Base = declarative_base()
 
@@ -18,8 +305,26 @@ def get_db():   # pragma: no cover
     finally:
         db.close()
 
+def get_read_db(db: Session = Depends(get_db)):
+    """Same request session, but its reads may be served by a replica."""
+    db.info["read_only"] = True
+    return db
+
 def get_engine(database_url: str = SQLALCHEMY_DATABASE_URL):
-    return create_engine(database_url)
+    return get_engines(database_url)[0]
 
-def get_sessionmaker(engine):
-    return sessionmaker(autocommit=False, autoflush=False, bind=engine) # pragma: no cover
+def get_sessionmaker(
+    engine,
+    read_engine: Optional[Engine] = None,
+    replicas: Optional[ReplicaPool] = None,
+    shards: Optional[ShardMap] = None,
+):
+    return sessionmaker(    # pragma: no cover
+        class_=RoutingSession,
+        autocommit=False,
+        autoflush=False,
+        bind=engine,
+        read_engine=read_engine,
+        replicas=replicas,
+        shards=shards,
+    )
@@ -1,10 +1,19 @@
 # app/database_init.py
-from app.database import engine, Base
-from app.models import user, calculation  # noqa: F401 (imported for side-effects)
+from app.database import engine, Base, shard_map
+from app.models import user, calculation, refresh_token, revoked_token  # noqa: F401 (imported for side-effects)
+from app.sharding import create_shard_tables
+from app.partitions import create_partitioned_table, ensure_partitions
+from app.core.config import settings
 
 def init_db():
     """Create all tables."""
+    if settings.CALCULATION_PARTITIONING:
+        create_partitioned_table(engine)
     Base.metadata.create_all(bind=engine)
+    if settings.CALCULATION_PARTITIONING:
+        ensure_partitions(engine, settings.CALCULATION_PARTITION_PREMAKE_MONTHS)
+    if shard_map is not None:
+        create_shard_tables(shard_map)
 
 def drop_db():
     """Drop all tables."""
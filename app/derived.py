@@ -0,0 +1,183 @@
+# app/derived.py
+
+"""
+Derived calculations: inputs that reference another calculation's result.
+
+An input may be `{"ref": "<calculation id>"}` instead of a number. The
+referenced result is resolved when the calculation is written and stored
+in `inputs` like any other number, so reads, codecs and responses never
+see references. The link itself is kept as a `CalculationDependency`
+edge (`calculation_id`.inputs[position] <- `depends_on_id`).
+
+When a calculation changes, `recompute_downstream` walks the edges level
+by level (one query per level), loads every affected calculation in one
+query, orders them topologically (Kahn's algorithm, which also catches
+cycles) and recomputes each exactly once, taking upstream values from a
+memo of results computed in this pass.
+
+References are limited to the same user's calculations; writes that
+would close a cycle are rejected.
+"""
+
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.ids import uuid7
+from app.models.calculation import Calculation, CalculationDependency
+from app.schemas.calculation import InputRef
+
+
+def resolve_inputs(db: Session, user_id, inputs: Sequence[Any]) -> Tuple[List[float], Dict[int, UUID]]:
+    """Replace references by their results.
+
+    Returns (values, refs) where refs maps input position -> referenced id.
+    """
+    refs = {i: x.ref for i, x in enumerate(inputs) if isinstance(x, InputRef)}
+    if not refs:
+        return list(inputs), refs
+
+    ids = set(refs.values())
+    results = dict(
+        db.query(Calculation.id, Calculation.result)
+        .filter(Calculation.user_id == user_id, Calculation.id.in_(ids))
+        .all()
+    )
+    values = []
+    for i, x in enumerate(inputs):
+        if i not in refs:
+            values.append(x)
+            continue
+        result = results.get(refs[i])
+        if result is None:
+            raise ValueError(f"Referenced calculation {refs[i]} not found")
+        values.append(result)
+    return values, refs
+
+
+def _descendants(db: Session, user_id, calc_id) -> Set[UUID]:
+    seen: Set[UUID] = set()
+    frontier = {calc_id}
+    while frontier:
+        rows = (
+            db.query(CalculationDependency.calculation_id)
+            .filter(
+                CalculationDependency.user_id == user_id,
+                CalculationDependency.depends_on_id.in_(frontier),
+            )
+            .all()
+        )
+        frontier = {row[0] for row in rows} - seen - {calc_id}
+        seen |= frontier
+    return seen
+
+
+def check_acyclic(db: Session, calc: Calculation, refs: Dict[int, UUID]) -> None:
+    """Reject references to `calc` itself or to anything derived from it."""
+    if not refs:
+        return
+    targets = set(refs.values())
+    if calc.id in targets or targets & _descendants(db, calc.user_id, calc.id):
+        raise ValueError("Dependency cycle detected")
+
+
+def set_dependencies(db: Session, calc: Calculation, refs: Dict[int, UUID]) -> None:
+    """Replace the edges of `calc` with `refs` (assigns the id if needed)."""
+    if calc.id is None:
+        calc.id = uuid7()
+    else:
+        db.query(CalculationDependency).filter(
+            CalculationDependency.user_id == calc.user_id,
+            CalculationDependency.calculation_id == calc.id,
+        ).delete(synchronize_session=False)
+    db.add_all(
+        CalculationDependency(
+            user_id=calc.user_id,
+            calculation_id=calc.id,
+            depends_on_id=upstream,
+            position=position,
+        )
+        for position, upstream in refs.items()
+    )
+
+
+def remove_dependencies(db: Session, user_id, calc_ids: Sequence[UUID]) -> None:
+    """Drop every edge from or to the given calculations."""
+    ids = list(calc_ids)
+    db.query(CalculationDependency).filter(
+        CalculationDependency.user_id == user_id,
+        CalculationDependency.calculation_id.in_(ids) | CalculationDependency.depends_on_id.in_(ids),
+    ).delete(synchronize_session=False)
+
+
+def recompute_downstream(db: Session, calc: Calculation) -> List[Calculation]:
+    """Recompute everything derived from `calc`; returns the changed rows.
+
+    `calc.result` must already be up to date. Raises ValueError if a
+    downstream calculation can no longer be computed (e.g. it now divides
+    by zero) or the edges contain a cycle.
+    """
+    # Collect the affected subgraph breadth first, one query per level
+    edges: List[CalculationDependency] = []
+    seen: Set[UUID] = {calc.id}
+    frontier = {calc.id}
+    while frontier:
+        level = (
+            db.query(CalculationDependency)
+            .filter(
+                CalculationDependency.user_id == calc.user_id,
+                CalculationDependency.depends_on_id.in_(frontier),
+            )
+            .all()
+        )
+        edges.extend(level)
+        frontier = {edge.calculation_id for edge in level} - seen
+        seen |= frontier
+
+    affected = seen - {calc.id}
+    if not affected:
+        return []
+
+    nodes = {
+        row.id: row
+        for row in db.query(Calculation).filter(
+            Calculation.user_id == calc.user_id, Calculation.id.in_(affected)
+        )
+    }
+
+    # Kahn's algorithm over the affected nodes
+    incoming: Dict[UUID, List[CalculationDependency]] = defaultdict(list)
+    children: Dict[UUID, Set[UUID]] = defaultdict(set)
+    for edge in edges:
+        incoming[edge.calculation_id].append(edge)
+        children[edge.depends_on_id].add(edge.calculation_id)
+    pending = {
+        node_id: len({e.depends_on_id for e in incoming[node_id]} & nodes.keys())
+        for node_id in nodes
+    }
+    ready = deque(node_id for node_id, count in pending.items() if count == 0)
+
+    memo: Dict[UUID, float] = {calc.id: calc.result}
+    changed = []
+    while ready:
+        node = nodes[ready.popleft()]
+        inputs = list(node.inputs)
+        for edge in incoming[node.id]:
+            if edge.depends_on_id in memo:
+                inputs[edge.position] = memo[edge.depends_on_id]
+        node.inputs = inputs
+        node.result = node.get_result()
+        memo[node.id] = node.result
+        changed.append(node)
+
+        for child in children[node.id]:
+            if child in pending:
+                pending[child] -= 1
+                if pending[child] == 0:
+                    ready.append(child)
+
+    if len(changed) < len(nodes):
+        raise ValueError("Dependency cycle detected")
+    return changed
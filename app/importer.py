@@ -0,0 +1,356 @@
+# app/importer.py
+
+"""
+Streaming bulk import of calculations.
+
+`POST /calculations/import` reads the request body chunk by chunk, splits
+it into lines and hands batches of lines to an `ImportJob` thread through
+a small bounded queue (so a slow database pushes back on the upload
+instead of buffering it). Each batch is validated with the
+`CalculationBase` rules and computed - in a process pool once the upload
+is large - then written with COPY on PostgreSQL or `executemany`
+elsewhere. Progress and row-level errors are polled with
+`GET /calculations/import/{job_id}`.
+
+Formats (by Content-Type):
+- text/csv: `type,input1,input2,...` per line (`expression,<formula>,
+  input1,...` for expressions); an optional header line starting with
+  `type` is skipped
+- application/x-ndjson: one `{"type": ..., "inputs": [...]}` per line
+  (plus `"expression"` for expressions)
+
+Expression rows that share a formula are evaluated together with the
+compiled expression's `evaluate_many`.
+
+Jobs are tracked per process.
+"""
+
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.expressions import compile_expression
+from app.core.ids import uuid7
+from app.models import user  # noqa: F401 (worker processes need every mapper)
+from app.models.calculation import Calculation
+from app.schemas.calculation import CalculationBase, InputRef
+
+logger = logging.getLogger(__name__)
+
+CSV = "csv"
+NDJSON = "ndjson"
+MAX_REPORTED_ERRORS = 1000
+
+Line = Tuple[int, Union[str, ValueError]]  # unreadable lines carry their error
+
+
+def format_for(content_type: Optional[str]) -> Optional[str]:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return CSV
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return NDJSON
+    return None
+
+
+# ------------------------------------------------------------------------------
+# Parsing + validation (runs in worker processes for large imports)
+# ------------------------------------------------------------------------------
+def _parse_line(fmt: str, text: str) -> Dict[str, Any]:
+    if fmt == NDJSON:
+        return json.loads(text)
+    fields = next(csv.reader([text]))
+    calc_type = fields[0].strip()
+    if calc_type.lower() == "expression":
+        return {"type": calc_type, "expression": fields[1], "inputs": [float(v) for v in fields[2:] if v.strip()]}
+    return {"type": calc_type, "inputs": [float(v) for v in fields[1:] if v.strip()]}
+
+
+def _error(line_no: int, e: Exception) -> Dict[str, Any]:
+    if isinstance(e, ValidationError):
+        return {"line": line_no, "error": e.errors(include_url=False)[0]["msg"]}
+    return {"line": line_no, "error": str(e) or type(e).__name__}
+
+
+def prepare_batch(fmt: str, lines: List[Line]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Validate and compute a batch. Returns (rows, errors)."""
+    rows, errors = [], []
+    by_expression: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+    for line_no, text in lines:
+        if isinstance(text, ValueError):
+            errors.append(_error(line_no, text))
+            continue
+        try:
+            data = CalculationBase.model_validate(_parse_line(fmt, text))
+            if any(isinstance(x, InputRef) for x in data.inputs):
+                raise ValueError("References are not supported in bulk import")
+            row = {
+                "type": data.type.value,
+                "inputs": data.inputs,
+                "input_count": len(data.inputs),
+                "expression": data.expression,
+            }
+            if data.expression is not None:
+                by_expression.setdefault(data.expression, []).append((line_no, row))
+                continue
+            calc = Calculation.create(data.type.value, user_id=None, inputs=data.inputs)
+            row["result"] = calc.get_result()
+            rows.append(row)
+        except (ValidationError, ValueError, TypeError, IndexError, StopIteration) as e:
+            errors.append(_error(line_no, e))
+
+    for expression, group in by_expression.items():
+        compiled = compile_expression(expression)
+        try:
+            results = compiled.evaluate_many([row["inputs"] for _, row in group])
+        except ValueError:
+            # Some row can't be evaluated: fall back to row by row
+            results = []
+            for line_no, row in group:
+                try:
+                    results.append(compiled.evaluate(row["inputs"]))
+                except ValueError as e:
+                    errors.append(_error(line_no, e))
+                    results.append(None)
+        for (_, row), result in zip(group, results):
+            if result is not None:
+                row["result"] = result
+                rows.append(row)
+    return rows, errors
+
+
+def _decode(raw: bytearray, too_long: bool, max_bytes: int) -> Union[str, ValueError, None]:
+    if too_long:
+        return ValueError(f"Line is longer than {max_bytes} bytes")
+    try:
+        return raw.decode("utf-8").strip() or None
+    except UnicodeDecodeError:
+        return ValueError("Line is not valid UTF-8")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_bytes: Optional[int] = None) -> AsyncIterator[Line]:
+    """Yield (line_no, text) from a byte stream, skipping blank lines.
+
+    Only the new chunk is searched for newlines. Lines longer than
+    `max_bytes` (IMPORT_MAX_LINE_BYTES) are not buffered: they, and lines
+    that aren't UTF-8, are yielded as (line_no, ValueError) and reported
+    as row errors.
+    """
+    max_bytes = max_bytes or settings.IMPORT_MAX_LINE_BYTES
+    pending = bytearray()
+    too_long = False
+    line_no = 0
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if not too_long:
+                stop = len(chunk) if end == -1 else end
+                if len(pending) + stop - start > max_bytes:
+                    too_long = True
+                    pending.clear()
+                else:
+                    pending += chunk[start:stop]
+            if end == -1:
+                break
+            line_no += 1
+            text = _decode(pending, too_long, max_bytes)
+            if text is not None:
+                yield line_no, text
+            pending.clear()
+            too_long = False
+            start = end + 1
+    text = _decode(pending, too_long, max_bytes)
+    if text is not None:
+        yield line_no + 1, text
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMPORT_WORKERS or None,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+# ------------------------------------------------------------------------------
+# Writing
+# ------------------------------------------------------------------------------
+_COLUMNS = (
+    "id", "user_id", "type", "inputs", "input_count", "expression", "result", "created_at", "updated_at",
+)
+
+
+def write_rows(engine: Engine, rows: List[Dict[str, Any]]) -> None:
+    if engine.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                row["id"], row["user_id"], row["type"], json.dumps(row["inputs"]), row["input_count"],
+                row["expression"], row["result"], row["created_at"].isoformat(), row["updated_at"].isoformat(),
+            ])
+        buffer.seek(0)
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.copy_expert(
+                f"COPY calculations ({', '.join(_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.close()
+            raw.commit()
+        finally:
+            raw.close()
+        return
+
+    with engine.begin() as conn:
+        conn.execute(Calculation.__table__.insert(), rows)
+
+
+# ------------------------------------------------------------------------------
+# Jobs
+# ------------------------------------------------------------------------------
+class ImportJob:
+    """One import: receives line batches, validates, computes and writes."""
+
+    def __init__(self, user_id: UUID, fmt: str, engine: Engine):
+        self.id = uuid7()
+        self.user_id = user_id
+        self.format = fmt
+        self.engine = engine
+        self.status = "running"
+        self.rows_received = 0
+        self.rows_imported = 0
+        self.rows_failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.started_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self._batches: "queue.Queue[Optional[List[Line]]]" = queue.Queue(maxsize=4)
+        self._thread = threading.Thread(target=self._run, name=f"import-{self.id}", daemon=True)
+        self._thread.start()
+
+    # Called from the request handler (in a worker thread)
+    def submit(self, lines: List[Line]) -> None:
+        if self.status == "failed":
+            raise RuntimeError(self.error)
+        self.rows_received += len(lines)
+        self._batches.put(lines)
+
+    def finish_upload(self) -> None:
+        self._batches.put(None)
+
+    def _prepare(self, lines: List[Line]) -> Future:
+        if self.rows_received > settings.IMPORT_POOL_THRESHOLD:
+            return get_process_pool().submit(prepare_batch, self.format, lines)
+        done: Future = Future()
+        done.set_result(prepare_batch(self.format, lines))
+        return done
+
+    def _write(self, prepared: Future) -> None:
+        rows, errors = prepared.result()
+        now = datetime.utcnow()
+        for row in rows:
+            row.update(id=uuid7(), user_id=self.user_id, created_at=now, updated_at=now)
+        if rows:
+            write_rows(self.engine, rows)
+
+        self.rows_imported += len(rows)
+        self.rows_failed += len(errors)
+        room = MAX_REPORTED_ERRORS - len(self.errors)
+        self.errors.extend(errors[:room])
+
+    def _run(self) -> None:
+        # Several batches are validated in parallel; writes stay in order
+        window = settings.IMPORT_WORKERS or os.cpu_count() or 1
+        pending: Deque[Future] = deque()
+        try:
+            while True:
+                lines = self._batches.get()
+                if lines is None:
+                    break
+                pending.append(self._prepare(lines))
+                while pending and (len(pending) > window or pending[0].done()):
+                    self._write(pending.popleft())
+            while pending:
+                self._write(pending.popleft())
+        except Exception as e:
+            logger.exception("Import %s failed", self.id)
+            self.status = "failed"
+            self.error = str(e)
+            self.finished_at = datetime.utcnow()
+            # Keep consuming so a producer blocked on the full queue can finish
+            while self._batches.get() is not None:
+                pass
+            return
+        self.status = "completed"
+        self.finished_at = datetime.utcnow()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+        return {
+            "id": str(self.id),
+            "status": self.status,
+            "format": self.format,
+            "rows_received": self.rows_received,
+            "rows_imported": self.rows_imported,
+            "rows_failed": self.rows_failed,
+            "rows_per_second": round(self.rows_imported / elapsed, 1) if elapsed > 0 else None,
+            "errors": self.errors,
+            "error": self.error,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+_jobs: Dict[UUID, ImportJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def start_job(user_id: UUID, fmt: str, engine: Engine) -> ImportJob:
+    job = ImportJob(user_id, fmt, engine)
+    with _jobs_lock:
+        # Forget jobs that finished more than an hour ago
+        cutoff = datetime.utcnow() - timedelta(hours=1)
+        for job_id, old in list(_jobs.items()):
+            if old.finished_at and old.finished_at < cutoff:
+                del _jobs[job_id]
+        _jobs[job.id] = job
+    return job
+
+
+def get_job(job_id: UUID) -> Optional[ImportJob]:
+    return _jobs.get(job_id)
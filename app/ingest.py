@@ -0,0 +1,309 @@
+# app/ingest.py
+
+"""
+Write-behind ingest for calculation creation.
+
+`POST /calculations` with `Prefer: respond-async` (and INGEST_ENABLED)
+validates the request, computes the result, assigns the id, appends the
+row to a durable local queue and answers 202. `IngestFlusher` drains the
+queue in the background with one bulk INSERT per batch; the row is
+visible to `GET /calculations/{id}` once its batch has been flushed.
+
+The queue is a SQLite file (WAL, synchronous=FULL), so accepted items
+survive a crash. Items are only removed after their batch commits;
+a batch replayed after a crash skips ids that already made it in.
+Rows that still can't be inserted (e.g. their user was deleted in the
+meantime) are inserted one by one and the failing ones are moved to the
+`ingest_dead_letter` table of the same file, so one bad row can't block
+the queue.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.api.events import event_broadcaster
+from app.core.config import settings
+from app.models.calculation import Calculation
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------------------
+# Durable queue
+# ------------------------------------------------------------------------------
+class IngestQueue:
+    """Append-only, SQLite-backed FIFO of calculation rows."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingest_queue ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " payload TEXT NOT NULL,"
+            " enqueued_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingest_dead_letter ("
+            " seq INTEGER PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " error TEXT NOT NULL,"
+            " failed_at REAL NOT NULL)"
+        )
+        self.wakeup = threading.Event()
+
+    def put(self, item: Dict[str, Any]) -> None:
+        payload = json.dumps(item, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ingest_queue (payload, enqueued_at) VALUES (?, ?)",
+                (payload, time.time()),
+            )
+        self.wakeup.set()
+
+    def peek(self, limit: int) -> List[Tuple[int, Dict[str, Any], float]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, payload, enqueued_at FROM ingest_queue ORDER BY seq LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [(seq, json.loads(payload), enqueued_at) for seq, payload, enqueued_at in rows]
+
+    def ack(self, last_seq: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM ingest_queue WHERE seq <= ?", (last_seq,))
+
+    def dead_letter(self, seq: int, item: Dict[str, Any], error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ingest_dead_letter (seq, payload, error, failed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (seq, json.dumps(item, default=str), error, time.time()),
+            )
+
+    def dead_letters(self) -> List[Tuple[int, Dict[str, Any], str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, payload, error FROM ingest_dead_letter ORDER BY seq"
+            ).fetchall()
+        return [(seq, json.loads(payload), error) for seq, payload, error in rows]
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ingest_queue").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# ------------------------------------------------------------------------------
+# Background flusher
+# ------------------------------------------------------------------------------
+def _to_row(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": UUID(item["id"]),
+        "user_id": UUID(item["user_id"]),
+        "type": item["type"],
+        "inputs": item["inputs"],
+        "input_count": len(item["inputs"]),
+        "expression": item.get("expression"),
+        "result": item["result"],
+        "created_at": datetime.fromisoformat(item["created_at"]),
+        "updated_at": datetime.fromisoformat(item["created_at"]),
+    }
+
+
+class IngestFlusher:
+    """Drains an IngestQueue into the database in batches."""
+
+    def __init__(
+        self,
+        queue: IngestQueue,
+        session_factory: Callable[[], Session],
+        batch_size: int = 500,
+        interval: float = 0.5,
+    ):
+        self.queue = queue
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.flushed_total = 0
+        self.batches_total = 0
+        self.dead_lettered_total = 0
+        self.last_batch_seconds = 0.0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _insert(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        if getattr(db, "shards", None) is None:
+            db.execute(insert(Calculation), rows)
+            return
+        # Sharded: one INSERT per user, routed by session.info["user_id"]
+        by_user = defaultdict(list)
+        for row in rows:
+            by_user[row["user_id"]].append(row)
+        for user_id, user_rows in by_user.items():
+            db.info["user_id"] = user_id
+            db.execute(insert(Calculation), user_rows)
+
+    def _existing_ids(self, db: Session, rows: List[Dict[str, Any]]) -> set:
+        by_user = defaultdict(list)
+        for row in rows:
+            by_user[row["user_id"]].append(row["id"])
+        found = set()
+        for user_id, ids in by_user.items():
+            db.info["user_id"] = user_id
+            found.update(db.execute(select(Calculation.id).where(Calculation.id.in_(ids))).scalars())
+        return found
+
+    def _insert_each(self, db: Session, rows: List[Dict[str, Any]], batch) -> List[Dict[str, Any]]:
+        """Insert rows one by one; dead-letter the ones that fail."""
+        queued = {UUID(item["id"]): (seq, item) for seq, item, _ in batch}
+        inserted = []
+        for row in rows:
+            try:
+                self._insert(db, [row])
+                db.commit()
+                inserted.append(row)
+            except IntegrityError as e:
+                db.rollback()
+                seq, item = queued[row["id"]]
+                self.queue.dead_letter(seq, item, str(e.orig))
+                self.dead_lettered_total += 1
+                logger.error("Ingest row %s dead-lettered: %s", row["id"], e.orig)
+        return inserted
+
+    def flush_once(self) -> int:
+        """Flush one batch. Returns the number of queued items consumed."""
+        batch = self.queue.peek(self.batch_size)
+        if not batch:
+            return 0
+
+        started = time.time()
+        rows = [_to_row(item) for _, item, _ in batch]
+
+        db = self.session_factory()
+        try:
+            try:
+                self._insert(db, rows)
+                db.commit()
+            except IntegrityError:
+                # Replay after a crash between commit and ack
+                db.rollback()
+                existing = self._existing_ids(db, rows)
+                rows = [row for row in rows if row["id"] not in existing]
+                try:
+                    if rows:
+                        self._insert(db, rows)
+                    db.commit()
+                except IntegrityError:
+                    # Not (only) duplicates: isolate the rows that fail
+                    db.rollback()
+                    rows = self._insert_each(db, rows, batch)
+        finally:
+            db.close()
+
+        self.queue.ack(batch[-1][0])
+        for row in rows:
+            event_broadcaster.calculation_changed("created", SimpleNamespace(**row))
+
+        finished = time.time()
+        self.flushed_total += len(batch)
+        self.batches_total += 1
+        self.last_batch_seconds = finished - started
+        self.last_lag_seconds = finished - batch[0][2]
+        self.max_lag_seconds = max(self.max_lag_seconds, self.last_lag_seconds)
+        return len(batch)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.flush_once() >= self.batch_size:
+                    continue  # backlog: keep draining
+            except Exception:
+                logger.exception("Ingest flush failed; will retry")
+            self.queue.wakeup.wait(self.interval)
+            self.queue.wakeup.clear()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ingest-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.queue.wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        # Final drain; anything left stays in the durable queue
+        try:
+            while self.flush_once():
+                pass
+        except Exception:
+            logger.exception("Ingest drain on shutdown failed")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "queue_depth": self.queue.depth(),
+            "flushed_total": self.flushed_total,
+            "batches_total": self.batches_total,
+            "dead_lettered_total": self.dead_lettered_total,
+            "last_batch_seconds": round(self.last_batch_seconds, 6),
+            "last_flush_lag_seconds": round(self.last_lag_seconds, 6),
+            "max_flush_lag_seconds": round(self.max_lag_seconds, 6),
+        }
+
+
+# ------------------------------------------------------------------------------
+# Process-wide instances (created by the app lifespan)
+# ------------------------------------------------------------------------------
+ingest_queue: Optional[IngestQueue] = None
+ingest_flusher: Optional[IngestFlusher] = None
+
+
+def start_ingest(session_factory: Callable[[], Session]) -> IngestFlusher:
+    global ingest_queue, ingest_flusher
+    ingest_queue = IngestQueue(settings.INGEST_QUEUE_PATH)
+    ingest_flusher = IngestFlusher(
+        ingest_queue,
+        session_factory,
+        batch_size=settings.INGEST_BATCH_SIZE,
+        interval=settings.INGEST_FLUSH_INTERVAL_SECONDS,
+    )
+    ingest_flusher.start()
+    return ingest_flusher
+
+
+def stop_ingest() -> None:
+    global ingest_queue, ingest_flusher
+    if ingest_flusher is not None:
+        ingest_flusher.stop()
+    if ingest_queue is not None:
+        ingest_queue.close()
+    ingest_queue = ingest_flusher = None
+
+
+def get_ingest_queue() -> Optional[IngestQueue]:
+    """Dependency: the queue, or None when async ingest is off."""
+    return ingest_queue
@@ -1,14 +1,27 @@
 # app/main.py
 
+import time
 from contextlib import asynccontextmanager
+
+import anyio
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
 
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from fastapi.openapi.utils import get_openapi
 from fastapi.security import HTTPBearer
-from app.database import Base, engine
+from app.database import Base, SessionLocal, engine, read_engine, replica_pool, shard_map
+from app.sharding import create_shard_tables
+from app.partitions import PartitionMaintainer, create_partitioned_table, ensure_partitions
+from app.core.config import settings
+from app import importer, ingest
+from app.api.idempotency import IdempotencyMiddleware
+from app.api.admission import READ, SHED_AT, AdmissionMiddleware, get_admission_controller
+from app.api.cache import calculation_cache
+from app.api.events import event_broadcaster
 
 
 
@@ -23,16 +36,52 @@ from app.api.routes.calculations import router as calc_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
 
+    if settings.CALC_CACHE_ENABLED == "true" and settings.calc_cache_unsafe:
+        raise RuntimeError(
+            "CALC_CACHE_ENABLED=true with WEB_CONCURRENCY > 1 needs PUBSUB_BACKEND=redis "
+            "(in-process invalidations do not reach the other workers)"
+        )
+
     # ⭐ IMPORTANT: import all models BEFORE create_all
     import app.models.user
     import app.models.calculation
+    import app.models.refresh_token
+    import app.models.revoked_token
 
     print("Creating tables...")
+    if settings.CALCULATION_PARTITIONING:
+        create_partitioned_table(engine)
     Base.metadata.create_all(bind=engine)
+    if shard_map is not None:
+        create_shard_tables(shard_map)
     print("Tables created successfully!")
 
+    if replica_pool is not None:
+        replica_pool.check_health()
+        replica_pool.start()
+
+    maintainer = None
+    if settings.CALCULATION_PARTITIONING:
+        ensure_partitions(engine, settings.CALCULATION_PARTITION_PREMAKE_MONTHS)
+        maintainer = PartitionMaintainer(engine, settings.CALCULATION_PARTITION_PREMAKE_MONTHS)
+        maintainer.start()
+
+    if settings.INGEST_ENABLED:
+        ingest.start_ingest(SessionLocal)
+
+    admission.start()
+
     yield
 
+    admission.stop()
+    ingest.stop_ingest()
+    importer.shutdown_process_pool()
+
+    if replica_pool is not None:
+        replica_pool.stop()
+    if maintainer is not None:
+        maintainer.stop()
+
 
 
 # ------------------------------------------------------------------------------
@@ -49,6 +98,14 @@ app = FastAPI(
 
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(IdempotencyMiddleware)
+
+# Added last = outermost: overloaded requests are shed before any other work
+admission = get_admission_controller([engine, read_engine])
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
 
 
 # ------------------------------------------------------------------------------
@@ -115,6 +172,48 @@ def read_health():
     return {"status": "ok"} # pragma: no cover
 
 
+# Own tiny limiter: readiness must answer even when the threadpool is full
+_ready_limiter = anyio.CapacityLimiter(2)
+
+
+def _db_round_trip() -> float:
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return time.perf_counter() - started
+
+
+@app.get("/health/ready", tags=["health"])
+async def read_readiness():
+    """
+    Readiness for the load balancer: 503 once the app sheds reads, its
+    last class (pressure >= SHED_AT[READ]), or the database is
+    unreachable. Shedding only auth/writes keeps the instance in rotation,
+    so the balancer doesn't drain it while it still serves most traffic.
+    """
+    signals = admission.signals()
+    try:
+        latency = await anyio.to_thread.run_sync(_db_round_trip, limiter=_ready_limiter)
+        signals["db_latency_ms"] = round(latency * 1000, 2)
+        db_ok = True
+    except Exception as e:
+        signals["db_error"] = str(e)
+        db_ok = False
+
+    ready = db_ok and signals["pressure"] < SHED_AT[READ]
+    return JSONResponse({"status": "ready" if ready else "unavailable", **signals}, 200 if ready else 503)
+
+
+@app.get("/metrics", tags=["health"])
+def read_metrics():
+    flusher = ingest.ingest_flusher
+    return {
+        "ingest": flusher.metrics() if flusher is not None else {"enabled": False},
+        "calculation_cache": calculation_cache.metrics(),
+        "events": event_broadcaster.metrics(),
+    }
+
+
 # ------------------------------------------------------------------------------
 # Run the server directly (optional)
 # ------------------------------------------------------------------------------
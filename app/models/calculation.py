@@ -6,68 +6,119 @@ Polymorphic Calculation model.
 We support multiple calculation types via inheritance:
 - Base `Calculation` (polymorphic parent)
 - `Addition`, `Subtraction`, `Multiplication`, `Division` subclasses
+- `Expression`: a safe arithmetic formula over x0..xn (app.core.expressions)
+- statistics: `Mean`, `Variance`, `StdDev`, `Minimum`, `Maximum` and the
+  `Median`/`P90`/`P95`/`P99` percentiles - one pass, O(1) extra memory
+  (app.core.statistics)
 
 Factory method:
-    Calculation.create(type, user_id, inputs)
+    Calculation.create(type, user_id, inputs, expression=None)
+
+`CalculationDependency` stores the edges of derived calculations (an
+input that references another calculation's result; see app.derived).
 """
 
 import uuid
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from sqlalchemy import (
     Column,
     String,
     DateTime,
     ForeignKey,
+    Index,
+    Integer,
     JSON,
     Float,
+    UniqueConstraint,
 )
-from sqlalchemy.orm import relationship, declared_attr
+from sqlalchemy.orm import relationship, declared_attr, validates
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy import types
 
 from app.database import Base
+from app.core.config import settings
+from app.core import statistics
+from app.core.expressions import compile_expression
+from app.core.ids import uuid7
 
 
 # -------------------------------------------------------------
 # UUID compatibility for BOTH PostgreSQL & SQLite
 # -------------------------------------------------------------
+def _uuid_from_int(value: int) -> uuid.UUID:
+    """Build a UUID without re-validating it.
+
+    Only used for values this type wrote itself; skipping `UUID.__init__`
+    halves the per-row cost of loading keys.
+    """
+    result = object.__new__(uuid.UUID)
+    object.__setattr__(result, "int", value)
+    object.__setattr__(result, "is_safe", uuid.SafeUUID.unknown)
+    return result
+
+
+class _RawBinary(types.BINARY):
+    """BINARY that hands `bytes` to and from the driver untouched."""
+
+    def bind_processor(self, dialect):
+        return None
+
+    def result_processor(self, dialect, coltype):
+        return None
+
+
 class GUID(types.TypeDecorator):
     """Platform-independent GUID type.
 
-    - On PostgreSQL -> use native UUID
-    - On SQLite -> store as CHAR(36)
+    - On PostgreSQL -> use native UUID (UUID objects pass straight through)
+    - Elsewhere -> CHAR(36) text, or BINARY(16) when `binary=True`
+      (defaults to `settings.GUID_STORAGE == "binary"`)
+
+    Binary keys are less than half the size of text keys, so indexes stay
+    smaller and rows are decoded without string parsing.
     """
 
     impl = types.CHAR(36)
     cache_ok = True
 
+    def __init__(self, binary: Optional[bool] = None):
+        super().__init__()
+        if binary is None:
+            binary = settings.GUID_STORAGE == "binary"
+        self.binary = binary
+
     def load_dialect_impl(self, dialect):
         if dialect.name == "postgresql":
             # Use native UUID column
             return dialect.type_descriptor(PG_UUID(as_uuid=True))
-        else:
-            # Store UUID as a string for SQLite
-            return dialect.type_descriptor(types.CHAR(36))
+        if self.binary:
+            return dialect.type_descriptor(_RawBinary(16))
+        # Store UUID as a string for SQLite
+        return dialect.type_descriptor(types.CHAR(36))
 
     def process_bind_param(self, value, dialect):
         if value is None:
             return None
 
-        if isinstance(value, uuid.UUID):
-            # Always store as string
-            return str(value)
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
 
-        # Convert from string → UUID → string (normalized)
-        return str(uuid.UUID(str(value)))
+        if dialect.name == "postgresql":
+            # Native UUID column, driver handles the conversion
+            return value
+        if self.binary:
+            return value.bytes
+        return str(value)
 
     def process_result_value(self, value, dialect):
-        if value is None:
-            return None
+        if value is None or isinstance(value, uuid.UUID):
+            return value
 
-        # Convert database string → UUID object
-        return uuid.UUID(str(value))
+        if self.binary:
+            return _uuid_from_int(int.from_bytes(value, "big"))
+        return _uuid_from_int(int(value.replace("-", ""), 16))
 
 
 # -------------------------------------------------------------
@@ -82,7 +133,7 @@ class AbstractCalculation:
 
     @declared_attr
     def id(cls):
-        return Column(GUID(), primary_key=True, default=uuid.uuid4)
+        return Column(GUID(), primary_key=True, default=uuid7)
 
     @declared_attr
     def user_id(cls):
@@ -101,6 +152,17 @@ class AbstractCalculation:
     def inputs(cls):
         return Column(JSON, nullable=False)
 
+    @declared_attr
+    def input_count(cls):
+        # len(inputs), kept in sync by `_count_inputs`; searchable by index.
+        # NULL on rows older than the column: `python -m app.recompute` fills it
+        return Column(Integer, nullable=True)
+
+    @declared_attr
+    def expression(cls):
+        # Only set for type "expression"
+        return Column(String(1000), nullable=True)
+
     @declared_attr
     def result(cls):
         return Column(Float, nullable=True)
@@ -122,20 +184,43 @@ class AbstractCalculation:
     def user(cls):
         return relationship("User", back_populates="calculations")
 
+    @validates("inputs")
+    def _count_inputs(self, key, inputs):
+        self.input_count = len(inputs)
+        return inputs
+
     # ------------ Factory method ------------
     @classmethod
-    def create(cls, calculation_type: str, user_id: uuid.UUID, inputs: List[float]):
+    def create(
+        cls,
+        calculation_type: str,
+        user_id: uuid.UUID,
+        inputs: List[float],
+        expression: Optional[str] = None,
+    ):
         mapping = {
             "addition": Addition,
             "subtraction": Subtraction,
             "multiplication": Multiplication,
             "division": Division,
+            "expression": Expression,
+            "mean": Mean,
+            "variance": Variance,
+            "stddev": StdDev,
+            "min": Minimum,
+            "max": Maximum,
+            "median": Median,
+            "p90": P90,
+            "p95": P95,
+            "p99": P99,
         }
 
         calculation_cls = mapping.get(calculation_type.lower())
         if not calculation_cls:
             raise ValueError(f"Unsupported calculation type: {calculation_type}")   # pragma: no cover
 
+        if calculation_cls is Expression:
+            return Expression(user_id=user_id, inputs=inputs, expression=expression)
         return calculation_cls(user_id=user_id, inputs=inputs)
 
     # ------------ Abstract compute method ------------
@@ -153,6 +238,31 @@ class Calculation(Base, AbstractCalculation):
     }
 
 
+# Range searches within one user's history (GET /calculations filters)
+Index("ix_calculations_user_id_result", Calculation.user_id, Calculation.result)
+Index("ix_calculations_user_id_input_count", Calculation.user_id, Calculation.input_count)
+
+
+# -------------------------------------------------------------
+# Dependency edges of derived calculations
+# -------------------------------------------------------------
+class CalculationDependency(Base):
+    """`calculation_id`.inputs[position] is the result of `depends_on_id`.
+
+    No foreign keys to `calculations`: they can't be declared against a
+    partitioned table, and edges live next to their calculations on the
+    user's shard. Routes remove edges when a calculation is deleted.
+    """
+    __tablename__ = "calculation_dependencies"
+    __table_args__ = (UniqueConstraint("calculation_id", "position"),)
+
+    id = Column(GUID(), primary_key=True, default=uuid7)
+    user_id = Column(GUID(), nullable=False, index=True)
+    calculation_id = Column(GUID(), nullable=False, index=True)
+    depends_on_id = Column(GUID(), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+
+
 # -------------------------------------------------------------
 # CHILD MODELS WITH PROPER polymorphic_identity + constructors
 # -------------------------------------------------------------
@@ -217,3 +327,122 @@ class Division(Calculation):
                 raise ValueError("Cannot divide by zero.")
             result /= v
         return float(result)
+
+
+class Expression(Calculation):
+    __mapper_args__ = {"polymorphic_identity": "expression"}
+
+    def __init__(self, **kwargs):
+        kwargs["type"] = "expression"
+        super().__init__(**kwargs)
+
+    def get_result(self) -> float:
+        if not self.expression:
+            raise ValueError("Expression calculations require an expression.")
+        return compile_expression(self.expression).evaluate(self.inputs)
+
+
+# -------------------------------------------------------------
+# STATISTICS (single pass, O(1) extra memory)
+# -------------------------------------------------------------
+class Mean(Calculation):
+    __mapper_args__ = {"polymorphic_identity": "mean"}
+
+    def __init__(self, **kwargs):
+        kwargs["type"] = "mean"
+        super().__init__(**kwargs)
+
+    def get_result(self) -> float:
+        return statistics.mean(self.inputs)
+
+
+class Variance(Calculation):
+    __mapper_args__ = {"polymorphic_identity": "variance"}
+
+    def __init__(self, **kwargs):
+        kwargs["type"] = "variance"
+        super().__init__(**kwargs)
+
+    def get_result(self) -> float:
+        return statistics.variance(self.inputs)
+
+
+class StdDev(Calculation):
+    __mapper_args__ = {"polymorphic_identity": "stddev"}
+
+    def __init__(self, **kwargs):
+        kwargs["type"] = "stddev"
+        super().__init__(**kwargs)
+
+    def get_result(self) -> float:
+        return statistics.stddev(self.inputs)
+
+
+class Minimum(Calculation):
+    __mapper_args__ = {"polymorphic_identity": "min"}
+
+    def __init__(self, **kwargs):
+        kwargs["type"] = "min"
+        super().__init__(**kwargs)
+
+    def get_result(self) -> float:
+        if not self.inputs:
+            raise ValueError("Min requires at least one number.")
+        return float(min(self.inputs))
+
+
+class Maximum(Calculation):
+    __mapper_args__ = {"polymorphic_identity": "max"}
+
+    def __init__(self, **kwargs):
+        kwargs["type"] = "max"
+        super().__init__(**kwargs)
+
+    def get_result(self) -> float:
+        if not self.inputs:
+            raise ValueError("Max requires at least one number.")
+        return float(max(self.inputs))
+
+
+class _Percentile:
+    """get_result for the percentile types (P-square estimate)."""
+    quantile: float
+
+    def get_result(self) -> float:
+        return float(statistics.quantile(self.inputs, self.quantile))
+
+
+class Median(_Percentile, Calculation):
+    __mapper_args__ = {"polymorphic_identity": "median"}
+    quantile = 0.5
+
+    def __init__(self, **kwargs):
+        kwargs["type"] = "median"
+        super().__init__(**kwargs)
+
+
+class P90(_Percentile, Calculation):
+    __mapper_args__ = {"polymorphic_identity": "p90"}
+    quantile = 0.9
+
+    def __init__(self, **kwargs):
+        kwargs["type"] = "p90"
+        super().__init__(**kwargs)
+
+
+class P95(_Percentile, Calculation):
+    __mapper_args__ = {"polymorphic_identity": "p95"}
+    quantile = 0.95
+
+    def __init__(self, **kwargs):
+        kwargs["type"] = "p95"
+        super().__init__(**kwargs)
+
+
+class P99(_Percentile, Calculation):
+    __mapper_args__ = {"polymorphic_identity": "p99"}
+    quantile = 0.99
+
+    def __init__(self, **kwargs):
+        kwargs["type"] = "p99"
+        super().__init__(**kwargs)
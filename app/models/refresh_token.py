@@ -0,0 +1,95 @@
+# app/models/refresh_token.py
+
+"""
+Refresh tokens (rotation + reuse detection).
+
+One row per issued refresh token, keyed by its `jti`. Every login starts
+a new family; `/auth/refresh` marks the presented token used and issues
+the next one in the same family. Presenting a token that was already
+used means it leaked: the whole family is revoked, so both the attacker
+and the legitimate client have to log in again.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from jose import JWTError
+from sqlalchemy import Column, DateTime, ForeignKey, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.core.security import create_refresh_token, decode_refresh_token
+from app.database import Base
+from app.models.calculation import GUID
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(GUID(), primary_key=True, default=uuid7)  # the jti claim
+    user_id = Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(GUID(), nullable=False, index=True)
+
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    used_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+    @classmethod
+    def issue(cls, db: Session, user_id: UUID, family_id: Optional[UUID] = None) -> str:
+        """Store and return a new refresh token (does NOT commit)."""
+        jti = uuid7()
+        family_id = family_id or jti
+        db.add(
+            cls(
+                id=jti,
+                user_id=user_id,
+                family_id=family_id,
+                expires_at=utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            )
+        )
+        return create_refresh_token(str(user_id), str(jti), str(family_id))
+
+    @classmethod
+    def revoke_family(cls, db: Session, family_id: UUID) -> int:
+        return db.execute(
+            update(cls)
+            .where(cls.family_id == family_id, cls.revoked_at.is_(None))
+            .values(revoked_at=utcnow())
+        ).rowcount
+
+    @classmethod
+    def rotate(cls, db: Session, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Exchange a refresh token for the next one in its family.
+        Returns {"user_id", "refresh_token"} or None if the token is
+        invalid, expired, revoked or already used (which revokes the
+        family). Commits on the reuse path, otherwise does NOT commit.
+        """
+        try:
+            payload = decode_refresh_token(token)
+            jti = UUID(payload["jti"])
+            family_id = UUID(payload["fam"])
+            user_id = UUID(payload["sub"])
+        except (JWTError, KeyError, ValueError):
+            return None
+
+        # Check-and-consume in one statement: only an unused, unrevoked
+        # token matches, so two concurrent refreshes can't both succeed.
+        consumed = db.execute(
+            update(cls)
+            .where(cls.id == jti, cls.used_at.is_(None), cls.revoked_at.is_(None))
+            .values(used_at=utcnow())
+        ).rowcount
+        if consumed != 1:
+            cls.revoke_family(db, family_id)
+            db.commit()
+            return None
+
+        return {"user_id": user_id, "refresh_token": cls.issue(db, user_id, family_id)}
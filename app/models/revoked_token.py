@@ -0,0 +1,29 @@
+# app/models/revoked_token.py
+
+"""
+Revoked access tokens.
+
+`key` is either a token's `jti` (logout) or `user:<user_id>` (every token
+of that user issued before `revoked_at`, e.g. when an account is
+disabled, see `User.deactivate`). Rows are only needed until
+`expires_at`, when the tokens they cover would have expired anyway; the
+retention worker (app.retention) deletes them after that.
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, String
+
+from app.database import Base
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    key = Column(String(64), primary_key=True)
+    revoked_at = Column(DateTime(timezone=True), default=utcnow, nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -2,8 +2,8 @@
 
 """
 User SQLAlchemy model with:
-- UUID primary key
-- Unique username & email
+- UUIDv7 (time-ordered) primary key
+- Unique username & email (case-insensitive, lower() indexes)
 - First/last name
 - Password hashing helpers
 - Authentication helper (authenticate)
@@ -11,15 +11,19 @@ User SQLAlchemy model with:
 - Relationship to Calculation
 """
 
-import uuid
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 from app.models.calculation import GUID
-from sqlalchemy import Column, String, Boolean, DateTime, or_
+from sqlalchemy import Column, String, Boolean, DateTime, Index, func, inspect, literal, select, union_all
+from sqlalchemy import insert as sa_insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import relationship, Session
 
 from app.database import Base
 from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.ids import uuid7
+from app.core.revocation import revocation_list
 
 
 def utcnow() -> datetime:
@@ -30,7 +34,7 @@ def utcnow() -> datetime:
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID(), primary_key=True, default=uuid7)
 
     username = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String, unique=True, nullable=False, index=True)
@@ -45,7 +49,14 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow, nullable=False)
 
-    calculations = relationship("Calculation", back_populates="user", cascade="all, delete-orphan")
+    # passive_deletes: let the ON DELETE CASCADE foreign key remove children
+    # instead of loading every calculation into the session first
+    calculations = relationship(
+        "Calculation",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
 
     # ---------------- Password helpers ----------------
@@ -65,13 +76,26 @@ class User(Base):
 
     # ---------------- Registration ----------------
 
+    @classmethod
+    def exists(cls, db: Session, username: str, email: str) -> bool:
+        """
+        Cheap duplicate probe: one indexed lookup per column (UNION ALL
+        instead of an OR, so each branch uses its own unique index).
+        """
+        probe = union_all(
+            select(literal(1)).where(func.lower(cls.username) == func.lower(username)),
+            select(literal(1)).where(func.lower(cls.email) == func.lower(email)),
+        ).limit(1)
+        return db.execute(probe).first() is not None
+
     @classmethod
     def register(cls, db: Session, user_data: Dict[str, Any]) -> "User":
         """
         Register a new user.
-        - Validates unique username/email.
-        - Hashes the password.
-        - Creates and returns the user (but does NOT commit).
+        - Rejects known duplicates before paying for the bcrypt hash.
+        - Inserts with a single INSERT ... ON CONFLICT DO NOTHING RETURNING,
+          so concurrent registrations can't race past the probe.
+        - Returns the user (but does NOT commit).
         """
         username = user_data.get("username")
         email = user_data.get("email")
@@ -79,17 +103,14 @@ class User(Base):
 
         if not username or not email or not password:
             raise ValueError("Username, email, and password are required")
+        if "@" in username:
+            # Login tells usernames and emails apart by the "@"
+            raise ValueError("Username cannot contain '@'")
 
-        # Check duplicates
-        existing = (
-            db.query(cls)
-            .filter(or_(cls.username == username, cls.email == email))
-            .first()
-        )
-        if existing:
+        if cls.exists(db, username, email):
             raise ValueError("Username or email already exists")
 
-        user = cls(
+        values = dict(
             username=username,
             email=email,
             first_name=user_data.get("first_name", "").strip() or "First",
@@ -98,11 +119,40 @@ class User(Base):
             is_active=True,
             is_verified=False,
         )
-        db.add(user)
+
+        dialect = db.get_bind(mapper=inspect(cls)).dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(cls).values(**values).on_conflict_do_nothing().returning(cls)
+            user = db.scalars(stmt).first()
+        else:
+            # No ON CONFLICT: let the unique constraint decide
+            try:
+                with db.begin_nested():
+                    user = db.scalars(sa_insert(cls).values(**values).returning(cls)).first()
+            except IntegrityError:
+                user = None
+
+        if user is None:
+            raise ValueError("Username or email already exists")
         return user
 
     # ---------------- Authentication ----------------
 
+    @classmethod
+    def lookup_query(cls, username_or_email: str, by_email: Optional[bool] = None):
+        """
+        SELECT for a login identifier: anything with an "@" is an email,
+        the rest are usernames. Matching is case-insensitive and each
+        form is a single probe of its lower() unique index. Both sides
+        go through the database's lower(), so the comparison folds case
+        exactly like the index does (SQLite only folds ASCII).
+        """
+        if by_email is None:
+            by_email = "@" in username_or_email
+        column = cls.email if by_email else cls.username
+        return select(cls).where(func.lower(column) == func.lower(username_or_email))
+
     @classmethod
     def authenticate(
         cls,
@@ -115,16 +165,10 @@ class User(Base):
         Returns:
             {"user": user, "access_token": <jwt>} or None if invalid.
         """
-        user = (
-            db.query(cls)
-            .filter(
-                or_(
-                    cls.username == username_or_email,
-                    cls.email == username_or_email,
-                )
-            )
-            .first()
-        )
+        user = db.scalars(cls.lookup_query(username_or_email)).first()
+        if user is None and "@" in username_or_email:
+            # Usernames registered before "@" was rejected
+            user = db.scalars(cls.lookup_query(username_or_email, by_email=False)).first()
 
         if not user or not user.verify_password(password):
             return None
@@ -139,3 +183,15 @@ class User(Base):
             "user": user,
             "access_token": access_token,
         }
+
+    # ---------------- Account state ----------------
+
+    def deactivate(self, db: Session) -> None:
+        """Disable the account and revoke every token issued so far (does NOT commit)."""
+        self.is_active = False
+        revocation_list.revoke_user(db, self.id)
+
+
+# Case-insensitive uniqueness; also the indexes login lookups probe
+Index("ix_users_username_lower", func.lower(User.username), unique=True)
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
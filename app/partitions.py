@@ -0,0 +1,290 @@
+# app/partitions.py
+
+"""
+Monthly range partitioning + archival for `calculations` (PostgreSQL).
+
+Enabled with CALCULATION_PARTITIONING=true:
+- `calculations` is created as `PARTITION BY RANGE (created_at)` with a
+  primary key of (id, created_at) and a DEFAULT partition as a safety net
+- one partition per month (`calculations_pYYYYMM`), created ahead of time
+  at startup and by a background maintainer
+- `archive_partitions` writes partitions older than the retention
+  window to gzip-compressed CSV in CALCULATION_ARCHIVE_DIR, then
+  detaches and drops them
+
+Queries that filter on `created_at` (e.g. `GET /calculations?since=...`)
+only scan the matching partitions.
+
+Run maintenance by hand:
+    python -m app.partitions ensure
+    python -m app.partitions archive [--retention-months N]
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, ForeignKey, Index, MetaData, Table, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TABLE = "calculations"
+_PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+# ------------------------------------------------------------------------------
+# Month helpers
+# ------------------------------------------------------------------------------
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + (value.month - 1) + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_p{month.year:04d}{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1)
+
+
+# ------------------------------------------------------------------------------
+# DDL
+# ------------------------------------------------------------------------------
+def partitioned_table() -> Table:
+    """`calculations` as a range-partitioned table.
+
+    Postgres requires the partition key in every unique constraint, so
+    the primary key becomes (id, created_at). The ORM keeps using `id`
+    alone as the identity.
+    """
+    from app.database import Base
+    from app.models import user, calculation  # noqa: F401 (register tables)
+
+    source = Base.metadata.tables[TABLE]
+    metadata = MetaData()
+    Base.metadata.tables["users"].to_metadata(metadata)
+
+    columns = []
+    for col in source.columns:
+        args = [ForeignKey(fk.target_fullname, ondelete=fk.ondelete) for fk in col.foreign_keys]
+        columns.append(
+            Column(
+                col.name,
+                col.type,
+                *args,
+                primary_key=col.primary_key or col.name == "created_at",
+                nullable=col.nullable,
+                index=col.index,
+            )
+        )
+
+    table = Table(TABLE, metadata, *columns, postgresql_partition_by="RANGE (created_at)")
+    for index in source.indexes:
+        # Single-column indexes come with `index=True` above
+        if index.name and not (len(index.columns) == 1 and next(iter(index.columns)).index):
+            Index(index.name, *[table.c[col.name] for col in index.columns], unique=index.unique)
+    return table
+
+
+def create_partitioned_table(engine: Engine) -> bool:
+    """Create the partitioned parent + DEFAULT partition if missing.
+
+    Must run before `Base.metadata.create_all`, which then skips the
+    existing table. Returns True when the table was created.
+    """
+    if engine.dialect.name != "postgresql" or inspect(engine).has_table(TABLE):
+        return False
+
+    table = partitioned_table()
+    with engine.begin() as conn:
+        table.metadata.tables["users"].create(conn, checkfirst=True)
+        conn.execute(CreateTable(table))
+        for index in table.indexes:
+            conn.execute(CreateIndex(index))
+        conn.execute(text(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT"))
+
+    logger.info("Created partitioned table %s", TABLE)
+    return True
+
+
+def is_partitioned(engine: Engine) -> bool:
+    if engine.dialect.name != "postgresql":
+        return False
+    with engine.connect() as conn:
+        return bool(
+            conn.execute(
+                text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:t)"),
+                {"t": TABLE},
+            ).scalar()
+        )
+
+
+def list_partitions(engine: Engine) -> List[Tuple[str, datetime]]:
+    """Return [(name, month)] of the monthly partitions, oldest first."""
+    with engine.connect() as conn:
+        names = conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:t)"
+            ),
+            {"t": TABLE},
+        ).scalars().all()
+    months = [(name, partition_month(name)) for name in names]
+    return sorted((item for item in months if item[1] is not None), key=lambda item: item[1])
+
+
+def ensure_partitions(
+    engine: Engine,
+    months_ahead: int = 3,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """Create partitions from the current month up to `months_ahead`."""
+    if not is_partitioned(engine):
+        return []
+
+    existing = {name for name, _ in list_partitions(engine)}
+    current = month_start(now or datetime.utcnow())
+    created = []
+
+    for offset in range(months_ahead + 1):
+        start = add_months(current, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        end = add_months(start, 1)
+        with engine.begin() as conn:
+            # Fails if the DEFAULT partition already holds rows for this
+            # month; those must be moved out by hand first.
+            conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                )
+            )
+        created.append(name)
+        logger.info("Created partition %s", name)
+
+    return created
+
+
+# ------------------------------------------------------------------------------
+# Archival
+# ------------------------------------------------------------------------------
+def archive_partitions(
+    engine: Engine,
+    retention_months: int,
+    archive_dir: str,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """Move partitions older than the retention window to cold storage.
+
+    Each partition is streamed with COPY into
+    `<archive_dir>/<partition>.csv.gz`, fsynced, then detached and
+    dropped. Returns the archive file paths.
+    """
+    if not is_partitioned(engine):
+        return []
+
+    cutoff = add_months(month_start(now or datetime.utcnow()), -retention_months)
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = []
+
+    for name, month in list_partitions(engine):
+        if add_months(month, 1) > cutoff:
+            break
+
+        path = os.path.join(archive_dir, f"{name}.csv.gz")
+
+        # Copy while still attached: a failed run leaves the data in place
+        raw = engine.raw_connection()
+        try:
+            with gzip.open(path + ".tmp", "wb") as out:
+                cursor = raw.cursor()
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER true)", out)
+                cursor.close()
+            raw.commit()
+        finally:
+            raw.close()
+
+        with open(path + ".tmp", "rb") as fh:
+            os.fsync(fh.fileno())
+        os.replace(path + ".tmp", path)
+
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+
+        archived.append(path)
+        logger.info("Archived partition %s to %s", name, path)
+
+    return archived
+
+
+# ------------------------------------------------------------------------------
+# Background maintenance
+# ------------------------------------------------------------------------------
+class PartitionMaintainer:
+    """Periodically pre-creates upcoming partitions."""
+
+    def __init__(self, engine: Engine, months_ahead: int = 3, interval: float = 6 * 3600):
+        self.engine = engine
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                ensure_partitions(self.engine, self.months_ahead)
+            except Exception:
+                logger.exception("Partition maintenance failed")
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="partition-maintainer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from app.database import engine
+
+    parser = argparse.ArgumentParser(description="Calculation partition maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("ensure", help="create the partitioned table and upcoming partitions")
+    arc = sub.add_parser("archive", help="archive partitions past the retention window")
+    arc.add_argument("--retention-months", type=int, default=settings.CALCULATION_RETENTION_MONTHS)
+    arc.add_argument("--archive-dir", default=settings.CALCULATION_ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "ensure":
+        create_partitioned_table(engine)
+        print(ensure_partitions(engine, settings.CALCULATION_PARTITION_PREMAKE_MONTHS))
+    else:
+        print(archive_partitions(engine, args.retention_months, args.archive_dir))
@@ -0,0 +1,278 @@
+# app/recompute.py
+
+"""
+Recompute / backfill stored calculation results.
+
+Run after `get_result` semantics change (precision fixes, new error
+handling) so stored `result` values match what the code computes now.
+The same pass fills `input_count` on rows written before it existed.
+
+Per database (the primary, or every shard):
+- rows are read in keyset order (`WHERE id > :last ORDER BY id LIMIT n`),
+  never with OFFSET, so each chunk is an index range scan
+- chunks are recomputed on a process pool (all cores by default); a few
+  chunks are in flight while the next ones are read
+- changed rows only are written, in chunk order, with one
+  `UPDATE ... FROM (VALUES ...)` per chunk on PostgreSQL (executemany
+  elsewhere)
+- after each write, derived calculations (app.derived) depending on a
+  changed row are recomputed, cached copies of every changed row are
+  invalidated and `updated` events published (reaching API workers
+  through Redis when CALC_CACHE_BACKEND / PUBSUB_BACKEND use it; the
+  in-process cache just expires after CALC_CACHE_TTL_SECONDS)
+- only then is the last id saved to the checkpoint file, so an
+  interrupted run resumes where it stopped (`--restart` ignores it)
+  without losing a chunk's derived rows
+
+Rows whose result can no longer be computed are left untouched and
+counted as failed.
+
+    python -m app.recompute
+    python -m app.recompute --batch-size 5000 --workers 8 --checkpoint recompute.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Float, Integer, bindparam, column, select, update, values
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app import derived
+from app.api.cache import calculation_cache
+from app.api.events import event_broadcaster
+from app.models import user  # noqa: F401 (worker processes need every mapper)
+from app.models.calculation import GUID, Calculation, CalculationDependency
+
+logger = logging.getLogger(__name__)
+
+calculations = Calculation.__table__
+dependencies = CalculationDependency.__table__
+
+Row = Tuple[Any, str, List[float], Optional[str], Optional[float], Optional[int]]
+
+
+# ------------------------------------------------------------------------------
+# Worker side
+# ------------------------------------------------------------------------------
+def recompute_rows(rows: Sequence[Row]) -> Tuple[List[Dict[str, Any]], int]:
+    """Recompute a chunk. Returns (changed rows, number of failures)."""
+    changed, failed = [], 0
+    for calc_id, calc_type, inputs, expression, result, input_count in rows:
+        try:
+            calc = Calculation.create(calc_type, user_id=None, inputs=inputs, expression=expression)
+            new_result = calc.get_result()
+        except (ValueError, TypeError, IndexError):
+            failed += 1
+            continue
+        if new_result != result or input_count != len(inputs):
+            changed.append({"b_id": calc_id, "b_result": new_result, "b_input_count": len(inputs)})
+    return changed, failed
+
+
+# ------------------------------------------------------------------------------
+# Checkpoint
+# ------------------------------------------------------------------------------
+class Checkpoint:
+    """Last written id per database, in a small JSON file."""
+
+    def __init__(self, path: Optional[str], restart: bool = False):
+        self.path = path
+        self.positions: Dict[str, str] = {}
+        if path and not restart and os.path.exists(path):
+            with open(path) as f:
+                self.positions = json.load(f)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.positions.get(key)
+
+    def save(self, key: str, last_id) -> None:
+        self.positions[key] = str(last_id)
+        if self.path:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.positions, f)
+            os.replace(tmp, self.path)
+
+
+# ------------------------------------------------------------------------------
+# Reading / writing
+# ------------------------------------------------------------------------------
+def read_chunk(engine: Engine, after: Optional[str], batch_size: int) -> List[Row]:
+    query = select(
+        calculations.c.id,
+        calculations.c.type,
+        calculations.c.inputs,
+        calculations.c.expression,
+        calculations.c.result,
+        calculations.c.input_count,
+    ).order_by(calculations.c.id).limit(batch_size)
+    if after is not None:
+        query = query.where(calculations.c.id > after)
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(query)]
+
+
+def write_changes(engine: Engine, changed: List[Dict[str, Any]]) -> None:
+    if not changed:
+        return
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            # UPDATE calculations SET ... FROM (VALUES (...), ...) AS v (id, result, input_count)
+            v = values(
+                column("id", GUID()), column("result", Float), column("input_count", Integer), name="v"
+            ).data([(c["b_id"], c["b_result"], c["b_input_count"]) for c in changed])
+            conn.execute(
+                update(calculations)
+                .where(calculations.c.id == v.c.id)
+                .values(result=v.c.result, input_count=v.c.input_count)
+            )
+        else:
+            conn.execute(
+                update(calculations)
+                .where(calculations.c.id == bindparam("b_id"))
+                .values(result=bindparam("b_result"), input_count=bindparam("b_input_count")),
+                changed,
+            )
+
+
+def _with_dependents(engine: Engine, ids: List[Any]) -> Set[Any]:
+    """The changed rows that other (derived) rows reference."""
+    with engine.connect() as conn:
+        return set(
+            conn.execute(
+                select(dependencies.c.depends_on_id).where(dependencies.c.depends_on_id.in_(ids))
+            ).scalars()
+        )
+
+
+def propagate(engine: Engine, roots: Set[Any]) -> List[Any]:
+    """Re-resolve derived calculations below the changed rows; returns their ids."""
+    updated: List[Any] = []
+    for calc_id in roots:
+        with Session(bind=engine) as db:
+            calc = db.get(Calculation, calc_id)
+            if calc is None:
+                continue
+            try:
+                downstream = [row.id for row in derived.recompute_downstream(db, calc)]
+                db.commit()
+                updated.extend(downstream)
+            except ValueError as e:
+                db.rollback()
+                logger.warning("Dependents of %s not recomputed: %s", calc_id, e)
+    return updated
+
+
+def notify(engine: Engine, ids: List[Any]) -> None:
+    """Drop cached copies of the rewritten rows and publish `updated` events."""
+    if not ids:
+        return
+    with engine.connect() as conn:
+        rows = conn.execute(select(calculations).where(calculations.c.id.in_(ids))).all()
+    for row in rows:
+        calculation_cache.invalidate(row.user_id, row.id)
+        event_broadcaster.calculation_changed("updated", SimpleNamespace(**row._mapping))
+
+
+# ------------------------------------------------------------------------------
+# Driver
+# ------------------------------------------------------------------------------
+def _key(engine: Engine) -> str:
+    return engine.url.render_as_string(hide_password=True)
+
+
+def recompute_engine(
+    engine: Engine,
+    pool: ProcessPoolExecutor,
+    checkpoint: Checkpoint,
+    batch_size: int = 2000,
+    window: int = 4,
+) -> Dict[str, float]:
+    key = _key(engine)
+    stats = {"scanned": 0, "changed": 0, "failed": 0, "derived": 0}
+    started = time.perf_counter()
+    last_read = checkpoint.get(key)
+    pending: Deque[Tuple[Any, int, Future]] = deque()
+    exhausted = False
+
+    while True:
+        # Keep `window` chunks computing while earlier ones are written
+        while not exhausted and len(pending) < window:
+            rows = read_chunk(engine, last_read, batch_size)
+            if not rows:
+                exhausted = True
+                break
+            last_read = rows[-1][0]
+            pending.append((last_read, len(rows), pool.submit(recompute_rows, rows)))
+        if not pending:
+            break
+
+        last_id, scanned, future = pending.popleft()
+        changed, failed = future.result()
+        write_changes(engine, changed)
+        if changed:
+            ids = [c["b_id"] for c in changed]
+            downstream = propagate(engine, _with_dependents(engine, ids))
+            notify(engine, list(dict.fromkeys(ids + downstream)))
+            stats["derived"] += len(downstream)
+        checkpoint.save(key, last_id)
+
+        stats["scanned"] += scanned
+        stats["changed"] += len(changed)
+        stats["failed"] += failed
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "%s: %d scanned, %d changed, %d failed (%.0f rows/s)",
+            key, stats["scanned"], stats["changed"], stats["failed"], stats["scanned"] / elapsed,
+        )
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+def run_recompute(
+    engines: List[Engine],
+    batch_size: int = 2000,
+    workers: Optional[int] = None,
+    checkpoint_path: Optional[str] = None,
+    restart: bool = False,
+) -> Dict[str, Dict[str, float]]:
+    checkpoint = Checkpoint(checkpoint_path, restart)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return {
+            _key(engine): recompute_engine(engine, pool, checkpoint, batch_size, window=workers * 2)
+            for engine in engines
+        }
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from app.database import engine, shard_map
+
+    parser = argparse.ArgumentParser(description="Recompute stored calculation results")
+    parser.add_argument("--batch-size", type=int, default=2000, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=0, help="processes (0 = all cores)")
+    parser.add_argument("--checkpoint", default="recompute.checkpoint.json", help="resume file ('' = none)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    calc_engines = shard_map.engines if shard_map is not None else [engine]
+    print(
+        run_recompute(
+            calc_engines,
+            batch_size=args.batch_size,
+            workers=args.workers or None,
+            checkpoint_path=args.checkpoint or None,
+            restart=args.restart,
+        )
+    )
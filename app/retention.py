@@ -0,0 +1,167 @@
+# app/retention.py
+
+"""
+Retention / cleanup worker.
+
+Deletes in bounded, set-based batches (one short transaction per batch,
+with a pause in between) so purges never hold long locks or load rows
+into Python:
+- calculations older than RETENTION_CALCULATION_DAYS
+- users deactivated (is_active = false) for RETENTION_INACTIVE_USER_DAYS,
+  together with their calculations (and derived-calculation edges)
+- revoked_tokens rows past `expires_at` (always: the tokens they cover
+  have expired anyway)
+
+A retention window of 0 disables that purge.
+
+Run once (cron) or as a loop:
+    python -m app.retention
+    python -m app.retention --interval 3600
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.models.calculation import Calculation, CalculationDependency
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+calculations = Calculation.__table__
+dependencies = CalculationDependency.__table__
+users = User.__table__
+revoked_tokens = RevokedToken.__table__
+
+
+def _delete_in_batches(engine: Engine, table, where, batch_size: int, pause: float) -> int:
+    """DELETE ... WHERE pk IN (SELECT pk ... LIMIT n) until nothing matches."""
+    pk = next(iter(table.primary_key.columns))
+    total = 0
+    while True:
+        ids = select(pk).where(where).limit(batch_size).scalar_subquery()
+        with engine.begin() as conn:
+            deleted = conn.execute(delete(table).where(pk.in_(ids))).rowcount
+        total += deleted
+        if deleted < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+def purge_old_calculations(
+    engines: List[Engine],
+    cutoff: datetime,
+    batch_size: int = 10_000,
+    pause: float = 0.1,
+) -> int:
+    """Delete calculations created before `cutoff` on every engine."""
+    where = calculations.c.created_at < cutoff.replace(tzinfo=None)
+    return sum(_delete_in_batches(e, calculations, where, batch_size, pause) for e in engines)
+
+
+def purge_expired_revocations(engine: Engine, now: datetime, batch_size: int = 10_000, pause: float = 0.1) -> int:
+    """Delete revoked_tokens rows whose tokens have expired."""
+    return _delete_in_batches(engine, revoked_tokens, revoked_tokens.c.expires_at < now, batch_size, pause)
+
+
+def purge_inactive_users(
+    engine: Engine,
+    cutoff: datetime,
+    calculation_engines: Optional[List[Engine]] = None,
+    batch_size: int = 10_000,
+    pause: float = 0.1,
+) -> Dict[str, int]:
+    """Delete users deactivated before `cutoff` and their calculations.
+
+    Calculations go first, in batches, so the final user DELETE has
+    nothing left to cascade.
+    """
+    calculation_engines = calculation_engines or [engine]
+    inactive = (users.c.is_active.is_(False)) & (users.c.updated_at < cutoff)
+    removed = {"users": 0, "calculations": 0}
+
+    while True:
+        with engine.connect() as conn:
+            user_ids = conn.execute(
+                select(users.c.id).where(inactive).limit(1000)
+            ).scalars().all()
+        if not user_ids:
+            return removed
+
+        where = calculations.c.user_id.in_(user_ids)
+        for calc_engine in calculation_engines:
+            removed["calculations"] += _delete_in_batches(
+                calc_engine, calculations, where, batch_size, pause
+            )
+            _delete_in_batches(
+                calc_engine, dependencies, dependencies.c.user_id.in_(user_ids), batch_size, pause
+            )
+
+        with engine.begin() as conn:
+            removed["users"] += conn.execute(delete(users).where(users.c.id.in_(user_ids))).rowcount
+        if pause:
+            time.sleep(pause)
+
+
+def run_retention(
+    engine: Engine,
+    calculation_engines: Optional[List[Engine]] = None,
+    calculation_days: int = 0,
+    inactive_user_days: int = 0,
+    batch_size: int = 10_000,
+    pause: float = 0.1,
+    now: Optional[datetime] = None,
+) -> Dict[str, int]:
+    now = now or datetime.now(timezone.utc)
+    calculation_engines = calculation_engines or [engine]
+    stats = {"calculations": 0, "users": 0, "revoked_tokens": 0}
+
+    if calculation_days > 0:
+        stats["calculations"] += purge_old_calculations(
+            calculation_engines, now - timedelta(days=calculation_days), batch_size, pause
+        )
+
+    if inactive_user_days > 0:
+        removed = purge_inactive_users(
+            engine, now - timedelta(days=inactive_user_days), calculation_engines, batch_size, pause
+        )
+        stats["calculations"] += removed["calculations"]
+        stats["users"] += removed["users"]
+
+    stats["revoked_tokens"] = purge_expired_revocations(engine, now, batch_size, pause)
+
+    logger.info("Retention run removed %s", stats)
+    return stats
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from app.database import engine, shard_map
+
+    parser = argparse.ArgumentParser(description="Purge old calculations and inactive users")
+    parser.add_argument("--interval", type=float, default=0, help="seconds between runs (0 = run once)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    calc_engines = shard_map.engines if shard_map is not None else [engine]
+    while True:
+        print(
+            run_retention(
+                engine,
+                calc_engines,
+                calculation_days=settings.RETENTION_CALCULATION_DAYS,
+                inactive_user_days=settings.RETENTION_INACTIVE_USER_DAYS,
+                batch_size=settings.RETENTION_BATCH_SIZE,
+                pause=settings.RETENTION_PAUSE_SECONDS,
+            )
+        )
+        if not args.interval:
+            break
+        time.sleep(args.interval)
@@ -2,23 +2,83 @@
 
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from uuid import UUID
 
 from pydantic import BaseModel, Field, ConfigDict, model_validator, field_validator
 
+from app.core.expressions import compile_expression
+
 
 class CalculationType(str, Enum):
     ADDITION = "addition"
     SUBTRACTION = "subtraction"
     MULTIPLICATION = "multiplication"
     DIVISION = "division"
+    EXPRESSION = "expression"
+    MEAN = "mean"
+    VARIANCE = "variance"
+    STDDEV = "stddev"
+    MIN = "min"
+    MAX = "max"
+    MEDIAN = "median"
+    P90 = "p90"
+    P95 = "p95"
+    P99 = "p99"
+
+
+# One value is a valid sample for these; every other type needs two inputs
+SINGLE_INPUT_TYPES = {
+    CalculationType.MEAN,
+    CalculationType.MIN,
+    CalculationType.MAX,
+    CalculationType.MEDIAN,
+    CalculationType.P90,
+    CalculationType.P95,
+    CalculationType.P99,
+}
+
+
+def min_inputs(calc_type) -> int:
+    """Fewest inputs a calculation of `calc_type` accepts."""
+    return 1 if calc_type in SINGLE_INPUT_TYPES else 2
+
+
+class InputRef(BaseModel):
+    """An input taking the result of another calculation of the same user."""
+    ref: UUID = Field(..., description="Id of the calculation whose result is used")
+
+
+Input = Union[float, InputRef]
+
+
+def check_expression(calc_type, expression: Optional[str], inputs: List[Input]) -> None:
+    """Expression must be present, valid and covered by the inputs (type "expression" only)."""
+    if calc_type != CalculationType.EXPRESSION:
+        if expression is not None:
+            raise ValueError("expression is only allowed for type 'expression'")
+        return
+    if not expression:
+        raise ValueError("expression is required for type 'expression'")
+    compiled = compile_expression(expression)
+    if compiled.arity > len(inputs):
+        raise ValueError(f"Expression uses x{compiled.arity - 1} but only {len(inputs)} inputs were given")
 
 
 class CalculationBase(BaseModel):
     """Base schema for calculation operations."""
     type: CalculationType = Field(..., description="Type of calculation")
-    inputs: List[float] = Field(..., min_length=2, description="List of numbers")
+    inputs: List[Input] = Field(
+        ...,
+        min_length=1,
+        description="List of numbers or {\"ref\": <calculation id>} references "
+        "(at least 2; 1 for mean, min, max, median and percentiles)",
+    )
+    expression: Optional[str] = Field(
+        default=None,
+        max_length=1000,
+        description="Formula over x0..xn (type 'expression' only), e.g. '(x0 + x1) * x2'",
+    )
 
     @field_validator("inputs", mode="before")
     @classmethod
@@ -27,6 +87,13 @@ class CalculationBase(BaseModel):
             raise ValueError("inputs must be a list of numbers")    # pragma: no cover
         return v
 
+    @model_validator(mode="after")
+    def check_input_count(self):
+        minimum = min_inputs(self.type)
+        if len(self.inputs) < minimum:
+            raise ValueError(f"'{self.type.value}' requires at least {minimum} inputs")
+        return self
+
     @model_validator(mode="after")
     def check_division_by_zero(self):
         """Prevent division by zero (for division type)."""
@@ -35,22 +102,26 @@ class CalculationBase(BaseModel):
                 raise ValueError("Division by zero is not allowed") # pragma: no cover
         return self
 
+    @model_validator(mode="after")
+    def check_expression(self):
+        check_expression(self.type, self.expression, self.inputs)
+        return self
+
     model_config = ConfigDict(from_attributes=True)
 
 
 class CalculationUpdate(BaseModel):
     """Schema used when updating an existing calculation."""
-    inputs: Optional[List[float]] = Field(
+    inputs: Optional[List[Input]] = Field(
         default=None,
-        min_length=2,
-        description="New list of inputs",
+        min_length=1,
+        description="New list of inputs (the minimum depends on the calculation's type)",
+    )
+    expression: Optional[str] = Field(
+        default=None,
+        max_length=1000,
+        description="New formula (expression calculations only)",
     )
-
-    @model_validator(mode="after")
-    def validate_inputs(self):
-        if self.inputs is not None and len(self.inputs) < 2:
-            raise ValueError("At least two numbers are required")
-        return self
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -64,3 +135,32 @@ class CalculationResponse(CalculationBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# ---------- Batch endpoints ----------
+
+MAX_BATCH_IDS = 1000
+
+
+class CalculationIds(BaseModel):
+    """Body of POST /calculations/lookup and POST /calculations/delete."""
+    ids: List[UUID] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class CalculationLookupItem(BaseModel):
+    id: UUID
+    status: Literal["found", "not_found"]
+    calculation: Optional[CalculationResponse] = None
+
+
+class CalculationLookupResponse(BaseModel):
+    results: List[CalculationLookupItem]
+
+
+class CalculationDeleteItem(BaseModel):
+    id: UUID
+    status: Literal["deleted", "not_found"]
+
+
+class CalculationDeleteResponse(BaseModel):
+    results: List[CalculationDeleteItem]
@@ -25,3 +25,13 @@ class TokenResponse(BaseModel):
             }
         }
     )
+
+
+class RefreshRequest(BaseModel):
+    """Body of POST /auth/refresh."""
+    refresh_token: str = Field(..., description="Refresh token from login or the last refresh")
+
+
+class LogoutRequest(BaseModel):
+    """Optional body of POST /auth/logout."""
+    refresh_token: str | None = Field(None, description="Also revoke this refresh token's family")
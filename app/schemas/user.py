@@ -83,3 +83,4 @@ class TokenResponseWithMessage(BaseModel):
     message: str
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
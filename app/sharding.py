@@ -0,0 +1,191 @@
+# app/sharding.py
+
+"""
+Hash-based sharding of per-user tables.
+
+`calculations` rows (and their `calculation_dependencies` edges) live
+on one of N shard databases, chosen by
+consistent hashing of `user_id` (virtual nodes on a hash ring), so adding
+a shard moves only ~1/N of the users. `users` stays on the primary.
+
+Shards are named by position ("shard-0", "shard-1", ...): append new
+URLs to the end of CALCULATION_SHARD_URLS so existing names stay put.
+
+`RoutingSession` consults the shard map for sharded tables using
+`session.info["user_id"]`, which the auth dependency sets, so routes
+need no changes.
+
+Rebalance after changing the shard list:
+    python -m app.sharding rebalance --from "<old urls>" --to "<new urls>"
+"""
+
+import argparse
+import bisect
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, Index, MetaData, Table, UniqueConstraint, delete, select
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SHARDED_TABLES = {"calculations", "calculation_dependencies"}
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class ShardMap:
+    """Consistent-hash ring from user ids to shard engines."""
+
+    def __init__(self, urls: List[str], vnodes: int = 64, engines: Optional[List[Engine]] = None):
+        if not urls:
+            raise ValueError("ShardMap needs at least one shard URL")
+
+        if engines is None:
+            from app.database import get_engine
+            engines = [get_engine(url) for url in urls]
+
+        self.urls = urls
+        self.engines = engines
+        ring = sorted(
+            (_hash(f"shard-{index}#{vnode}"), index)
+            for index in range(len(urls))
+            for vnode in range(vnodes)
+        )
+        self._points = [point for point, _ in ring]
+        self._owners = [index for _, index in ring]
+
+    def owns(self, table) -> bool:
+        return table is not None and table.name in SHARDED_TABLES
+
+    def shard_for(self, user_id) -> int:
+        position = bisect.bisect(self._points, _hash(str(user_id))) % len(self._points)
+        return self._owners[position]
+
+    def engine_for(self, user_id) -> Engine:
+        return self.engines[self.shard_for(user_id)]
+
+
+def get_shard_map(urls: List[str], vnodes: int = 64) -> Optional[ShardMap]:
+    return ShardMap(urls, vnodes=vnodes) if urls else None
+
+
+# ------------------------------------------------------------------------------
+# Schema on shards
+# ------------------------------------------------------------------------------
+def shard_tables() -> List[Table]:
+    """Copies of the sharded tables without cross-database foreign keys."""
+    from app.database import Base
+    from app.models import user, calculation  # noqa: F401 (register tables)
+
+    metadata = MetaData()
+    tables = []
+    for name in sorted(SHARDED_TABLES):
+        source = Base.metadata.tables[name]
+        table = Table(
+            name,
+            metadata,
+            *[
+                Column(
+                    col.name,
+                    col.type,
+                    primary_key=col.primary_key,
+                    nullable=col.nullable,
+                    index=col.index,
+                )
+                for col in source.columns
+            ],
+        )
+        for index in source.indexes:
+            # Single-column indexes come with `index=True` above
+            if index.name and not (len(index.columns) == 1 and next(iter(index.columns)).index):
+                Index(index.name, *[table.c[col.name] for col in index.columns], unique=index.unique)
+        for constraint in source.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                table.append_constraint(UniqueConstraint(*[col.name for col in constraint.columns]))
+        tables.append(table)
+    return tables
+
+
+def create_shard_tables(shard_map: ShardMap) -> None:
+    tables = shard_tables()
+    for engine in shard_map.engines:
+        tables[0].metadata.create_all(bind=engine, tables=tables)
+
+
+# ------------------------------------------------------------------------------
+# Rebalancing
+# ------------------------------------------------------------------------------
+def rebalance(old_map: ShardMap, new_map: ShardMap, batch_size: int = 1000) -> Dict[str, int]:
+    """Move every user whose shard changed between two maps.
+
+    Rows are copied in batches (target first, then deleted from the
+    source), so an interrupted run can simply be restarted.
+    Returns {"users": moved users, "rows": moved rows}.
+    """
+    moved_users = moved_rows = 0
+    new_index = {url: i for i, url in enumerate(new_map.urls)}
+    tables = shard_tables()
+    calculations = next(table for table in tables if table.name == "calculations")
+
+    for source_index, source_url in enumerate(old_map.urls):
+        source = old_map.engines[source_index]
+        with source.connect() as conn:
+            user_ids = conn.execute(select(calculations.c.user_id).distinct()).scalars().all()
+
+        for user_id in user_ids:
+            target_index = new_map.shard_for(user_id)
+            if new_index.get(source_url) == target_index:
+                continue
+            target = new_map.engines[target_index]
+            moved_users += 1
+
+            for table in tables:
+                while True:
+                    with source.connect() as conn:
+                        rows = conn.execute(
+                            select(table)
+                            .where(table.c.user_id == user_id)
+                            .order_by(table.c.id)
+                            .limit(batch_size)
+                        ).mappings().all()
+                    if not rows:
+                        break
+
+                    ids = [row["id"] for row in rows]
+                    with target.begin() as conn:
+                        conn.execute(delete(table).where(table.c.id.in_(ids)))
+                        conn.execute(table.insert(), [dict(row) for row in rows])
+                    with source.begin() as conn:
+                        conn.execute(delete(table).where(table.c.id.in_(ids)))
+                    if table is calculations:
+                        moved_rows += len(rows)
+
+            logger.info("Moved user %s: shard-%s -> shard-%s", user_id, source_index, target_index)
+
+    return {"users": moved_users, "rows": moved_rows}
+
+
+def _split(urls: str) -> List[str]:
+    return [u.strip() for u in urls.split(",") if u.strip()]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Calculation shard tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    reb = sub.add_parser("rebalance", help="move users after changing the shard list")
+    reb.add_argument("--from", dest="old", required=True, help="old comma-separated shard URLs")
+    reb.add_argument("--to", dest="new", required=True, help="new comma-separated shard URLs")
+    reb.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    old_map = ShardMap(_split(args.old), vnodes=settings.SHARD_VNODES)
+    new_map = ShardMap(_split(args.new), vnodes=settings.SHARD_VNODES)
+    create_shard_tables(new_map)
+    print(rebalance(old_map, new_map, batch_size=args.batch_size))
@@ -0,0 +1,87 @@
+# benchmarks/bench_expression.py
+
+"""
+Expression calculations vs chaining the fixed operations.
+
+- api      : ((x0 + x1) * x2) / x3 as one `expression` POST vs three
+             chained POSTs (addition -> multiplication -> division),
+             through the full app on an in-memory SQLite database
+- compile  : parsing every time vs the LRU-cached compiled expression
+- vector   : evaluate_many over N rows vs evaluate() per row
+
+Run:
+    python -m benchmarks.bench_expression [requests] [rows]
+"""
+
+import os
+import sys
+import time
+import timeit
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.expressions import CompiledExpression, compile_expression  # noqa: E402
+from app.main import app  # noqa: E402
+
+FORMULA = "((x0 + x1) * x2) / x3"
+INPUTS = [1.5, 2.5, 4.0, 8.0]
+
+
+def login(client: TestClient) -> dict:
+    user = {
+        "first_name": "Bench", "last_name": "Mark", "email": "bench@example.com",
+        "username": "bench", "password": "BenchPass123!", "confirm_password": "BenchPass123!",
+    }
+    client.post("/auth/register", json=user)
+    token = client.post("/auth/login", json={"username": "bench", "password": user["password"]}).json()
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+def one_expression(client, headers) -> float:
+    body = {"type": "expression", "expression": FORMULA, "inputs": INPUTS}
+    return client.post("/calculations", json=body, headers=headers).json()["result"]
+
+
+def chained(client, headers) -> float:
+    a, b, c, d = INPUTS
+    r = client.post("/calculations", json={"type": "addition", "inputs": [a, b]}, headers=headers).json()["result"]
+    r = client.post("/calculations", json={"type": "multiplication", "inputs": [r, c]}, headers=headers).json()["result"]
+    return client.post("/calculations", json={"type": "division", "inputs": [r, d]}, headers=headers).json()["result"]
+
+
+def best(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    with TestClient(app) as client:
+        headers = login(client)
+        assert one_expression(client, headers) == chained(client, headers)
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            one_expression(client, headers)
+        single_s = (time.perf_counter() - start) / requests
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            chained(client, headers)
+        chain_s = (time.perf_counter() - start) / requests
+
+    print(f"api      expression {single_s * 1000:7.2f} ms   chain of 3 {chain_s * 1000:7.2f} ms")
+
+    parse_s = best(lambda: CompiledExpression(FORMULA).evaluate(INPUTS), 2000)
+    cached_s = best(lambda: compile_expression(FORMULA).evaluate(INPUTS), 2000)
+    print(f"compile  uncached {parse_s * 1e6:7.2f} us   cached {cached_s * 1e6:7.2f} us")
+
+    data = [[float(i), 1.0, 2.0, 3.0] for i in range(rows)]
+    compiled = compile_expression(FORMULA)
+    many_s = best(lambda: compiled.evaluate_many(data), 1)
+    loop_s = best(lambda: [compiled.evaluate(r) for r in data], 1)
+    print(f"vector   {rows} rows   evaluate_many {many_s * 1000:7.1f} ms   per row {loop_s * 1000:7.1f} ms")
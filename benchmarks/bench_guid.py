@@ -0,0 +1,113 @@
+# benchmarks/bench_guid.py
+
+"""
+Compare GUID storage modes on a 100k-row list query (SQLite, in memory).
+
+- legacy : previous GUID (CHAR(36), str(uuid.UUID(str(v))) on bind,
+           uuid.UUID(str(v)) on every result)
+- char   : current GUID, text storage
+- binary : current GUID, 16-byte storage
+
+Run:
+    python -m benchmarks.bench_guid [rows]
+"""
+
+import gc
+import sys
+import time
+import timeit
+import uuid
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, select, types
+
+from app.core.ids import uuid7
+from app.models.calculation import GUID
+
+
+class LegacyGUID(types.TypeDecorator):
+    impl = types.CHAR(36)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return str(uuid.UUID(str(value)))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return uuid.UUID(str(value))
+
+
+def per_value(label: str, guid_type, rows: int) -> None:
+    """Time only the type's bind + result processing, no database."""
+    dialect = create_engine("sqlite://").dialect
+    impl = guid_type.dialect_impl(dialect)
+    bind = impl.bind_processor(dialect)
+    result = impl.result_processor(dialect, None)
+    values = [uuid7() for _ in range(rows)]
+
+    stored = [bind(v) for v in values]
+    loaded = [result(v) for v in stored]
+    # Best of 5 keeps scheduler noise out of the per-value numbers
+    bind_s = min(timeit.repeat(lambda: [bind(v) for v in values], number=1, repeat=5))
+    result_s = min(timeit.repeat(lambda: [result(v) for v in stored], number=1, repeat=5))
+
+    assert loaded == values
+    print(
+        f"{label:<7} bind {bind_s * 1e6 / rows:6.2f} us/value   "
+        f"result {result_s * 1e6 / rows:6.2f} us/value"
+    )
+
+
+def run(label: str, guid_type, rows: int) -> None:
+    engine = create_engine("sqlite://")
+    table = Table(
+        "bench",
+        MetaData(),
+        Column("id", guid_type, primary_key=True),
+        Column("user_id", guid_type, index=True),
+        Column("n", Integer),
+    )
+    table.metadata.create_all(engine)
+
+    user_id = uuid7()
+    data = [{"id": uuid7(), "user_id": user_id, "n": i} for i in range(rows)]
+
+    gc.collect()
+    with engine.begin() as conn:
+        start = time.perf_counter()
+        conn.execute(table.insert(), data)
+        insert_s = time.perf_counter() - start
+
+    gc.collect()
+    with engine.connect() as conn:
+        start = time.perf_counter()
+        fetched = conn.execute(select(table).where(table.c.user_id == user_id)).all()
+        list_s = time.perf_counter() - start
+        db_bytes = conn.exec_driver_sql(
+            "SELECT page_count * page_size FROM pragma_page_count(), pragma_page_size()"
+        ).scalar()
+
+    assert len(fetched) == rows
+    print(
+        f"{label:<7} insert {insert_s * 1e6 / rows:6.2f} us/row   "
+        f"list {list_s * 1e6 / rows:6.2f} us/row   "
+        f"db size {db_bytes / 1024 / 1024:6.2f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{rows} rows")
+    types_ = [
+        ("legacy", LegacyGUID()),
+        ("char", GUID(binary=False)),
+        ("binary", GUID(binary=True)),
+    ]
+    for label, guid_type in types_:
+        per_value(label, guid_type, rows)
+    for label, guid_type in types_:
+        run(label, guid_type, rows)
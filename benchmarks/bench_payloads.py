@@ -0,0 +1,65 @@
+# benchmarks/bench_payloads.py
+
+"""
+CPU time to decode a large calculation payload, per request format.
+
+- json        : json.loads + CalculationBase.model_validate (the default
+                FastAPI body path before the codecs)
+- json-bytes  : CalculationBase.model_validate_json (current JSON path)
+- msgpack     : msgpack map with a plain float array
+- msgpack-bin : msgpack map with inputs as a float64 blob
+- octet       : raw float64 body
+
+Run:
+    python -m benchmarks.bench_payloads [n_inputs]
+"""
+
+import json
+import random
+import sys
+import time
+
+import msgpack
+
+from app.api.codecs import _check_inputs, floats_from_buffer, floats_to_buffer
+from app.schemas.calculation import CalculationBase, CalculationType
+
+
+def cpu(fn, repeat: int = 5) -> float:
+    """Best-of-N process time, so other processes don't skew the numbers."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def decode_binary(inputs) -> CalculationBase:
+    values = floats_from_buffer(inputs)
+    _check_inputs(CalculationType.ADDITION, values)
+    return CalculationBase.model_construct(type=CalculationType.ADDITION, inputs=values)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    inputs = [random.uniform(-1e6, 1e6) for _ in range(n)]
+
+    json_body = json.dumps({"type": "addition", "inputs": inputs}).encode()
+    msgpack_body = msgpack.packb({"type": "addition", "inputs": inputs})
+    blob = floats_to_buffer(inputs)
+    msgpack_bin_body = msgpack.packb({"type": "addition", "inputs": blob}, use_bin_type=True)
+
+    cases = [
+        ("json", json_body, lambda: CalculationBase.model_validate(json.loads(json_body))),
+        ("json-bytes", json_body, lambda: CalculationBase.model_validate_json(json_body)),
+        ("msgpack", msgpack_body, lambda: CalculationBase.model_validate(msgpack.unpackb(msgpack_body))),
+        ("msgpack-bin", msgpack_bin_body, lambda: decode_binary(msgpack.unpackb(msgpack_bin_body)["inputs"])),
+        ("octet", blob, lambda: decode_binary(blob)),
+    ]
+
+    print(f"{n} inputs")
+    for label, body, decode in cases:
+        assert decode().inputs == inputs
+        seconds = cpu(decode)
+        print(f"{label:<12} body {len(body) / 1024 / 1024:7.2f} MiB   cpu {seconds * 1000:8.1f} ms")
@@ -3,19 +3,15 @@
 import os
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_engines, get_sessionmaker
 
-# Use a local SQLite DB just for tests
+# Use a local SQLite DB just for tests (same SQLite profile as production)
 TEST_DATABASE_URL = "sqlite:///./test.db"
 
-engine_test = create_engine(
-    TEST_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine_test)
+engine_test, read_engine_test = get_engines(TEST_DATABASE_URL)
+TestingSessionLocal = get_sessionmaker(engine_test, read_engine_test)
 
 
 # ---------- DB OVERRIDE ----------
@@ -0,0 +1,58 @@
+# tests/integration/test_admission.py
+
+import pytest
+
+from app.api.admission import READ
+from app.main import admission
+
+
+@pytest.fixture()
+def pressure(monkeypatch):
+    def set_pressure(value):
+        monkeypatch.setattr(admission, "pressure", lambda: value)
+
+    return set_pressure
+
+
+def test_auth_is_shed_before_reads(client, auth_headers, pressure):
+    pressure(1.1)
+    resp = client.post("/auth/login", json={"username": "x", "password": "whatever123"})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
+    assert client.get("/calculations", headers=auth_headers).status_code == 200
+    assert client.post(
+        "/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=auth_headers
+    ).status_code == 201
+
+
+def test_writes_are_shed_before_reads(client, auth_headers, pressure):
+    pressure(1.3)
+    assert client.post(
+        "/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=auth_headers
+    ).status_code == 503
+    assert client.get("/calculations", headers=auth_headers).status_code == 200
+
+    pressure(1.6)
+    assert client.get("/calculations", headers=auth_headers).status_code == 503
+    assert client.get("/health").status_code == 200
+
+
+def test_per_class_concurrency_limit(client, auth_headers, monkeypatch):
+    monkeypatch.setitem(admission.limits, READ, 0)
+    before = admission.shed[READ]
+    assert client.get("/calculations", headers=auth_headers).status_code == 503
+    assert admission.shed[READ] == before + 1
+
+
+def test_readiness_reports_signals(client, pressure):
+    resp = client.get("/health/ready")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] == "ready"
+    assert {"event_loop_lag_ms", "threadpool", "db_pools", "db_latency_ms"} <= body.keys()
+
+    # Shedding auth and writes only: still serving reads, still ready
+    pressure(1.25)
+    assert client.get("/health/ready").status_code == 200
+    pressure(1.5)
+    assert client.get("/health/ready").status_code == 503
@@ -0,0 +1,53 @@
+# tests/integration/test_batch_calculations.py
+
+from app.models.calculation import Calculation
+from sqlalchemy.orm import Query
+
+MISSING = "00000000-0000-7000-8000-000000000000"
+
+
+def _create(client, auth_headers, inputs):
+    resp = client.post("/calculations", json={"type": "addition", "inputs": inputs}, headers=auth_headers)
+    return resp.json()["id"]
+
+
+def test_lookup_reports_each_id(client, auth_headers, monkeypatch):
+    ids = [_create(client, auth_headers, [i, 1]) for i in range(3)]
+
+    queries = []
+    real_iter = Query.__iter__
+
+    def counting_iter(query):
+        if query.column_descriptions[0]["entity"] is Calculation:
+            queries.append(query)
+        return real_iter(query)
+
+    monkeypatch.setattr(Query, "__iter__", counting_iter)
+    resp = client.post("/calculations/lookup", json={"ids": [ids[2], MISSING, ids[0]]}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert len(queries) == 1
+
+    results = resp.json()["results"]
+    assert [r["status"] for r in results] == ["found", "not_found", "found"]
+    assert results[0]["calculation"]["result"] == 3.0
+    assert results[1]["calculation"] is None
+
+
+def test_batch_delete_reports_each_id(client, auth_headers):
+    ids = [_create(client, auth_headers, [i, 1]) for i in range(2)]
+    client.get(f"/calculations/{ids[0]}", headers=auth_headers)  # cached copy must go too
+
+    resp = client.post("/calculations/delete", json={"ids": [ids[0], MISSING, ids[1]]}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert [r["status"] for r in resp.json()["results"]] == ["deleted", "not_found", "deleted"]
+    assert client.get(f"/calculations/{ids[0]}", headers=auth_headers).status_code == 404
+
+    resp = client.post("/calculations/delete", json={"ids": [ids[0]]}, headers=auth_headers)
+    assert resp.json()["results"] == [{"id": ids[0], "status": "not_found"}]
+
+
+def test_batch_size_is_limited(client, auth_headers):
+    assert client.post("/calculations/lookup", json={"ids": []}, headers=auth_headers).status_code == 422
+    assert client.post(
+        "/calculations/delete", json={"ids": [MISSING] * 1001}, headers=auth_headers
+    ).status_code == 422
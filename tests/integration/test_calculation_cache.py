@@ -0,0 +1,100 @@
+# tests/integration/test_calculation_cache.py
+
+from app.api.cache import CalculationCache
+from app.core.pubsub import MemoryPubSub
+from app.models.calculation import Calculation
+from sqlalchemy.orm import Query
+
+
+def _create(client, auth_headers, inputs=(2, 3)):
+    resp = client.post("/calculations", json={"type": "addition", "inputs": list(inputs)}, headers=auth_headers)
+    return resp.json()["id"]
+
+
+def test_hot_reads_skip_the_database(client, auth_headers, monkeypatch):
+    calc_id = _create(client, auth_headers)
+    first = client.get(f"/calculations/{calc_id}", headers=auth_headers)
+    assert first.status_code == 200
+
+    real_first = Query.first
+
+    def guarded_first(query):
+        if query.column_descriptions[0]["entity"] is Calculation:
+            raise AssertionError("cached read hit the database")
+        return real_first(query)
+
+    monkeypatch.setattr(Query, "first", guarded_first)
+    second = client.get(f"/calculations/{calc_id}", headers=auth_headers)
+    assert second.status_code == 200
+    assert second.json() == first.json()
+
+    # Other media types are rendered from the cached entry too
+    assert client.get(
+        f"/calculations/{calc_id}", headers={**auth_headers, "Accept": "application/x-msgpack"}
+    ).status_code == 200
+
+
+def test_update_and_delete_invalidate(client, auth_headers):
+    calc_id = _create(client, auth_headers)
+    client.get(f"/calculations/{calc_id}", headers=auth_headers)
+
+    client.put(f"/calculations/{calc_id}", json={"inputs": [10, 20]}, headers=auth_headers)
+    assert client.get(f"/calculations/{calc_id}", headers=auth_headers).json()["result"] == 30.0
+
+    client.delete(f"/calculations/{calc_id}", headers=auth_headers)
+    assert client.get(f"/calculations/{calc_id}", headers=auth_headers).status_code == 404
+
+
+def test_invalidation_reaches_other_workers():
+    bus = MemoryPubSub()
+    worker_a = CalculationCache(pubsub=bus)
+    worker_b = CalculationCache(pubsub=bus)
+    worker_a.set("u", "c", b"{}", worker_a.version("u", "c"))
+    worker_b.set("u", "c", b"{}", worker_b.version("u", "c"))
+
+    worker_a.invalidate("u", "c")
+    assert worker_b.get("u", "c") is None
+
+
+def test_cache_is_bounded():
+    cache = CalculationCache(max_entries=2, pubsub=MemoryPubSub())
+    for i in range(3):
+        cache.set("u", i, b"x", cache.version("u", i))
+    assert cache.get("u", 0) is None
+    assert cache.get("u", 2) == b"x"
+
+
+def test_fill_started_before_an_invalidation_is_refused():
+    bus = MemoryPubSub()
+    reader, writer = CalculationCache(pubsub=bus), CalculationCache(pubsub=bus)
+    version = reader.version("u", "c")  # GET reads the old row...
+    writer.invalidate("u", "c")  # ...while an update commits on another worker
+    assert reader.set("u", "c", b"old", version) is False
+    assert reader.get("u", "c") is None
+    assert reader.set("u", "c", b"new", reader.version("u", "c")) is True
+
+
+def test_misses_are_filled_from_the_primary(client, auth_headers, monkeypatch):
+    calc_id = _create(client, auth_headers)
+    options = []
+    real_first = Query.first
+
+    def recording_first(query):
+        if query.column_descriptions[0]["entity"] is Calculation:
+            options.append(query.get_execution_options().get("use_replica"))
+        return real_first(query)
+
+    monkeypatch.setattr(Query, "first", recording_first)
+    client.put(f"/calculations/{calc_id}", json={"inputs": [4, 4]}, headers=auth_headers)
+    options.clear()
+    assert client.get(f"/calculations/{calc_id}", headers=auth_headers).json()["result"] == 8.0
+    assert options == [False]
+
+
+def test_cache_defaults_off_for_several_in_process_workers():
+    from app.core.config import Settings
+
+    assert Settings(WEB_CONCURRENCY=1, PUBSUB_BACKEND="memory").calc_cache_enabled
+    assert not Settings(WEB_CONCURRENCY=4, PUBSUB_BACKEND="memory").calc_cache_enabled
+    assert Settings(WEB_CONCURRENCY=4, PUBSUB_BACKEND="redis").calc_cache_enabled
+    assert not Settings(CALC_CACHE_ENABLED="false").calc_cache_enabled
@@ -95,3 +95,29 @@ def test_get_update_delete_calculation_full_flow(client, auth_headers):
     # After deletion, GET by id must return 404
     resp_get_again = client.get(f"/calculations/{calc_id}", headers=auth_headers)
     assert resp_get_again.status_code == 404
+
+
+def test_create_statistics_calculation(client, auth_headers):
+    resp = client.post(
+        "/calculations",
+        json={"type": "stddev", "inputs": [2, 4, 4, 4, 5, 5, 7, 9]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 201
+    assert round(resp.json()["result"], 6) == 2.13809
+
+
+def test_single_value_statistics_are_accepted(client, auth_headers):
+    for calc_type in ("mean", "min", "max", "median", "p99"):
+        resp = client.post("/calculations", json={"type": calc_type, "inputs": [7]}, headers=auth_headers)
+        assert resp.status_code == 201, calc_type
+        assert resp.json()["result"] == 7.0
+
+    # Types that need two values still reject one, on create and on update
+    for calc_type in ("addition", "variance"):
+        resp = client.post("/calculations", json={"type": calc_type, "inputs": [7]}, headers=auth_headers)
+        assert resp.status_code == 422, calc_type
+    calc_id = client.post(
+        "/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=auth_headers
+    ).json()["id"]
+    assert client.put(f"/calculations/{calc_id}", json={"inputs": [1]}, headers=auth_headers).status_code == 422
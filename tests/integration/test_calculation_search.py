@@ -0,0 +1,58 @@
+# tests/integration/test_calculation_search.py
+
+import pytest
+
+from tests.conftest import engine_test  # type: ignore
+
+
+def _create(client, auth_headers, calc_type, inputs):
+    resp = client.post("/calculations", json={"type": calc_type, "inputs": inputs}, headers=auth_headers)
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def _search(client, auth_headers, **params):
+    resp = client.get("/calculations", params=params, headers=auth_headers)
+    assert resp.status_code == 200
+    return {calc["id"] for calc in resp.json()}
+
+
+def test_filters_on_result_type_and_input_count(client, auth_headers):
+    small = _create(client, auth_headers, "addition", [1000.5, 1])
+    large = _create(client, auth_headers, "addition", [1000.5, 2, 3, 4])
+    product = _create(client, auth_headers, "multiplication", [1000.5, 1])
+
+    found = _search(client, auth_headers, min_result=1001.5, max_result=1001.5)
+    assert small in found and product not in found and large not in found
+    assert product in _search(client, auth_headers, min_result=1000.5, max_result=1000.5, type="multiplication")
+    assert _search(client, auth_headers, min_inputs=4, min_result=1009.5, max_result=1009.5) == {large}
+    assert large not in _search(client, auth_headers, max_inputs=3)
+
+
+def test_input_count_follows_updates(client, auth_headers):
+    calc_id = _create(client, auth_headers, "addition", [7777, 1])
+    client.put(f"/calculations/{calc_id}", json={"inputs": [7777, 1, 1]}, headers=auth_headers)
+    assert calc_id in _search(client, auth_headers, min_inputs=3, min_result=7779, max_result=7779)
+
+
+@pytest.mark.parametrize(
+    "where, index",
+    [
+        ("result BETWEEN 1 AND 2", "ix_calculations_user_id_result"),
+        ("input_count > 10", "ix_calculations_user_id_input_count"),
+    ],
+)
+def test_searches_are_index_range_scans(where, index):
+    sql = f"SELECT * FROM calculations WHERE user_id = 'u' AND {where}"
+    with engine_test.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+    assert f"SEARCH calculations USING INDEX {index}" in plan
+
+
+def test_rows_without_input_count_still_match(client, auth_headers):
+    calc_id = _create(client, auth_headers, "addition", [4242, 1, 1])
+    with engine_test.begin() as conn:  # written before the column existed
+        updated = conn.exec_driver_sql("UPDATE calculations SET input_count = NULL WHERE id = ?", (calc_id,))
+    assert updated.rowcount == 1
+    assert calc_id in _search(client, auth_headers, min_inputs=3, max_inputs=3, min_result=4244, max_result=4244)
+    assert calc_id not in _search(client, auth_headers, min_inputs=4, min_result=4244, max_result=4244)
@@ -0,0 +1,72 @@
+# tests/integration/test_codecs.py
+
+import msgpack
+
+from app.api.codecs import MSGPACK, OCTET, floats_from_buffer, floats_to_buffer
+
+
+def test_octet_stream_create(client, auth_headers):
+    resp = client.post(
+        "/calculations?type=addition",
+        content=floats_to_buffer([1.5, 2.5, 3.0]),
+        headers={**auth_headers, "Content-Type": OCTET},
+    )
+    assert resp.status_code == 201
+    assert resp.json()["result"] == 7.0
+    assert resp.json()["inputs"] == [1.5, 2.5, 3.0]
+
+
+def test_msgpack_create_and_msgpack_response(client, auth_headers):
+    body = msgpack.packb({"type": "multiplication", "inputs": floats_to_buffer([2, 3, 4])})
+    resp = client.post(
+        "/calculations",
+        content=body,
+        headers={**auth_headers, "Content-Type": MSGPACK, "Accept": MSGPACK},
+    )
+    assert resp.status_code == 201
+    assert resp.headers["content-type"] == MSGPACK
+    data = msgpack.unpackb(resp.content)
+    assert data["result"] == 24.0
+    assert floats_from_buffer(data["inputs"]) == [2.0, 3.0, 4.0]
+
+
+def test_msgpack_array_inputs_use_pydantic_validation(client, auth_headers):
+    body = msgpack.packb({"type": "addition", "inputs": [1]})
+    resp = client.post("/calculations", content=body, headers={**auth_headers, "Content-Type": MSGPACK})
+    assert resp.status_code == 422
+
+
+def test_binary_division_by_zero_rejected(client, auth_headers):
+    resp = client.post(
+        "/calculations",
+        content=floats_to_buffer([1.0, 0.0]),
+        headers={**auth_headers, "Content-Type": OCTET, "X-Calculation-Type": "division"},
+    )
+    assert resp.status_code == 422
+    assert "Division by zero" in resp.text
+
+
+def test_octet_response_headers(client, auth_headers):
+    calc_id = client.post(
+        "/calculations", json={"type": "subtraction", "inputs": [10, 4]}, headers=auth_headers
+    ).json()["id"]
+
+    resp = client.get(f"/calculations/{calc_id}", headers={**auth_headers, "Accept": OCTET})
+    assert resp.status_code == 200
+    assert resp.headers["x-calculation-id"] == calc_id
+    assert resp.headers["x-calculation-type"] == "subtraction"
+    assert float(resp.headers["x-calculation-result"]) == 6.0
+    assert floats_from_buffer(resp.content) == [10.0, 4.0]
+
+
+def test_octet_update(client, auth_headers):
+    calc_id = client.post(
+        "/calculations", json={"type": "addition", "inputs": [1, 1]}, headers=auth_headers
+    ).json()["id"]
+    resp = client.put(
+        f"/calculations/{calc_id}",
+        content=floats_to_buffer([5, 6]),
+        headers={**auth_headers, "Content-Type": OCTET},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["result"] == 11.0
@@ -0,0 +1,69 @@
+# tests/integration/test_derived_calculations.py
+
+from app.models.calculation import CalculationDependency
+from tests.conftest import TestingSessionLocal
+
+
+def _create(client, auth_headers, calc_type, inputs, **extra):
+    resp = client.post(
+        "/calculations", json={"type": calc_type, "inputs": inputs, **extra}, headers=auth_headers
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()
+
+
+def _result(client, auth_headers, calc_id):
+    return client.get(f"/calculations/{calc_id}", headers=auth_headers).json()["result"]
+
+
+def test_reference_is_resolved_and_updates_propagate(client, auth_headers):
+    a = _create(client, auth_headers, "addition", [1, 2])
+    b = _create(client, auth_headers, "multiplication", [{"ref": a["id"]}, 10])
+    c = _create(client, auth_headers, "addition", [{"ref": a["id"]}, {"ref": b["id"]}])
+    assert b["inputs"] == [3.0, 10.0] and b["result"] == 30.0
+    assert c["result"] == 33.0
+
+    # Warm the cache, then change the root of the DAG
+    assert _result(client, auth_headers, c["id"]) == 33.0
+    resp = client.put(f"/calculations/{a['id']}", json={"inputs": [5, 5]}, headers=auth_headers)
+    assert resp.status_code == 200
+
+    assert _result(client, auth_headers, b["id"]) == 100.0
+    assert _result(client, auth_headers, c["id"]) == 110.0
+
+
+def test_cycles_and_missing_references_are_rejected(client, auth_headers):
+    a = _create(client, auth_headers, "addition", [1, 2])
+    b = _create(client, auth_headers, "addition", [{"ref": a["id"]}, 1])
+
+    resp = client.put(f"/calculations/{a['id']}", json={"inputs": [{"ref": b["id"]}, 1]}, headers=auth_headers)
+    assert resp.status_code == 400
+    assert "cycle" in resp.json()["detail"]
+    resp = client.put(f"/calculations/{a['id']}", json={"inputs": [{"ref": a["id"]}, 1]}, headers=auth_headers)
+    assert resp.status_code == 400
+
+    missing = "00000000-0000-7000-8000-000000000000"
+    resp = client.post("/calculations", json={"type": "addition", "inputs": [{"ref": missing}, 1]}, headers=auth_headers)
+    assert resp.status_code == 400
+
+
+def test_downstream_errors_roll_back_the_update(client, auth_headers):
+    a = _create(client, auth_headers, "addition", [1, 2])
+    b = _create(client, auth_headers, "division", [10, {"ref": a["id"]}])
+
+    resp = client.put(f"/calculations/{a['id']}", json={"inputs": [1, -1]}, headers=auth_headers)
+    assert resp.status_code == 400
+    assert _result(client, auth_headers, a["id"]) == 3.0
+    assert _result(client, auth_headers, b["id"]) == 10 / 3
+
+
+def test_delete_removes_edges(client, auth_headers):
+    a = _create(client, auth_headers, "addition", [1, 2])
+    b = _create(client, auth_headers, "addition", [{"ref": a["id"]}, 1])
+    assert client.delete(f"/calculations/{a['id']}", headers=auth_headers).status_code == 204
+
+    with TestingSessionLocal() as db:
+        assert db.query(CalculationDependency).filter(
+            CalculationDependency.depends_on_id == a["id"]
+        ).count() == 0
+    assert _result(client, auth_headers, b["id"]) == 4.0
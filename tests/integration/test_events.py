@@ -0,0 +1,46 @@
+# tests/integration/test_events.py
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.api.events import CHANNEL, event_broadcaster
+from app.api.routes.calculations import calculation_events
+
+
+def test_writes_publish_change_events(client, auth_headers):
+    messages = []
+    unsubscribe = event_broadcaster.pubsub.subscribe(CHANNEL, messages.append)
+    try:
+        calc_id = client.post(
+            "/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=auth_headers
+        ).json()["id"]
+        client.put(f"/calculations/{calc_id}", json={"inputs": [2, 2]}, headers=auth_headers)
+        client.delete(f"/calculations/{calc_id}", headers=auth_headers)
+    finally:
+        unsubscribe()
+
+    events = [message.split(" ", 2)[1:] for message in messages]
+    assert [event for event, _ in events] == ["created", "updated", "deleted"]
+    assert json.loads(events[1][1])["result"] == 4.0
+    assert json.loads(events[2][1]) == {"id": calc_id}
+
+
+def test_event_stream_requires_auth(client):
+    assert client.get("/calculations/events").status_code == 401
+
+
+def test_event_stream_sends_the_users_events():
+    async def scenario():
+        user = SimpleNamespace(id="stream-user")
+        response = await calculation_events(user=user, db=SimpleNamespace(close=lambda: None))
+        assert response.media_type == "text/event-stream"
+
+        body = response.body_iterator
+        assert (await body.__anext__()).startswith("retry:")
+        event_broadcaster.calculation_deleted("stream-user", "abc")
+        assert await body.__anext__() == 'event: deleted\ndata: {"id": "abc"}\n\n'
+        await body.aclose()
+        assert event_broadcaster.metrics()["streams"] == 0
+
+    asyncio.run(scenario())
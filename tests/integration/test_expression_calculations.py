@@ -0,0 +1,51 @@
+# tests/integration/test_expression_calculations.py
+
+import json
+
+from tests.integration.test_import import _wait  # type: ignore
+
+
+def test_create_and_update_expression(client, auth_headers):
+    resp = client.post(
+        "/calculations",
+        json={"type": "expression", "expression": "((x0 + x1) * x2) / x3", "inputs": [1.5, 2.5, 4, 8]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 201
+    data = resp.json()
+    assert data["result"] == 2.0
+    assert data["expression"] == "((x0 + x1) * x2) / x3"
+
+    resp = client.put(f"/calculations/{data['id']}", json={"expression": "x0 * x3"}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json()["result"] == 12.0
+
+
+def test_invalid_expressions_are_rejected(client, auth_headers):
+    for body in (
+        {"type": "expression", "inputs": [1, 2]},
+        {"type": "expression", "expression": "x0 + x5", "inputs": [1, 2]},
+        {"type": "expression", "expression": "open('x')", "inputs": [1, 2]},
+        {"type": "addition", "expression": "x0", "inputs": [1, 2]},
+    ):
+        assert client.post("/calculations", json=body, headers=auth_headers).status_code == 422
+
+    resp = client.post(
+        "/calculations",
+        json={"type": "expression", "expression": "x0 / x1", "inputs": [1, 0]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 400
+
+
+def test_import_evaluates_expressions_in_groups(client, auth_headers):
+    lines = [json.dumps({"type": "expression", "expression": "x0 * x1", "inputs": [i, 2]}) for i in range(5)]
+    lines.append(json.dumps({"type": "expression", "expression": "x0 / x1", "inputs": [1, 0]}))
+    resp = client.post(
+        "/calculations/import",
+        content="\n".join(lines),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+    job = _wait(client, auth_headers, resp.json()["id"])
+    assert job["rows_imported"] == 5
+    assert job["errors"] == [{"line": 6, "error": "Cannot divide by zero."}]
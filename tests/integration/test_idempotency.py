@@ -0,0 +1,107 @@
+# tests/integration/test_idempotency.py
+
+import asyncio
+import struct
+import uuid
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.idempotency import IdempotencyMiddleware, MemoryIdempotencyStore
+
+
+def test_retried_create_is_replayed(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+    payload = {"type": "addition", "inputs": [1, 2]}
+
+    first = client.post("/calculations", json=payload, headers=headers)
+    retry = client.post("/calculations", json=payload, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers["idempotent-replayed"] == "true"
+    ids = [c["id"] for c in client.get("/calculations", headers=auth_headers).json()]
+    assert ids.count(first.json()["id"]) == 1
+
+
+def test_key_reused_with_different_body(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+    client.post("/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=headers)
+    resp = client.post("/calculations", json={"type": "addition", "inputs": [1, 3]}, headers=headers)
+    assert resp.status_code == 422
+
+
+def test_key_reused_with_different_query_string(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4()), "Content-Type": "application/octet-stream"}
+    body = struct.pack("<2d", 2, 3)
+    first = client.post("/calculations?type=addition", content=body, headers=headers)
+    assert first.status_code == 201
+    resp = client.post("/calculations?type=multiplication", content=body, headers=headers)
+    assert resp.status_code == 422
+
+
+def test_retried_registration_is_replayed(client):
+    payload = {
+        "first_name": "Idem",
+        "last_name": "Potent",
+        "email": "idem@example.com",
+        "username": "idempotent",
+        "password": "SecurePass123!",
+        "confirm_password": "SecurePass123!",
+    }
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = client.post("/auth/register", json=payload, headers=headers)
+    retry = client.post("/auth/register", json=payload, headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+
+    # Without the key the duplicate reaches the handler
+    assert client.post("/auth/register", json=payload).status_code == 400
+
+
+def test_concurrent_duplicates_wait_for_the_original():
+    calls = []
+    inner = FastAPI()
+
+    @inner.post("/calculations")
+    async def create():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"n": len(calls)}
+
+    app = IdempotencyMiddleware(inner, store=MemoryIdempotencyStore(), wait_seconds=5)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            headers = {"Idempotency-Key": "same"}
+            return await asyncio.gather(*[ac.post("/calculations", headers=headers) for _ in range(5)])
+
+    responses = asyncio.run(run())
+    assert len(calls) == 1
+    assert {r.json()["n"] for r in responses} == {1}
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in responses) == 4
+
+
+def test_retry_after_token_refresh_is_replayed(client, registered_user):
+    login = client.post(
+        "/auth/login",
+        json={"username": registered_user["username"], "password": registered_user["password"]},
+    ).json()
+    key = str(uuid.uuid4())
+    payload = {"type": "addition", "inputs": [4, 5]}
+    first = client.post(
+        "/calculations", json=payload,
+        headers={"Authorization": f"Bearer {login['access_token']}", "Idempotency-Key": key},
+    )
+
+    # The client timed out, refreshed its tokens and retries
+    refreshed = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]}).json()
+    assert refreshed["access_token"] != login["access_token"]
+    retry = client.post(
+        "/calculations", json=payload,
+        headers={"Authorization": f"Bearer {refreshed['access_token']}", "Idempotency-Key": key},
+    )
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers["idempotent-replayed"] == "true"
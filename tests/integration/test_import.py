@@ -0,0 +1,83 @@
+# tests/integration/test_import.py
+
+import asyncio
+import json
+import time
+
+from app import importer
+from app.core.config import settings
+
+
+def _wait(client, headers, job_id):
+    for _ in range(200):
+        job = client.get(f"/calculations/import/{job_id}", headers=headers).json()
+        if job["status"] != "running":
+            return job
+        time.sleep(0.05)
+    raise AssertionError("import did not finish")
+
+
+def test_csv_import_reports_row_errors(client, auth_headers):
+    body = "type,a,b,c\naddition,1,2,3\n\ndivision,1,0\nmultiplication,2,x\nsubtraction,9,4\n"
+    resp = client.post(
+        "/calculations/import",
+        content=body,
+        headers={**auth_headers, "Content-Type": "text/csv"},
+    )
+    assert resp.status_code == 202
+
+    job = _wait(client, auth_headers, resp.json()["id"])
+    assert job["status"] == "completed"
+    assert job["rows_received"] == 4
+    assert job["rows_imported"] == 2
+    assert [e["line"] for e in job["errors"]] == [4, 5]
+
+    results = {c["result"] for c in client.get("/calculations", headers=auth_headers).json()}
+    assert {6.0, 5.0} <= results
+
+
+def test_ndjson_import_uses_process_pool_for_large_uploads(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_POOL_THRESHOLD", 0)
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 50)
+
+    def chunks():
+        for i in range(300):
+            yield (json.dumps({"type": "addition", "inputs": [i, 1000]}) + "\n").encode()
+
+    resp = client.post(
+        "/calculations/import",
+        content=chunks(),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 202
+
+    job = _wait(client, auth_headers, resp.json()["id"])
+    assert job["status"] == "completed"
+    assert job["rows_imported"] == 300
+    assert importer._pool is not None
+
+
+def test_import_rejects_unknown_content_type(client, auth_headers):
+    resp = client.post("/calculations/import", content="x", headers={**auth_headers, "Content-Type": "text/plain"})
+    assert resp.status_code == 415
+
+
+def test_overlong_and_undecodable_lines_are_row_errors():
+    async def chunks():
+        yield b"addition,1,2\nmultiplication," + b"9" * 40
+        yield b"9" * 40 + b"\n\xff\xfe\nsubtraction,"
+        yield b"5,1"
+
+    async def collect():
+        return [line async for line in importer.iter_lines(chunks(), max_bytes=64)]
+
+    lines = asyncio.run(collect())
+    assert [n for n, _ in lines] == [1, 2, 3, 4]
+    assert lines[0][1] == "addition,1,2" and lines[3][1] == "subtraction,5,1"
+
+    rows, errors = importer.prepare_batch(importer.CSV, lines)
+    assert len(rows) == 2
+    assert errors == [
+        {"line": 2, "error": "Line is longer than 64 bytes"},
+        {"line": 3, "error": "Line is not valid UTF-8"},
+    ]
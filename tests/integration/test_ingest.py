@@ -0,0 +1,71 @@
+# tests/integration/test_ingest.py
+
+import pytest
+
+from app.ingest import IngestFlusher, IngestQueue, get_ingest_queue
+from app.main import app
+from tests.conftest import TestingSessionLocal  # type: ignore
+
+
+@pytest.fixture()
+def queue(tmp_path):
+    queue = IngestQueue(str(tmp_path / "queue.db"))
+    app.dependency_overrides[get_ingest_queue] = lambda: queue
+    yield queue
+    app.dependency_overrides.pop(get_ingest_queue, None)
+    queue.close()
+
+
+def test_async_create_is_visible_after_flush(client, auth_headers, queue):
+    headers = {**auth_headers, "Prefer": "respond-async"}
+    resp = client.post("/calculations", json={"type": "addition", "inputs": [4, 5]}, headers=headers)
+    assert resp.status_code == 202
+    calc_id = resp.json()["id"]
+    assert resp.headers["location"] == f"/calculations/{calc_id}"
+    assert queue.depth() == 1
+
+    assert client.get(f"/calculations/{calc_id}", headers=auth_headers).status_code == 404
+
+    flusher = IngestFlusher(queue, TestingSessionLocal)
+    assert flusher.flush_once() == 1
+    assert queue.depth() == 0
+    assert flusher.metrics()["flushed_total"] == 1
+
+    resp = client.get(f"/calculations/{calc_id}", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json()["result"] == 9.0
+
+
+def test_replayed_batch_skips_rows_already_flushed(client, auth_headers, queue):
+    headers = {**auth_headers, "Prefer": "respond-async"}
+    client.post("/calculations", json={"type": "addition", "inputs": [1, 1]}, headers=headers)
+
+    flusher = IngestFlusher(queue, TestingSessionLocal)
+    # Simulate a crash between commit and ack: the item stays queued
+    queue.ack = lambda last_seq: None
+    assert flusher.flush_once() == 1
+    del queue.ack
+    assert flusher.flush_once() == 1
+    assert queue.depth() == 0
+
+
+def test_sync_create_without_prefer_header(client, auth_headers, queue):
+    resp = client.post("/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=auth_headers)
+    assert resp.status_code == 201
+    assert queue.depth() == 0
+
+
+def test_rows_that_cannot_be_inserted_are_dead_lettered(client, auth_headers, queue):
+    headers = {**auth_headers, "Prefer": "respond-async"}
+    good = client.post("/calculations", json={"type": "addition", "inputs": [2, 2]}, headers=headers).json()["id"]
+    # Its user was deleted between enqueue and flush
+    orphan = dict(queue.peek(1)[0][1], id="00000000-0000-7000-8000-0000000000aa",
+                  user_id="00000000-0000-7000-8000-0000000000bb")
+    queue.put(orphan)
+
+    flusher = IngestFlusher(queue, TestingSessionLocal)
+    assert flusher.flush_once() == 2
+    assert queue.depth() == 0
+    assert [item["id"] for _, item, _ in queue.dead_letters()] == [orphan["id"]]
+    assert flusher.metrics()["dead_lettered_total"] == 1
+    assert client.get(f"/calculations/{good}", headers=auth_headers).status_code == 200
@@ -0,0 +1,69 @@
+# tests/integration/test_login_lookup.py
+
+import pytest
+from sqlalchemy.dialects import sqlite
+
+from app.models.user import User
+from tests.conftest import TestingSessionLocal, engine_test  # type: ignore
+
+
+def _plan(identifier):
+    sql = str(User.lookup_query(identifier).compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    with engine_test.connect() as conn:
+        return " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+
+@pytest.mark.parametrize(
+    "identifier, index",
+    [("Someone@Example.com", "ix_users_email_lower"), ("SomeOne", "ix_users_username_lower")],
+)
+def test_login_lookup_is_a_single_index_probe(identifier, index):
+    plan = _plan(identifier)
+    assert f"SEARCH users USING INDEX {index}" in plan
+    assert "SCAN" not in plan
+
+
+def test_login_is_case_insensitive(client, registered_user):
+    for identifier in (registered_user["username"].upper(), registered_user["email"].upper()):
+        resp = client.post("/auth/login", json={"username": identifier, "password": registered_user["password"]})
+        assert resp.status_code == 200
+
+
+def test_case_variant_duplicates_are_rejected(client, registered_user):
+    payload = {
+        **registered_user,
+        "username": registered_user["username"].upper(),
+        "email": "unique-" + registered_user["email"],
+        "confirm_password": registered_user["password"],
+    }
+    resp = client.post("/auth/register", json=payload)
+    assert resp.status_code == 400
+
+
+def test_non_ascii_usernames_can_log_in(client):
+    payload = {
+        "first_name": "Emile",
+        "last_name": "Zola",
+        "email": "emile@example.com",
+        "username": "ÉMILE",
+        "password": "StrongPass123!",
+        "confirm_password": "StrongPass123!",
+    }
+    assert client.post("/auth/register", json=payload).status_code == 201
+    assert client.post("/auth/register", json={**payload, "email": "other@example.com"}).status_code == 400
+    resp = client.post("/auth/login", json={"username": "ÉMILE", "password": payload["password"]})
+    assert resp.status_code == 200
+
+
+def test_legacy_usernames_with_at_sign_can_log_in(client):
+    with TestingSessionLocal() as db:
+        db.add(User(
+            username="old@name",
+            email="legacy@example.com",
+            first_name="Legacy",
+            last_name="User",
+            password=User.hash_password("StrongPass123!"),
+        ))
+        db.commit()
+    resp = client.post("/auth/login", json={"username": "old@name", "password": "StrongPass123!"})
+    assert resp.status_code == 200
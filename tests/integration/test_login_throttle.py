@@ -0,0 +1,81 @@
+# tests/integration/test_login_throttle.py
+
+import pytest
+
+from app.core.throttle import LoginThrottle, MemoryThrottleStore
+from app.models.user import User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = FakeClock()
+    throttle = LoginThrottle(MemoryThrottleStore(clock=clock), identifier_limit=3, ip_limit=10, window=60)
+    monkeypatch.setattr("app.api.routes.auth.login_throttle", throttle)
+    return clock
+
+
+def _login(client, username, password="WrongPassword123!"):
+    return client.post("/auth/login", json={"username": username, "password": password})
+
+
+def test_throttled_before_db_and_bcrypt(client, registered_user, clock, monkeypatch):
+    for _ in range(3):
+        assert _login(client, registered_user["username"]).status_code == 401
+
+    def no_lookup(*args, **kwargs):
+        raise AssertionError("throttled login must not reach authenticate")
+
+    monkeypatch.setattr(User, "authenticate", no_lookup)
+    resp = _login(client, registered_user["username"].upper())
+    assert resp.status_code == 429
+    assert resp.headers["retry-after"] == "1"
+
+
+def test_backoff_doubles_and_window_expires(client, registered_user, clock):
+    username = registered_user["username"]
+    for _ in range(3):
+        _login(client, username)
+
+    clock.now += 1
+    assert _login(client, username).status_code == 401  # 4th failure -> 2s wait
+    assert _login(client, username).headers["retry-after"] == "2"
+
+    clock.now += 2
+    assert _login(client, username).status_code == 401  # 5th failure -> 4s wait
+    assert _login(client, username).headers["retry-after"] == "4"
+
+    clock.now += 61
+    resp = _login(client, username, registered_user["password"])
+    assert resp.status_code == 200
+
+
+def test_ip_limit_covers_many_identifiers(client, clock):
+    for i in range(10):
+        assert _login(client, f"nobody{i}").status_code == 401
+    assert _login(client, "someone-else").status_code == 429
+
+
+def test_success_resets_identifier_failures(client, registered_user, clock):
+    username = registered_user["username"]
+    for _ in range(2):
+        _login(client, username)
+    assert _login(client, username, registered_user["password"]).status_code == 200
+    for _ in range(2):
+        assert _login(client, username).status_code == 401
+
+
+def test_ip_limit_can_be_turned_off():
+    clock = FakeClock()
+    throttle = LoginThrottle(MemoryThrottleStore(clock=clock), identifier_limit=3, ip_limit=0, window=60)
+    for i in range(50):
+        throttle.failure(f"user{i}", "10.0.0.1")  # e.g. everyone behind one proxy
+    assert throttle.retry_after("someone-else", "10.0.0.1") == 0
+    assert throttle.retry_after("user1", "10.0.0.1") == 0  # one failure, below its own limit
@@ -0,0 +1,85 @@
+# tests/integration/test_logout.py
+
+from uuid import UUID
+
+from app.core.revocation import RevocationList, revocation_list
+from app.core.security import decode_token
+from app.models.user import User
+from tests.conftest import TestingSessionLocal  # type: ignore
+
+
+def _login(client, user):
+    return client.post(
+        "/auth/login", json={"username": user["username"], "password": user["password"]}
+    ).json()
+
+
+def test_logout_revokes_access_and_refresh_tokens(client, registered_user):
+    tokens = _login(client, registered_user)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/calculations", headers=headers).status_code == 200
+
+    resp = client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    assert resp.status_code == 204
+
+    resp = client.get("/calculations", headers=headers)
+    assert resp.status_code == 401
+    assert resp.json()["detail"] == "Token has been revoked"
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    # A new login still works
+    fresh = _login(client, registered_user)
+    headers = {"Authorization": f"Bearer {fresh['access_token']}"}
+    assert client.get("/calculations", headers=headers).status_code == 200
+
+
+def test_valid_tokens_skip_the_database_check(client, auth_headers):
+    before = revocation_list.db_checks
+    for _ in range(5):
+        assert client.get("/calculations", headers=auth_headers).status_code == 200
+    assert revocation_list.db_checks == before
+
+
+def test_other_workers_pick_up_revocations_on_sync(client, registered_user):
+    """A second worker's filter learns about a logout through the table."""
+    other_worker = RevocationList(capacity=1000, sync_interval=0)
+    db = TestingSessionLocal()
+    try:
+        other_worker.sync(db)
+        tokens = _login(client, registered_user)
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        client.post("/auth/logout", headers=headers)
+
+        payload = decode_token(tokens["access_token"])
+        assert payload["jti"] not in other_worker.bloom
+        assert other_worker.is_revoked(db, payload)
+        assert payload["jti"] in other_worker.bloom
+    finally:
+        db.close()
+
+
+def test_deactivating_a_user_invalidates_existing_tokens(client, registered_user):
+    tokens = _login(client, registered_user)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/calculations", headers=headers).status_code == 200
+
+    db = TestingSessionLocal()
+    try:
+        user_id = UUID(decode_token(tokens["access_token"])["sub"])
+        db.get(User, user_id).deactivate(db)
+        db.commit()
+    finally:
+        db.close()
+
+    assert client.get("/calculations", headers=headers).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    # Tokens issued after reactivation are not covered by the revocation
+    db = TestingSessionLocal()
+    try:
+        db.get(User, user_id).is_active = True
+        db.commit()
+    finally:
+        db.close()
+    fresh = _login(client, registered_user)
+    assert client.get("/calculations", headers={"Authorization": f"Bearer {fresh['access_token']}"}).status_code == 200
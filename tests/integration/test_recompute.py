@@ -0,0 +1,117 @@
+# tests/integration/test_recompute.py
+
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.database import Base, get_engines, get_sessionmaker
+from app.models.calculation import Calculation, CalculationDependency
+from app.models.user import User
+from app import recompute
+from app.recompute import Checkpoint, run_recompute
+
+
+def _results(engine):
+    table = Calculation.__table__
+    with engine.connect() as conn:
+        return {row.id: row for row in conn.execute(select(table))}
+
+
+class Recorder:
+    """Stands in for the cache and the broadcaster."""
+
+    def __init__(self):
+        self.invalidated, self.events = set(), []
+
+    def invalidate(self, user_id, calc_id):
+        self.invalidated.add(calc_id)
+
+    def calculation_changed(self, event, calc):
+        self.events.append((event, calc.id, calc.result))
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(recompute, "calculation_cache", recorder)
+    monkeypatch.setattr(recompute, "event_broadcaster", recorder)
+    return recorder
+
+
+def _seed(tmp_path):
+    """25 rows: ids[0] stale, ids[1] derived from it, ids[5] without input_count."""
+    engine = get_engines(f"sqlite:///{tmp_path / 'recompute.db'}")[0]
+    Base.metadata.create_all(bind=engine)
+    db = get_sessionmaker(engine)()
+    owner = User(username="r", email="r@example.com", first_name="R", last_name="C", password="x")
+    db.add(owner)
+    db.flush()
+
+    rows = [Calculation.create("addition", owner.id, [i, 1]) for i in range(25)]
+    for calc in rows:
+        calc.result = calc.get_result()
+    upstream, downstream = rows[0], rows[1]
+    upstream.result = 999.0  # stale
+    downstream.inputs = [999.0, 1]
+    downstream.result = 1000.0
+    db.add_all(rows)
+    db.flush()
+    db.add(CalculationDependency(
+        user_id=owner.id, calculation_id=downstream.id, depends_on_id=upstream.id, position=0
+    ))
+    db.commit()
+    ids = [calc.id for calc in rows]
+    db.close()
+
+    # Rows written before input_count existed
+    with engine.begin() as conn:
+        conn.execute(Calculation.__table__.update().where(Calculation.id == ids[5]).values(input_count=None))
+    return engine, ids
+
+
+def test_recompute_fixes_stale_rows_and_resumes(tmp_path, recorder):
+    engine, ids = _seed(tmp_path)
+
+    checkpoint = tmp_path / "checkpoint.json"
+    stats = run_recompute([engine], batch_size=10, workers=1, checkpoint_path=str(checkpoint))
+    (engine_stats,) = stats.values()
+    assert engine_stats["scanned"] == 25
+    assert engine_stats["changed"] == 2  # the stale row and the missing input_count
+    assert engine_stats["derived"] == 1
+
+    stored = _results(engine)
+    assert stored[ids[0]].result == 1.0
+    assert stored[ids[1]].inputs == [1.0, 1] and stored[ids[1]].result == 2.0
+    assert stored[ids[5]].input_count == 2
+    assert json.loads(checkpoint.read_text()) == {str(engine.url): str(max(ids))}
+
+    # Resuming from the checkpoint has nothing left to scan
+    (again,) = run_recompute([engine], batch_size=10, workers=1, checkpoint_path=str(checkpoint)).values()
+    assert again["scanned"] == 0
+
+    # Caches and streams hear about every rewritten row, derived ones included
+    assert recorder.invalidated == {ids[0], ids[1], ids[5]}
+    assert ("updated", ids[1], 2.0) in recorder.events
+
+
+def test_interrupted_run_keeps_derived_rows_of_finished_chunks(tmp_path, recorder, monkeypatch):
+    engine, ids = _seed(tmp_path)
+    checkpoint = tmp_path / "checkpoint.json"
+    real_save = Checkpoint.save
+
+    def save_then_crash(self, key, last_id):
+        real_save(self, key, last_id)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(Checkpoint, "save", save_then_crash)
+    with pytest.raises(KeyboardInterrupt):
+        run_recompute([engine], batch_size=10, workers=1, checkpoint_path=str(checkpoint))
+    monkeypatch.setattr(Checkpoint, "save", real_save)
+
+    # The first chunk held both ends of the edge; resuming starts after it
+    (resumed,) = run_recompute([engine], batch_size=10, workers=1, checkpoint_path=str(checkpoint)).values()
+    assert resumed["scanned"] == 15
+    stored = _results(engine)
+    assert stored[ids[0]].result == 1.0
+    assert stored[ids[1]].result == 2.0
@@ -0,0 +1,45 @@
+# tests/integration/test_refresh_tokens.py
+
+from app.models.user import User
+
+
+def _login(client, user):
+    resp = client.post("/auth/login", json={"username": user["username"], "password": user["password"]})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_refresh_issues_new_tokens_without_bcrypt(client, registered_user, monkeypatch):
+    tokens = _login(client, registered_user)
+    assert tokens["refresh_token"]
+
+    def no_bcrypt(self, password):
+        raise AssertionError("refresh must not verify the password")
+
+    monkeypatch.setattr(User, "verify_password", no_bcrypt)
+    resp = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 200
+    refreshed = resp.json()
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    headers = {"Authorization": f"Bearer {refreshed['access_token']}"}
+    assert client.get("/calculations", headers=headers).status_code == 200
+
+
+def test_reused_refresh_token_revokes_the_family(client, registered_user):
+    first = _login(client, registered_user)["refresh_token"]
+    second = client.post("/auth/refresh", json={"refresh_token": first}).json()["refresh_token"]
+
+    # Replaying the rotated token is treated as theft...
+    assert client.post("/auth/refresh", json={"refresh_token": first}).status_code == 401
+    # ...and the legitimate successor stops working too
+    assert client.post("/auth/refresh", json={"refresh_token": second}).status_code == 401
+
+    # Other sessions (families) are unaffected
+    other = _login(client, registered_user)["refresh_token"]
+    assert client.post("/auth/refresh", json={"refresh_token": other}).status_code == 200
+
+
+def test_access_token_is_not_a_refresh_token(client, registered_user):
+    access = _login(client, registered_user)["access_token"]
+    assert client.post("/auth/refresh", json={"refresh_token": access}).status_code == 401
@@ -0,0 +1,57 @@
+# tests/integration/test_registration.py
+
+import pytest
+
+from app.models.user import User
+from tests.conftest import TestingSessionLocal  # type: ignore
+
+
+def _payload(username, email):
+    return {
+        "username": username,
+        "email": email,
+        "password": "SecurePass123!",
+        "first_name": "Reg",
+        "last_name": "Istration",
+    }
+
+
+def test_duplicate_is_rejected_before_hashing(monkeypatch):
+    db = TestingSessionLocal()
+    try:
+        User.register(db, _payload("probe_user", "probe@example.com"))
+        db.commit()
+
+        def no_hash(password):
+            raise AssertionError("bcrypt should not run for a known duplicate")
+
+        monkeypatch.setattr(User, "hash_password", staticmethod(no_hash))
+        with pytest.raises(ValueError, match="already exists"):
+            User.register(db, _payload("probe_user", "other@example.com"))
+        with pytest.raises(ValueError, match="already exists"):
+            User.register(db, _payload("other_user", "probe@example.com"))
+    finally:
+        db.close()
+
+
+def test_conflict_that_slips_past_the_probe(monkeypatch):
+    """A concurrent insert between probe and INSERT maps to the same error."""
+    db = TestingSessionLocal()
+    try:
+        User.register(db, _payload("racer", "racer@example.com"))
+        db.commit()
+
+        monkeypatch.setattr(User, "exists", classmethod(lambda cls, db, u, e: False))
+        with pytest.raises(ValueError, match="already exists"):
+            User.register(db, _payload("racer", "racer2@example.com"))
+        db.rollback()
+    finally:
+        db.close()
+
+
+def test_register_route_duplicate_returns_400(client):
+    payload = {**_payload("route_dup", "route_dup@example.com"), "confirm_password": "SecurePass123!"}
+    assert client.post("/auth/register", json=payload).status_code == 201
+    resp = client.post("/auth/register", json=payload)
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Username or email already exists"
@@ -0,0 +1,60 @@
+# tests/integration/test_replicas.py
+
+from sqlalchemy import column, func, select, table, text
+
+from app.database import ReplicaPool, get_engines, get_sessionmaker
+
+items = table("items", column("n"))
+
+
+def _engine_with_rows(path, rows):
+    engine = get_engines(f"sqlite:///{path}")[0]
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE items (n INTEGER)")
+        for n in rows:
+            conn.exec_driver_sql(f"INSERT INTO items VALUES ({n})")
+    return engine
+
+
+def _count(session, **options):
+    stmt = select(func.count()).select_from(items).execution_options(**options)
+    return session.execute(stmt).scalar()
+
+
+def test_round_robin_skips_unhealthy_replicas(tmp_path):
+    a = _engine_with_rows(tmp_path / "a.db", [1])
+    b = _engine_with_rows(tmp_path / "b.db", [1])
+    pool = ReplicaPool([a, b])
+
+    assert [pool.choose() for _ in range(4)] == [a, b, a, b]
+
+    b.dispose()
+    (tmp_path / "b.db").unlink()
+    (tmp_path / "b.db").mkdir()  # connecting now fails
+    pool.check_health()
+    assert [pool.choose() for _ in range(3)] == [a, a, a]
+
+
+def test_read_only_sessions_use_replica_until_user_writes(tmp_path):
+    primary = _engine_with_rows(tmp_path / "primary.db", [1, 2])
+    replica = _engine_with_rows(tmp_path / "replica.db", [1])  # lagging copy
+    pool = ReplicaPool([replica], sticky_seconds=60)
+    Session = get_sessionmaker(primary, replicas=pool)
+
+    db = Session()
+    try:
+        db.info["user_id"] = "user-1"
+        assert _count(db) == 2  # not read-only: primary
+        db.info["read_only"] = True
+        assert _count(db) == 1  # replica
+        assert _count(db, use_replica=False) == 2
+
+        db.execute(text("INSERT INTO items VALUES (3)"))
+        db.commit()
+
+        # Read-your-writes: this user is pinned to the primary for a while
+        assert _count(db) == 3
+        db.info["user_id"] = "user-2"
+        assert _count(db) == 1
+    finally:
+        db.close()
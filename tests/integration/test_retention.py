@@ -0,0 +1,100 @@
+# tests/integration/test_retention.py
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from app.database import Base, get_engines, get_sessionmaker
+from app.models.calculation import Calculation
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.retention import run_retention
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def _user(name, active=True, updated=NOW):
+    return User(
+        username=name,
+        email=f"{name}@example.com",
+        first_name="R",
+        last_name="T",
+        password="x",
+        is_active=active,
+        updated_at=updated,
+    )
+
+
+def _count(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+
+def test_retention_purges_in_batches(tmp_path):
+    engine = get_engines(f"sqlite:///{tmp_path / 'retention.db'}")[0]
+    Base.metadata.create_all(bind=engine)
+    db = get_sessionmaker(engine)()
+
+    keeper = _user("keeper")
+    gone = _user("gone", active=False, updated=NOW - timedelta(days=400))
+    db.add_all([keeper, gone])
+    db.flush()
+
+    old = (NOW - timedelta(days=100)).replace(tzinfo=None)
+    for i in range(25):
+        db.add(Calculation.create("addition", user_id=keeper.id, inputs=[1, i]))
+        db.add(Calculation.create("addition", user_id=gone.id, inputs=[1, i]))
+    db.flush()
+    db.query(Calculation).update(
+        {Calculation.created_at: old}, synchronize_session=False
+    )
+    for i in range(5):
+        db.add(Calculation.create("addition", user_id=keeper.id, inputs=[2, i]))
+    db.commit()
+    db.close()
+
+    stats = run_retention(
+        engine, calculation_days=30, inactive_user_days=365, batch_size=10, pause=0, now=NOW
+    )
+
+    assert stats == {"calculations": 50, "users": 1, "revoked_tokens": 0}
+    assert _count(engine, Calculation) == 5
+    assert _count(engine, User) == 1
+
+
+def test_user_delete_relies_on_fk_cascade(tmp_path):
+    engine = get_engines(f"sqlite:///{tmp_path / 'cascade.db'}")[0]
+    Base.metadata.create_all(bind=engine)
+    db = get_sessionmaker(engine)()
+
+    user = _user("cascade")
+    db.add(user)
+    db.flush()
+    db.add_all([Calculation.create("addition", user_id=user.id, inputs=[1, 2]) for _ in range(3)])
+    user_id = user.id
+    db.commit()
+
+    db.expunge_all()
+    user = db.get(User, user_id)
+    db.delete(user)
+    db.commit()
+
+    assert "calculations" not in user.__dict__  # children never loaded
+    assert _count(engine, Calculation) == 0
+    db.close()
+
+
+def test_expired_revocations_are_purged(tmp_path):
+    engine = get_engines(f"sqlite:///{tmp_path / 'revocations.db'}")[0]
+    Base.metadata.create_all(bind=engine)
+    db = get_sessionmaker(engine)()
+    db.add_all([
+        RevokedToken(key="expired", revoked_at=NOW - timedelta(hours=2), expires_at=NOW - timedelta(hours=1)),
+        RevokedToken(key="live", revoked_at=NOW, expires_at=NOW + timedelta(hours=1)),
+    ])
+    db.commit()
+    db.close()
+
+    assert run_retention(engine, pause=0, now=NOW)["revoked_tokens"] == 1
+    with engine.connect() as conn:
+        assert conn.execute(select(RevokedToken.key)).scalars().all() == ["live"]
@@ -0,0 +1,70 @@
+# tests/integration/test_sharding.py
+
+from collections import Counter
+
+from sqlalchemy import func, select
+
+from app.core.ids import uuid7
+from app.database import get_engines, get_sessionmaker
+from app.models.calculation import Calculation
+from app.sharding import ShardMap, create_shard_tables, rebalance, shard_tables
+
+
+def _shards(tmp_path, count):
+    return [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(count)]
+
+
+def _rows_per_shard(shard_map):
+    table = next(t for t in shard_tables() if t.name == "calculations")
+    counts = []
+    for engine in shard_map.engines:
+        with engine.connect() as conn:
+            counts.append(conn.execute(select(func.count()).select_from(table)).scalar())
+    return counts
+
+
+def test_sessions_route_calculations_to_user_shard(tmp_path):
+    primary = get_engines(f"sqlite:///{tmp_path / 'primary.db'}")[0]
+    shard_map = ShardMap(_shards(tmp_path, 3))
+    create_shard_tables(shard_map)
+    Session = get_sessionmaker(primary, shards=shard_map)
+
+    user_ids = [uuid7() for _ in range(30)]
+    for user_id in user_ids:
+        db = Session()
+        db.info["user_id"] = user_id
+        db.add(Calculation.create("addition", user_id=user_id, inputs=[1, 2]))
+        db.commit()
+
+        # Route code stays unaware: same query as app/api/routes/calculations.py
+        rows = db.query(Calculation).filter(Calculation.user_id == user_id).all()
+        assert len(rows) == 1 and rows[0].get_result() == 3.0
+        db.close()
+
+    expected = Counter(shard_map.shard_for(u) for u in user_ids)
+    assert _rows_per_shard(shard_map) == [expected[i] for i in range(3)]
+
+
+def test_rebalance_moves_only_remapped_users(tmp_path):
+    urls = _shards(tmp_path, 3)
+    old_map = ShardMap(urls[:2])
+    new_map = ShardMap(urls)
+    create_shard_tables(new_map)
+    Session = get_sessionmaker(get_engines("sqlite://")[0], shards=old_map)
+
+    user_ids = [uuid7() for _ in range(40)]
+    for user_id in user_ids:
+        db = Session()
+        db.info["user_id"] = user_id
+        db.add_all([Calculation.create("addition", user_id=user_id, inputs=[1, i]) for i in range(3)])
+        db.commit()
+        db.close()
+
+    stats = rebalance(old_map, new_map, batch_size=2)
+
+    movers = [u for u in user_ids if old_map.shard_for(u) != new_map.shard_for(u)]
+    assert 0 < len(movers) < len(user_ids)
+    assert stats == {"users": len(movers), "rows": 3 * len(movers)}
+
+    expected = Counter(new_map.shard_for(u) for u in user_ids)
+    assert _rows_per_shard(new_map) == [3 * expected[i] for i in range(3)]
@@ -0,0 +1,47 @@
+# tests/integration/test_sqlite_profile.py
+
+from sqlalchemy import column, func, select, table, text
+
+from app.database import get_engines, get_sessionmaker
+
+
+def test_sqlite_profile_pragmas(tmp_path):
+    engine, read_engine = get_engines(f"sqlite:///{tmp_path / 'profile.db'}")
+    assert read_engine is not None
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 0
+
+    with read_engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+
+
+def test_reads_do_not_block_behind_open_write(tmp_path):
+    engine, read_engine = get_engines(f"sqlite:///{tmp_path / 'routing.db'}")
+    Session = get_sessionmaker(engine, read_engine)
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE items (n INTEGER)")
+        conn.exec_driver_sql("INSERT INTO items VALUES (1)")
+
+    writer = Session()
+    reader = Session()
+    try:
+        writer.execute(text("INSERT INTO items VALUES (2)"))  # write lock held
+
+        # Reader goes to the read pool and sees the last committed state
+        items = table("items", column("n"))
+        assert reader.execute(select(func.count()).select_from(items)).scalar() == 1
+
+        # The writing session reads its own uncommitted row
+        assert writer.execute(select(func.count()).select_from(items)).scalar() == 2
+
+        writer.commit()
+        reader.rollback()
+        assert reader.execute(select(func.count()).select_from(items)).scalar() == 2
+    finally:
+        writer.close()
+        reader.close()
@@ -0,0 +1,52 @@
+# tests/unit/test_events.py
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from app.api.events import EventBroadcaster
+from app.core.pubsub import MemoryPubSub
+
+
+def test_events_reach_only_the_users_streams():
+    async def scenario():
+        broadcaster = EventBroadcaster(pubsub=MemoryPubSub())
+        mine, other = broadcaster.subscribe("u1"), broadcaster.subscribe("u2")
+
+        # Writers publish from worker threads
+        thread = threading.Thread(target=broadcaster.publish, args=("u1", "created", '{"id": 1}'))
+        thread.start()
+        thread.join()
+
+        assert await mine.next(1) == 'event: created\ndata: {"id": 1}\n\n'
+        assert await other.next(0.05) is None
+        broadcaster.unsubscribe(mine)
+        broadcaster.unsubscribe(other)
+        assert broadcaster.metrics()["streams"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_slow_streams_drop_oldest_and_are_told():
+    async def scenario():
+        broadcaster = EventBroadcaster(pubsub=MemoryPubSub(), queue_size=2)
+        stream = broadcaster.subscribe("u1")
+        for i in range(5):
+            broadcaster.publish("u1", "updated", str(i))
+        await asyncio.sleep(0)
+
+        frames = [await stream.next(1) for _ in range(3)]
+        assert frames == [
+            'event: dropped\ndata: {"count": 3}\n\n',
+            "event: updated\ndata: 3\n\n",
+            "event: updated\ndata: 4\n\n",
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_unserializable_rows_are_logged_not_raised():
+    broadcaster = EventBroadcaster(pubsub=MemoryPubSub())
+    bad = SimpleNamespace(id="not-a-uuid", user_id="u1", type="addition", inputs=None, result=None)
+    broadcaster.calculation_changed("created", bad)  # must not raise into the writer
+    assert broadcaster.metrics()["published"] == 0
@@ -0,0 +1,51 @@
+# tests/unit/test_expressions.py
+
+import pytest
+
+from app.core.expressions import compile_expression
+
+
+def test_evaluates_named_inputs_and_functions():
+    assert compile_expression("(x0 + x1) * x2").evaluate([1, 2, 4]) == 12.0
+    assert compile_expression("sqrt(x0) + max(x1, 10) - x2 ** 2").evaluate([16, 3, 3]) == 5.0
+    assert compile_expression("-x1 % 3").evaluate([0, 4]) == 2.0
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "__import__('os').system('true')",
+        "x0.real",
+        "x0[0]",
+        "(lambda: 1)()",
+        "y + 1",
+        "'a' * 3",
+        "x0 if x1 else 2",
+        "abs(x=1)",
+    ],
+)
+def test_rejects_anything_outside_the_whitelist(text):
+    with pytest.raises(ValueError):
+        compile_expression(text)
+
+
+def test_runtime_errors_become_value_errors():
+    with pytest.raises(ValueError, match="divide by zero"):
+        compile_expression("x0 / x1").evaluate([1, 0])
+    with pytest.raises(ValueError):
+        compile_expression("9 ** 9 ** 9").evaluate([1, 2])
+    with pytest.raises(ValueError, match="x2"):
+        compile_expression("x0 + x2").evaluate([1, 2])
+
+
+def test_parse_is_cached_by_text():
+    compile_expression.cache_clear()
+    first = compile_expression("x0 * 2 + x1")
+    assert compile_expression("x0 * 2 + x1") is first
+    assert compile_expression.cache_info().hits == 1
+
+
+def test_evaluate_many_matches_row_by_row():
+    compiled = compile_expression("(x0 - x1) / 2")
+    rows = [[float(i), 1.0, 99.0] for i in range(100)]
+    assert compiled.evaluate_many(rows) == [compiled.evaluate(r) for r in rows]
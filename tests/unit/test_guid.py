@@ -0,0 +1,30 @@
+# tests/unit/test_guid.py
+
+import uuid
+
+import pytest
+from sqlalchemy import Column, MetaData, Table, create_engine, select
+
+from app.models.calculation import GUID
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_guid_round_trip(binary):
+    engine = create_engine("sqlite://")
+    table = Table("guids", MetaData(), Column("id", GUID(binary=binary), primary_key=True))
+    table.metadata.create_all(engine)
+
+    value = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [{"id": value}, {"id": str(uuid.uuid4())}])
+        fetched = conn.execute(select(table.c.id).where(table.c.id == str(value))).scalar_one()
+        raw = conn.exec_driver_sql("SELECT id FROM guids LIMIT 1").scalar_one()
+
+    assert fetched == value
+    assert isinstance(fetched, uuid.UUID)
+    assert str(fetched) == str(value)
+    assert hash(fetched) == hash(value)
+    if binary:
+        assert isinstance(raw, bytes) and len(raw) == 16
+    else:
+        assert isinstance(raw, str) and len(raw) == 36
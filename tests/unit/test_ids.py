@@ -0,0 +1,26 @@
+# tests/unit/test_ids.py
+
+import time
+import uuid
+
+from app.core.ids import uuid7, uuid7_timestamp_ms
+
+
+def test_uuid7_version_and_variant():
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+def test_uuid7_is_monotonic_within_process():
+    ids = [uuid7() for _ in range(10_000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_uuid7_embeds_current_timestamp():
+    before = time.time_ns() // 1_000_000
+    value = uuid7()
+    after = time.time_ns() // 1_000_000
+    # Counter overflow may borrow a few ms ahead of the wall clock
+    assert before <= uuid7_timestamp_ms(value) <= after + 5
@@ -0,0 +1,23 @@
+# tests/unit/test_partitions.py
+
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.partitions import add_months, partition_month, partition_name, partitioned_table
+
+
+def test_month_helpers():
+    assert add_months(datetime(2024, 11, 1), 3) == datetime(2025, 2, 1)
+    assert add_months(datetime(2024, 1, 1), -1) == datetime(2023, 12, 1)
+    assert partition_name(datetime(2024, 2, 1)) == "calculations_p202402"
+    assert partition_month("calculations_p202402") == datetime(2024, 2, 1)
+    assert partition_month("calculations_default") is None
+
+
+def test_partitioned_table_ddl():
+    ddl = str(CreateTable(partitioned_table()).compile(dialect=postgresql.dialect()))
+    assert "PARTITION BY RANGE (created_at)" in ddl
+    assert "PRIMARY KEY (id, created_at)" in ddl
+    assert "REFERENCES users (id) ON DELETE CASCADE" in ddl
@@ -0,0 +1,36 @@
+# tests/unit/test_revocation.py
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.core.revocation import BloomFilter, RevocationList
+from app.database import Base, get_engines, get_sessionmaker
+from app.models import user  # noqa: F401 (mapper registry)
+from app.models.revoked_token import RevokedToken
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    added = [str(uuid.uuid4()) for _ in range(10_000)]
+    for key in added:
+        bloom.add(key)
+
+    assert all(key in bloom for key in added)
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(10_000))
+    assert false_positives < 300
+
+
+def test_repeated_syncs_do_not_inflate_the_filter(tmp_path):
+    engine = get_engines(f"sqlite:///{tmp_path / 'revocation.db'}")[0]
+    Base.metadata.create_all(bind=engine)
+    db = get_sessionmaker(engine)()
+    now = datetime.now(timezone.utc)
+    db.add_all(RevokedToken(key=f"jti-{i}", revoked_at=now, expires_at=now + timedelta(hours=1)) for i in range(3))
+    db.commit()
+
+    revocations = RevocationList(capacity=5)
+    for _ in range(10):
+        assert revocations.sync(db) == 3  # the lookback window re-reads the same rows
+    assert revocations.bloom.count == 3
+    assert revocations.capacity == 5  # never rebuilt
+    db.close()
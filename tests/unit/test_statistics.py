@@ -0,0 +1,43 @@
+# tests/unit/test_statistics.py
+
+import random
+import statistics as exact
+
+import pytest
+
+from app.core import statistics
+from app.models.calculation import Calculation
+
+
+def test_welford_matches_exact_statistics():
+    rng = random.Random(7)
+    # Large offset: naive sum-of-squares would lose the variance entirely
+    values = [1e9 + rng.gauss(0, 1) for _ in range(10_000)]
+    assert statistics.mean(values) == pytest.approx(exact.fmean(values))
+    assert statistics.variance(values) == pytest.approx(exact.variance(values), rel=1e-6)
+    assert statistics.stddev(values) == pytest.approx(exact.stdev(values), rel=1e-6)
+
+
+@pytest.mark.parametrize("p", [0.5, 0.9, 0.95, 0.99])
+def test_p2_quantile_is_close_to_exact(p):
+    rng = random.Random(11)
+    values = [rng.uniform(0, 1000) for _ in range(50_000)]
+    expected = exact.quantiles(values, n=100, method="inclusive")[round(p * 100) - 1]
+    assert statistics.quantile(values, p) == pytest.approx(expected, abs=10)
+
+
+def test_small_inputs_are_exact():
+    assert statistics.quantile([3, 1, 2], 0.5) == 2.0
+    assert statistics.quantile([1, 2, 3, 4], 0.5) == 2.5
+
+
+def test_statistic_types_via_factory():
+    inputs = [2, 4, 4, 4, 5, 5, 7, 9]
+    results = {
+        t: Calculation.create(t, user_id=None, inputs=inputs).get_result()
+        for t in ("mean", "variance", "stddev", "min", "max", "median")
+    }
+    assert results["mean"] == 5.0
+    assert results["variance"] == pytest.approx(32 / 7)
+    assert results["min"] == 2.0 and results["max"] == 9.0
+    assert results["median"] == pytest.approx(4.5, abs=0.5)